@@ -0,0 +1,363 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PORT_SCAN_DIR = os.path.join(ROOT, 'modules', 'port_scan')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# Variação a partir da qual o --compare acusa regressão
+DEFAULT_THRESHOLD = 0.10
+
+PORT_SCAN_MAIN = os.path.join('modules', 'port_scan', 'main.py')
+
+# Tempo de abertura além do próprio interpretador (ms): (argumentos, orçamento). O alvo
+# vai pela entrada padrão no modo em lote; {port} é uma porta aberta do TcpFarm
+STARTUP_COMMANDS = {
+    'startup_help': (['main.py', '--help'], 100),
+    'startup_portscan_help': ([PORT_SCAN_MAIN, '--help'], 100),
+    'startup_port_check': ([PORT_SCAN_MAIN, '{host}', '--start', '{port}', '--end', '{port}'], 150),
+    'startup_batch_check': (['main.py', '--alvos', '-', '--modulos', 'portas', '--portas', '{port}'], 150),
+}
+
+BENCHMARKS: Dict[str, Callable[[Dict], int]] = {}
+# Estágio das métricas (core.metrics) usado para a latência por operação
+STAGES: Dict[str, Optional[str]] = {}
+
+
+def benchmark(name: str, stage: Optional[str] = None):
+    """Registra uma função de benchmark; ela recebe o ambiente e retorna quantos itens processou"""
+    def register(func):
+        BENCHMARKS[name] = func
+        STAGES[name] = stage
+        return func
+    return register
+
+
+class _NullProgress:
+    def update(self, n=1):
+        pass
+
+
+@benchmark('tcp_scan', stage='connect')
+def bench_tcp_scan(env):
+    from scanner.tcp_scan import tcp_scan
+    ports = env['tcp_ports']
+    tcp_scan(env['host'], ports, progress=_NullProgress())
+    return len(ports)
+
+
+@benchmark('udp_scan', stage='udp')
+def bench_udp_scan(env):
+    from scanner.udp_scan import udp_scan
+    ports = env['udp_ports']
+    udp_scan(env['host'], ports, progress=_NullProgress())
+    return len(ports)
+
+
+@benchmark('dir_scan', stage='http')
+def bench_dir_scan(env):
+    from modules.web.dir_scanner import EscaneadorDiretorios
+    scanner = EscaneadorDiretorios()
+    scanner.escanear_diretorios(env['http_url'])
+    return len(scanner.diretorios_comuns) + len(scanner.arquivos_comuns)
+
+
+@benchmark('dns_subdomains', stage='dns')
+def bench_dns_subdomains(env):
+    from modules.dns.enumerator import EnumeradorDNS
+    enumerator = EnumeradorDNS()
+    enumerator.resolver.nameservers = [env['host']]
+    enumerator.resolver.port = env['dns_port']
+    # Mede as consultas, não o cache compartilhado entre execuções
+    enumerator.resolver.cache = None
+    # Sem fallback para os servidores públicos
+    enumerator.dns_servers = []
+    enumerator.subdominios_comuns = env['subdomains']
+    enumerator.encontrar_subdominios(env['dns_zone'])
+    return len(enumerator.subdominios_comuns)
+
+
+@benchmark('waf_detect', stage='http')
+def bench_waf_detect(env):
+    from modules.web.waf_detector import DetectorWAF
+    detector = DetectorWAF()
+    detector.detectar_waf(env['http_url'])
+    return len(detector.payloads) + 1
+
+
+@benchmark('ssl_analyze')
+def bench_ssl_analyze(env):
+    from modules.web.ssl_analyzer import AnalisadorSSL
+    analyzer = AnalisadorSSL()
+    url = env['tls_url']
+    analyzer.obter_info_certificado(url)
+    analyzer.verificar_protocolos_ssl(url)
+    analyzer.verificar_hsts(url)
+    analyzer.verificar_cifras(url)
+    return len(analyzer.protocolos) + 3
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _run_one(name, env, iterations, results):
+    # Roda em um processo novo: memória de pico, singletons e caches são só deste benchmark
+    sys.path[:0] = [PORT_SCAN_DIR, ROOT]
+    from core.metrics import REGISTRY, STAGE_LATENCY
+    from core.ratelimit import get_rate_limiter
+
+    # Mede o código, não os limites de taxa padrão
+    limiter = get_rate_limiter()
+    for kind in list(limiter.limits):
+        limiter.configure(kind, 0, 0)
+
+    devnull = open(os.devnull, 'w')
+    sys.stdout = sys.stderr = devnull
+    durations = []
+    items = 0
+    error = None
+    try:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            items = BENCHMARKS[name](env)
+            durations.append(time.perf_counter() - started)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+        devnull.close()
+
+    stage = STAGES[name]
+    wall_p50 = percentile(durations, 0.5)
+    results.put({
+        'name': name,
+        'iterations': len(durations),
+        'items': items,
+        'wall_p50': wall_p50,
+        'wall_p99': percentile(durations, 0.99),
+        'throughput': items / wall_p50 if wall_p50 else None,
+        'latency_p50': STAGE_LATENCY.quantile(0.5, stage) if stage else None,
+        'latency_p99': STAGE_LATENCY.quantile(0.99, stage) if stage else None,
+        'operations': sum(REGISTRY.raw().get((STAGE_LATENCY.name, (stage,)), [0])[:-1]) if stage else None,
+        'peak_rss_kb': peak_rss_kb(),
+        'error': error,
+    })
+
+
+def run_benchmarks(names: List[str], env: Dict, iterations: int) -> Dict[str, Dict]:
+    context = multiprocessing.get_context('spawn')
+    output = {}
+    for name in names:
+        results = context.Queue()
+        process = context.Process(target=_run_one, args=(name, env, iterations, results))
+        process.start()
+        result = results.get()
+        process.join()
+        output[name] = result
+        _print_result(result)
+    return output
+
+
+def _command(args: List[str], env: Dict) -> List[str]:
+    return [sys.executable] + [arg.format(host=env['host'], port=env['startup_port']) for arg in args]
+
+
+def _wall_time(command: List[str], env: Dict) -> float:
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=ROOT, input=env['host'], capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"saiu com {completed.returncode}: {completed.stderr.strip()[-200:]}")
+    return elapsed
+
+
+def _import_times(command: List[str], env: Dict) -> Dict[str, int]:
+    # Só os imports de primeiro nível (sem recuo), com o tempo acumulado em us
+    completed = subprocess.run(command[:1] + ['-X', 'importtime'] + command[1:], cwd=ROOT, input=env['host'],
+                               capture_output=True, text=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if line.startswith('import time:'):
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit() and not name.startswith('  '):
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def slowest_imports(command: List[str], env: Dict, count: int = 5) -> List[str]:
+    """Imports que mais pesam na abertura, fora os que o interpretador já faz sozinho"""
+    interpreter = _import_times([sys.executable, '-c', 'pass'], env)
+    times = _import_times(command, env)
+    ranked = sorted(((micros, name) for name, micros in times.items() if name not in interpreter), reverse=True)
+    return [f"{name} {micros / 1000:.0f} ms" for micros, name in ranked[:count]]
+
+
+def run_startup(names: List[str], env: Dict, iterations: int) -> Dict[str, Dict]:
+    """Mede a abertura dos pontos de entrada descontando o `python -c pass`"""
+    interpreter = min(_wall_time([sys.executable, '-c', 'pass'], env) for _ in range(iterations))
+    output = {}
+    for name in names:
+        args, budget_ms = STARTUP_COMMANDS[name]
+        command = _command(args, env)
+        result = {'name': name, 'iterations': 0, 'items': 1, 'throughput': None, 'latency_p50': None,
+                  'latency_p99': None, 'operations': None, 'peak_rss_kb': None, 'budget_ms': budget_ms,
+                  'over_budget': False, 'error': None}
+        try:
+            overheads = [max(0.0, _wall_time(command, env) - interpreter) for _ in range(iterations)]
+        except RuntimeError as e:
+            result['error'] = str(e)
+        else:
+            # O melhor caso é o menos afetado por ruído da máquina
+            result.update(iterations=len(overheads), wall_p50=min(overheads), wall_p99=percentile(overheads, 0.99))
+            result['over_budget'] = result['wall_p50'] * 1000 > budget_ms
+            if result['over_budget']:
+                result['slowest_imports'] = slowest_imports(command, env)
+        output[name] = result
+        _print_startup(result)
+    return output
+
+
+def _fmt(value, scale=1.0, digits=1):
+    return '-' if value is None else f"{value * scale:.{digits}f}"
+
+
+def _print_result(result):
+    if result['error']:
+        print(f"{result['name']:<16} ERRO: {result['error']}")
+        return
+    print(f"{result['name']:<16} {_fmt(result['throughput']):>10} itens/s  "
+          f"tempo p50 {_fmt(result['wall_p50'], 1000)} ms p99 {_fmt(result['wall_p99'], 1000)} ms  "
+          f"latência p50 {_fmt(result['latency_p50'], 1000, 2)} ms p99 {_fmt(result['latency_p99'], 1000, 2)} ms  "
+          f"RSS {_fmt(result['peak_rss_kb'], 1 / 1024)} MiB")
+
+
+def _print_startup(result):
+    if result['error']:
+        print(f"{result['name']:<22} ERRO: {result['error']}")
+        return
+    flag = ' <-- acima do orçamento' if result['over_budget'] else ''
+    print(f"{result['name']:<22} abertura {_fmt(result['wall_p50'], 1000)} ms "
+          f"(orçamento {result['budget_ms']} ms){flag}")
+    for line in result.get('slowest_imports', []):
+        print(f"{'':<22}   {line}")
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Compara com o baseline e retorna as regressões acima do limiar"""
+    regressions = []
+    print(f"\n{'benchmark':<16} {'métrica':<12} {'baseline':>12} {'atual':>12} {'variação':>9}")
+    for name, result in current.items():
+        old = baseline.get('results', {}).get(name)
+        if not old or result['error'] or old.get('error'):
+            continue
+        # (métrica, maior é melhor)
+        for metric, higher_is_better in (('throughput', True), ('wall_p50', False), ('latency_p99', False),
+                                         ('peak_rss_kb', False)):
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            flag = ' <-- regressão' if worse > threshold else ''
+            print(f"{name:<16} {metric:<12} {before:>12.4g} {after:>12.4g} {change:>+8.1%}{flag}")
+            if flag:
+                regressions.append(f"{name}.{metric}")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='ReconBomb benchmarks against local stand-in services')
+    parser.add_argument('--only', help=f"Comma separated benchmarks ({', '.join(list(BENCHMARKS) + list(STARTUP_COMMANDS))})")
+    parser.add_argument('--iterations', type=int, default=5, help='Runs per benchmark')
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE, metavar='PATH', help='Store the results as a baseline')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, metavar='PATH', help='Diff against a baseline; exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Relative change counted as a regression')
+    parser.add_argument('--http-latency', type=float, default=0.0, help='Delay added by the HTTP/TLS stand-ins (s)')
+    parser.add_argument('--dns-wildcard', action='store_true', help='DNS stand-in answers every name in the zone')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, ROOT)
+    from bench.services import HOST, TcpFarm, UdpFarm, HttpStandIn, DnsStandIn, TlsStandIn
+
+    names = [name.strip() for name in args.only.split(',')] if args.only else list(BENCHMARKS) + list(STARTUP_COMMANDS)
+    unknown = [name for name in names if name not in BENCHMARKS and name not in STARTUP_COMMANDS]
+    if unknown:
+        sys.exit(f"Benchmarks desconhecidos: {', '.join(unknown)}")
+
+    with TcpFarm() as tcp, UdpFarm() as udp, HttpStandIn(latency=args.http_latency) as http, \
+            TlsStandIn(latency=args.http_latency) as tls, DnsStandIn(wildcard=args.dns_wildcard) as dns_server:
+        # Os processos dos benchmarks herdam o ambiente e confiam no certificado do stand-in TLS
+        os.environ['SSL_CERT_FILE'] = tls.cert_file
+        env = {
+            'host': HOST,
+            'tcp_ports': tcp.ports,
+            'udp_ports': udp.ports,
+            'http_url': http.url,
+            'tls_url': tls.url,
+            'dns_port': dns_server.port,
+            'dns_zone': dns_server.zone.rstrip('.'),
+            'subdomains': ['www', 'mail', 'ftp', 'dev'] + [f"host{i}" for i in range(500)],
+            'startup_port': tcp.open[0],
+        }
+        print(f"Python {platform.python_version()} em {platform.platform()}, {os.cpu_count()} CPUs, "
+              f"{args.iterations} execuções por benchmark\n")
+        current = run_benchmarks([name for name in names if name in BENCHMARKS], env, args.iterations)
+        startup = [name for name in names if name in STARTUP_COMMANDS]
+        if startup:
+            if current:
+                print()
+            current.update(run_startup(startup, env, args.iterations))
+
+    # Orçamento de abertura estourado conta como regressão mesmo sem baseline
+    regressions = [f"{name}.abertura" for name, result in current.items() if result.get('over_budget')]
+    if args.compare:
+        try:
+            with open(args.compare) as f:
+                regressions += compare(json.load(f), current, args.threshold)
+        except FileNotFoundError:
+            print(f"\nBaseline {args.compare} não encontrado")
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'iterations': args.iterations,
+                'results': current,
+            }, f, indent=2)
+        print(f"\nBaseline salvo em {args.save}")
+    if regressions:
+        print(f"\nRegressões: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
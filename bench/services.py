@@ -0,0 +1,285 @@
+import datetime
+import ipaddress
+import os
+import socket
+import socketserver
+import ssl
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+HOST = '127.0.0.1'
+
+
+def _free_ports(count: int, kind: int = socket.SOCK_STREAM) -> List[int]:
+    """Portas de loopback sem ninguém ouvindo (TCP recebe RST, UDP recebe ICMP)"""
+    sockets = []
+    for _ in range(count):
+        sock = socket.socket(socket.AF_INET, kind)
+        sock.bind((HOST, 0))
+        sockets.append(sock)
+    ports = [sock.getsockname()[1] for sock in sockets]
+    for sock in sockets:
+        sock.close()
+    return ports
+
+
+class TcpFarm:
+    """Portas TCP abertas, fechadas e filtradas no loopback"""
+
+    def __init__(self, open_ports: int = 64, closed_ports: int = 4000, filtered_ports: int = 8):
+        self._sockets: List[socket.socket] = []
+        self._held: List[socket.socket] = []
+        self.open = [self._listen(128) for _ in range(open_ports)]
+        # Fila de accept cheia e ninguém aceitando: o kernel descarta os SYN seguintes,
+        # o que para o scanner é igual a um firewall que descarta pacotes
+        self.filtered = [self._listen(0) for _ in range(filtered_ports)]
+        for port in self.filtered:
+            self._held.append(socket.create_connection((HOST, port)))
+        self.closed = _free_ports(closed_ports)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+
+    def _listen(self, backlog: int) -> int:
+        sock = socket.socket()
+        sock.bind((HOST, 0))
+        sock.listen(backlog)
+        self._sockets.append(sock)
+        return sock.getsockname()[1]
+
+    @property
+    def ports(self) -> List[int]:
+        return sorted(self.open + self.closed + self.filtered)
+
+    def _accept(self):
+        # Aceita e fecha as conexões das portas abertas para a fila nunca encher
+        listeners = [sock for sock in self._sockets if sock.getsockname()[1] in set(self.open)]
+        for sock in listeners:
+            sock.setblocking(False)
+        while not self._stop.wait(0.01):
+            for sock in listeners:
+                while True:
+                    try:
+                        conn, _ = sock.accept()
+                    except (BlockingIOError, OSError):
+                        break
+                    conn.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        for sock in self._held + self._sockets:
+            sock.close()
+
+
+class UdpFarm:
+    """Portas UDP que respondem (abertas), que ficam em silêncio e sem socket (ICMP)"""
+
+    def __init__(self, open_ports: int = 16, silent_ports: int = 4, closed_ports: int = 1000):
+        self._sockets = []
+        self.open = [self._bind() for _ in range(open_ports)]
+        self.silent = [self._bind() for _ in range(silent_ports)]
+        self.closed = _free_ports(closed_ports, socket.SOCK_DGRAM)
+        self._responders = self._sockets[:open_ports]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def _bind(self) -> int:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((HOST, 0))
+        sock.setblocking(False)
+        self._sockets.append(sock)
+        return sock.getsockname()[1]
+
+    @property
+    def ports(self) -> List[int]:
+        return sorted(self.open + self.silent + self.closed)
+
+    def _serve(self):
+        while not self._stop.wait(0.001):
+            for sock in self._responders:
+                while True:
+                    try:
+                        data, address = sock.recvfrom(65535)
+                    except (BlockingIOError, OSError):
+                        break
+                    sock.sendto(b'ok', address)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        for sock in self._sockets:
+            sock.close()
+
+
+class HttpStandIn:
+    """Servidor HTTP com latência, status por caminho, soft-404 e um WAF simulado"""
+
+    def __init__(self, latency: float = 0.0, statuses: Optional[Dict[str, int]] = None, soft_404: bool = True,
+                 waf: bool = True, tls: Optional[ssl.SSLContext] = None, hsts: bool = True):
+        self.latency = latency
+        # Caminho -> status; os demais viram 404 ou, com soft_404, 200 com página de "não encontrado"
+        self.statuses = statuses if statuses is not None else {
+            '/': 200, '/admin': 403, '/backup': 301, '/robots.txt': 200, '/static': 301, '/login.php': 200,
+        }
+        self.soft_404 = soft_404
+        self.waf = waf
+        self.hsts = hsts
+        self.requests = 0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                stand_in.requests += 1
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                parts = urlsplit(self.path)
+                headers = {}
+                if stand_in.waf and parts.query:
+                    # Bloqueia parâmetros suspeitos como um ModSecurity
+                    status, body = 403, b'<h1>Not Acceptable</h1> ModSecurity: request denied'
+                    headers['Server'] = 'Apache mod_security'
+                elif parts.path.rstrip('/') in stand_in.statuses or parts.path in stand_in.statuses:
+                    status = stand_in.statuses.get(parts.path.rstrip('/'), stand_in.statuses.get(parts.path))
+                    body = b'<html><body>ok</body></html>'
+                    if status in (301, 302):
+                        headers['Location'] = parts.path + '/'
+                elif stand_in.soft_404:
+                    status, body = 200, b'<html><body>Pagina nao encontrada</body></html>'
+                else:
+                    status, body = 404, b'not found'
+                if stand_in.hsts and tls is not None:
+                    headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((HOST, 0), Handler)
+        self.server.daemon_threads = True
+        # Conexões resetadas por scanners de porta não são erro do stand-in
+        self.server.handle_error = lambda request, address: None
+        if tls is not None:
+            self.server.socket = tls.wrap_socket(self.server.socket, server_side=True)
+        self.port = self.server.server_address[1]
+        self.url = f"{'https' if tls is not None else 'http'}://{HOST}:{self.port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class DnsStandIn:
+    """Servidor DNS UDP de uma zona: nomes conhecidos, curinga opcional e NXDOMAIN"""
+
+    def __init__(self, zone: str = 'bench.test', names: Iterable[str] = ('www', 'mail', 'ftp', 'dev'),
+                 wildcard: bool = False, latency: float = 0.0):
+        self.zone = zone.rstrip('.') + '.'
+        self.names = {f"{name}.{self.zone}".lower() for name in names}
+        self.wildcard = wildcard
+        self.latency = latency
+        stand_in = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                data, sock = self.request
+                try:
+                    query = dns.message.from_wire(data)
+                except Exception:
+                    return
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                sock.sendto(stand_in.answer(query).to_wire(), self.client_address)
+
+        self.server = socketserver.ThreadingUDPServer((HOST, 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+
+    def answer(self, query: dns.message.Message) -> dns.message.Message:
+        response = dns.message.make_response(query)
+        question = query.question[0]
+        name = question.name.to_text().lower()
+        exists = name in self.names or name == self.zone or (self.wildcard and name.endswith('.' + self.zone))
+        if not name.endswith(self.zone) or not exists:
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        elif question.rdtype == dns.rdatatype.A and name != self.zone:
+            response.answer.append(dns.rrset.from_text(question.name, 60, 'IN', 'A', HOST))
+        # Outros tipos: NOERROR sem resposta
+        return response
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def self_signed_certificate(directory: Optional[str] = None):
+    """Gera certificado autoassinado para 127.0.0.1; retorna (cert, chave) em arquivos PEM"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'reconbomb-bench')])
+    now = datetime.datetime.utcnow()
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=30))
+            .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address(HOST))]), critical=False)
+            .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+            .sign(key, hashes.SHA256()))
+
+    directory = directory or tempfile.mkdtemp(prefix='reconbomb-bench-')
+    cert_file = os.path.join(directory, 'cert.pem')
+    key_file = os.path.join(directory, 'key.pem')
+    with open(cert_file, 'wb') as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_file, 'wb') as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                                  serialization.NoEncryption()))
+    return cert_file, key_file
+
+
+class TlsStandIn(HttpStandIn):
+    """HTTPS com certificado autoassinado (o cliente confia nele via SSL_CERT_FILE)"""
+
+    def __init__(self, latency: float = 0.0, directory: Optional[str] = None):
+        self.cert_file, key_file = self_signed_certificate(directory)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.cert_file, key_file)
+        super().__init__(latency=latency, tls=context, waf=False)
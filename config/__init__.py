@@ -1,7 +1,17 @@
 from .settings import (
     TIMEOUT, MAX_THREADS, VERIFY_SSL,
     DEFAULT_PORTS, COMMON_WEB_PORTS,
-    USER_AGENT, WEB_TIMEOUT,
+    RTT_INITIAL_TIMEOUT, RTT_MIN_TIMEOUT, RTT_MAX_TIMEOUT, MAX_RETRIES,
+    DISCOVERY_TIMEOUT, DISCOVERY_TCP_PORTS,
+    RATE_LIMITS, RATE_BURST,
+    CHECKPOINT_DIR, CHECKPOINT_INTERVAL,
+    BATCH_CONCURRENCY, BATCH_PER_TARGET, BATCH_MODULE_LIMITS, BATCH_TARGET_BUDGET, BATCH_MODULE_BUDGET,
+    METRICS_INTERVAL, TRACE_MAX_EVENTS,
+    RUNTIME_THREADS_PER_CPU, RUNTIME_MAX_THREADS, RUNTIME_MIN_THREADS,
+    DAEMON_ADDRESS, DAEMON_MAX_JOBS, DAEMON_KEEP_JOBS, DAEMON_TOKEN,
+    PROFILE_INTERVAL, PROFILE_TRACEMALLOC_FRAMES, PROFILE_TOP_ALLOCATIONS,
+    SERVICE_PROBES_FILE, SERVICE_PROBES_CACHE,
+    USER_AGENT, WEB_TIMEOUT, TIMING_PROFILE, TIMING_PROFILES,
     DNS_SERVERS, COMMON_SUBDOMAINS,
     WAF_TEST_PAYLOADS,
     OUTPUT_FORMAT, SAVE_RESULTS, OUTPUT_DIR,
@@ -12,7 +22,17 @@ from .settings import (
 __all__ = [
     'TIMEOUT', 'MAX_THREADS', 'VERIFY_SSL',
     'DEFAULT_PORTS', 'COMMON_WEB_PORTS',
-    'USER_AGENT', 'WEB_TIMEOUT',
+    'RTT_INITIAL_TIMEOUT', 'RTT_MIN_TIMEOUT', 'RTT_MAX_TIMEOUT', 'MAX_RETRIES',
+    'DISCOVERY_TIMEOUT', 'DISCOVERY_TCP_PORTS',
+    'RATE_LIMITS', 'RATE_BURST',
+    'CHECKPOINT_DIR', 'CHECKPOINT_INTERVAL',
+    'BATCH_CONCURRENCY', 'BATCH_PER_TARGET', 'BATCH_MODULE_LIMITS', 'BATCH_TARGET_BUDGET', 'BATCH_MODULE_BUDGET',
+    'METRICS_INTERVAL', 'TRACE_MAX_EVENTS',
+    'RUNTIME_THREADS_PER_CPU', 'RUNTIME_MAX_THREADS', 'RUNTIME_MIN_THREADS',
+    'DAEMON_ADDRESS', 'DAEMON_MAX_JOBS', 'DAEMON_KEEP_JOBS', 'DAEMON_TOKEN',
+    'PROFILE_INTERVAL', 'PROFILE_TRACEMALLOC_FRAMES', 'PROFILE_TOP_ALLOCATIONS',
+    'SERVICE_PROBES_FILE', 'SERVICE_PROBES_CACHE',
+    'USER_AGENT', 'WEB_TIMEOUT', 'TIMING_PROFILE', 'TIMING_PROFILES',
     'DNS_SERVERS', 'COMMON_SUBDOMAINS',
     'WAF_TEST_PAYLOADS',
     'OUTPUT_FORMAT', 'SAVE_RESULTS', 'OUTPUT_DIR',
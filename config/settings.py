@@ -1,3 +1,5 @@
+import os
+
 # Configurações gerais
 TIMEOUT = 10
 MAX_THREADS = 100
@@ -7,10 +9,134 @@ VERIFY_SSL = False
 DEFAULT_PORTS = [20, 21, 22, 23, 25, 53, 80, 110, 143, 443, 445, 993, 995, 3306, 3389, 5432, 8080, 8443]
 COMMON_WEB_PORTS = [80, 443, 8080, 8443, 3000, 8000, 8008, 8888]
 
+# Configurações de timeout adaptativo (RTT por alvo)
+RTT_INITIAL_TIMEOUT = 1.0  # usado até chegar a primeira resposta
+RTT_MIN_TIMEOUT = 0.1
+RTT_MAX_TIMEOUT = 5.0
+MAX_RETRIES = 2
+
+# Configurações de descoberta de hosts (ICMP echo, TCP ping e ARP)
+DISCOVERY_TIMEOUT = 0.5  # espera pelas respostas depois do último envio
+DISCOVERY_TCP_PORTS = [80, 443, 22, 445, 3389]
+
+# Configurações de limite de taxa, compartilhadas por todos os módulos do processo.
+# tipo -> (envios/s no total, envios/s por destino); 0 = sem limite
+RATE_LIMITS = {
+    'probe': (20000, 0),   # sondas TCP/UDP dos scanners de porta e de rede
+    'request': (200, 50),  # requisições HTTP e handshakes TLS
+    'query': (200, 100),   # consultas DNS, por servidor
+}
+RATE_BURST = 0.05  # rajada máxima, em segundos de envio na taxa limite
+
+# Configurações de checkpoint (diário para retomar scans longos com --resume)
+CHECKPOINT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'reconbomb', 'checkpoints')
+CHECKPOINT_INTERVAL = 5  # segundos entre snapshots
+
+# Configurações do modo em lote (main.py --alvos)
+BATCH_CONCURRENCY = 8  # execuções (alvo x módulo) simultâneas
+# Limites do escalonador (core/scheduler.py): módulos do mesmo alvo ao mesmo tempo (só enquanto
+# houver trabalho de outro alvo esperando) e execuções simultâneas de cada módulo
+BATCH_PER_TARGET = 2
+BATCH_MODULE_LIMITS = {'diretorios': 4, 'dns': 4}
+# Orçamentos de tempo (segundos, 0 = sem limite). O do alvo conta o tempo em que algum módulo dele
+# está rodando (a espera na fila não entra); o de cada módulo é contado à parte. Passado o prazo, as operações de rede que
+# faltam falham na hora e o resultado sai marcado como incompleto
+BATCH_TARGET_BUDGET = 300
+BATCH_MODULE_BUDGET = 120
+
+# Configurações do runtime compartilhado (core/runtime.py): um loop de eventos e um pool de
+# threads para todo o processo. Cada thread pode manter um socket aberto, então o que sobra do
+# RLIMIT_NOFILE depois das threads vira o limite de sockets dos scans assíncronos
+RUNTIME_THREADS_PER_CPU = 16  # trabalho bloqueante é quase todo espera de rede
+RUNTIME_MAX_THREADS = 256
+RUNTIME_MIN_THREADS = 32  # piso em máquinas com poucas CPUs
+
+# Configurações do modo daemon (main.py --daemon)
+DAEMON_ADDRESS = '127.0.0.1:8750'  # HOST:PORTA ou unix:/caminho.sock
+DAEMON_MAX_JOBS = 4  # jobs executando ao mesmo tempo; os outros esperam na fila
+DAEMON_KEEP_JOBS = 500  # jobs concluídos guardados para consulta; os mais antigos são descartados
+# Token exigido (Authorization: Bearer) na API por TCP; None gera um aleatório a cada subida.
+# O socket Unix dispensa o token: só o dono tem acesso ao arquivo
+DAEMON_TOKEN = None
+
+# Configurações de métricas
+METRICS_INTERVAL = 5  # segundos entre snapshots gravados em arquivo
+
+# Configurações de tracing (main.py --trace)
+TRACE_MAX_EVENTS = 200000  # spans guardados em memória; os excedentes são descartados e contados
+
+# Configurações de profiling (--profile)
+PROFILE_INTERVAL = 0.005  # segundos entre amostras das pilhas de todas as threads
+# Profundidade das pilhas do tracemalloc: 12 alcança a linha do projeto por trás do requests.
+# O custo cresce com ela (um scan TCP com asyncio fica ~20x mais lento); 0 desliga a memória
+PROFILE_TRACEMALLOC_FRAMES = 12
+PROFILE_TOP_ALLOCATIONS = 10  # linhas por fronteira de módulo no relatório de memória
+
+# Base de assinaturas de serviço (formato nmap-service-probes) e seu cache compilado
+SERVICE_PROBES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'service-probes')
+SERVICE_PROBES_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'reconbomb', 'service-probes.cache')
+
 # Configurações de reconhecimento web
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 WEB_TIMEOUT = 10
 
+# Perfis de temporização (-T/--timing), do mais cauteloso ao mais rápido, como o -T0..-T5 do nmap:
+#   timeout      conexões e leituras de web, TLS, DNS e banners; espera da descoberta de hosts (s)
+#   rtt          timeout inicial, mínimo e máximo das sondas de porta (s), adaptado ao RTT do alvo
+#   retries      retransmissões das sondas de porta
+#   concurrency  sockets simultâneos por scan de portas ou descoberta (None = limite de descritores)
+#   threads      tarefas bloqueantes simultâneas por módulo (caminhos, subdomínios, banners...)
+#   rates        limites de taxa, no formato de RATE_LIMITS
+# 'modulos' troca valores só para um módulo; o 'normal' mantém os valores de cada módulo de antes
+TIMING_PROFILE = 'normal'
+TIMING_PROFILES = {
+    'paranoid': {
+        'timeout': 30, 'rtt': (5.0, 1.0, 30.0), 'retries': 5, 'concurrency': 1, 'threads': 1,
+        'rates': {'probe': (1, 0.2), 'request': (1, 0.2), 'query': (1, 0.5)},
+        'modulos': {'descoberta': {'timeout': 5}},
+    },
+    'sneaky': {
+        'timeout': 20, 'rtt': (3.0, 0.5, 15.0), 'retries': 3, 'concurrency': 10, 'threads': 1,
+        'rates': {'probe': (20, 2), 'request': (5, 1), 'query': (10, 5)},
+        'modulos': {'descoberta': {'timeout': 3}},
+    },
+    'polite': {
+        'timeout': 15, 'rtt': (1.0, 0.2, 10.0), 'retries': 2, 'concurrency': 100, 'threads': 4,
+        'rates': {'probe': (500, 100), 'request': (20, 10), 'query': (50, 20)},
+        'modulos': {'descoberta': {'timeout': 1}, 'banner': {'threads': 8}},
+    },
+    'normal': {
+        'timeout': WEB_TIMEOUT, 'rtt': (RTT_INITIAL_TIMEOUT, RTT_MIN_TIMEOUT, RTT_MAX_TIMEOUT),
+        'retries': MAX_RETRIES, 'concurrency': None, 'threads': 10, 'rates': RATE_LIMITS,
+        'modulos': {
+            'descoberta': {'timeout': DISCOVERY_TIMEOUT},
+            'banner': {'timeout': 3, 'threads': 32},
+            'rede': {'threads': 50},
+            'dns': {'timeout': 5, 'threads': 8},
+        },
+    },
+    'aggressive': {
+        'timeout': 5, 'rtt': (0.5, 0.05, 1.25), 'retries': 1, 'concurrency': None, 'threads': 32,
+        'rates': {'probe': (50000, 0), 'request': (1000, 200), 'query': (1000, 500)},
+        'modulos': {
+            'descoberta': {'timeout': 0.3},
+            'banner': {'timeout': 2, 'threads': 64},
+            'rede': {'threads': 100},
+            'dns': {'timeout': 2},
+        },
+    },
+    'insane': {
+        'timeout': 2, 'rtt': (0.25, 0.05, 0.3), 'retries': 0, 'concurrency': None, 'threads': 64,
+        'rates': {'probe': (0, 0), 'request': (0, 0), 'query': (0, 0)},
+        'modulos': {
+            'descoberta': {'timeout': 0.15},
+            'banner': {'timeout': 1, 'threads': 128},
+            'rede': {'threads': 200},
+            'dns': {'timeout': 1},
+        },
+    },
+}
+
 # Configurações de DNS
 DNS_SERVERS = [
     '8.8.8.8',  # Google
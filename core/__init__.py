@@ -0,0 +1,4 @@
+from .rtt import RTTEstimator, get_estimator
+from .port_state import PortStateMap, OPEN, CLOSED, FILTERED, OPEN_FILTERED
+
+__all__ = ['RTTEstimator', 'get_estimator', 'PortStateMap', 'OPEN', 'CLOSED', 'FILTERED', 'OPEN_FILTERED']
@@ -0,0 +1,301 @@
+import contextlib
+import ipaddress
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, TextIO
+from urllib.parse import urlparse
+from config.settings import BATCH_CONCURRENCY, BATCH_TARGET_BUDGET, BATCH_MODULE_BUDGET, DEFAULT_PORTS
+from core.deadline import DeadlineExceeded, budget
+from core.service_probes import get_service_name
+from core.tracing import span
+from core.profiling import memory_boundary
+from core.pipeline import Pipeline, Stage
+from core.scheduler import URGENT, Scheduler
+
+PORT_SCAN_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'modules', 'port_scan')
+
+# Módulos disponíveis no modo em lote, na mesma ordem do menu interativo
+MODULES = ('portas', 'web', 'dns', 'ssl', 'diretorios', 'waf')
+# O que "todos" roda: o módulo web já faz a detecção de WAF e a análise de certificado e
+# protocolos, então ssl e waf só entram quando pedidos sozinhos
+ALL_MODULES = ('portas', 'web', 'dns', 'diretorios')
+
+
+def load_targets(path: str) -> List[str]:
+    """Lê um alvo por linha ('-' = entrada padrão), ignorando linhas vazias e comentários"""
+    handle = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    with contextlib.ExitStack() as stack:
+        if handle is not sys.stdin:
+            stack.enter_context(handle)
+        targets = []
+        for line in handle:
+            line = line.split('#', 1)[0].strip()
+            if line and line not in targets:
+                targets.append(line)
+    return targets
+
+
+def parse_ports(spec: str) -> List[int]:
+    """Converte '22,80,8000-8100' em uma lista ordenada de portas"""
+    ports = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        first, last = int(start), int(end or start)
+        if not 1 <= first <= last <= 65535:
+            raise ValueError(f"intervalo de portas inválido: {part}")
+        ports.update(range(first, last + 1))
+    return sorted(ports)
+
+
+def resolve_host(target: str) -> str:
+    """IP de um alvo dado como IP, domínio ou URL"""
+    host = urlparse(target).hostname if '://' in target else target.split('/')[0]
+    try:
+        return str(ipaddress.ip_address(host))
+    except ValueError:
+        return socket.gethostbyname(host)
+
+
+def web_pipeline() -> Pipeline:
+    """Reconhecimento web: as cinco verificações só dependem do alvo e rodam em paralelo"""
+    from modules.web.tech_detector import DetectorTecnologias
+    from modules.web.waf_detector import DetectorWAF
+    from modules.web.ssl_analyzer import AnalisadorSSL
+    ssl_analyzer = AnalisadorSSL()
+    return Pipeline('web', [
+        Stage('tecnologias', DetectorTecnologias().detectar_tecnologias, ['alvo']),
+        Stage('waf', DetectorWAF().detectar_waf, ['alvo']),
+        Stage('certificado', ssl_analyzer.obter_info_certificado, ['alvo']),
+        Stage('protocolos', ssl_analyzer.verificar_protocolos_ssl, ['alvo']),
+        Stage('hsts', ssl_analyzer.verificar_hsts, ['alvo']),
+    ], inputs=['alvo'])
+
+
+def dns_pipeline() -> Pipeline:
+    """Enumeração DNS: WHOIS, registros e subdomínios em paralelo; a transferência de zona
+    espera os registros para usar os NS já consultados"""
+    from modules.dns.enumerator import EnumeradorDNS
+    enumerator = EnumeradorDNS()
+    return Pipeline('dns', [
+        Stage('whois', enumerator.obter_info_whois, ['alvo']),
+        Stage('registros', enumerator.obter_registros_dns, ['alvo']),
+        Stage('subdominios', enumerator.encontrar_subdominios, ['alvo']),
+        Stage('transferencia_zona',
+              lambda alvo, registros: enumerator.realizar_transferencia_zona(alvo, registros.get('NS', [])),
+              ['alvo', 'registros']),
+    ], inputs=['alvo'])
+
+
+def _web(target: str) -> Dict:
+    return web_pipeline().run(alvo=target)
+
+
+def _dns(target: str) -> Dict:
+    return dns_pipeline().run(alvo=target)
+
+
+def _ssl(target: str) -> Dict:
+    from modules.web.ssl_analyzer import AnalisadorSSL
+    analyzer = AnalisadorSSL()
+    return {
+        'certificado': analyzer.obter_info_certificado(target),
+        'protocolos': analyzer.verificar_protocolos_ssl(target),
+    }
+
+
+def _directories(target: str) -> List[Dict]:
+    from modules.web.dir_scanner import EscaneadorDiretorios
+    return EscaneadorDiretorios().escanear_diretorios(target)
+
+
+def _waf(target: str) -> Dict:
+    from modules.web.waf_detector import DetectorWAF
+    return DetectorWAF().detectar_waf(target)
+
+
+# Módulo -> função executada por alvo (o scan de portas é feito para todos os alvos de uma vez)
+TARGET_MODULES: Dict[str, Callable[[str], object]] = {
+    'web': _web,
+    'dns': _dns,
+    'ssl': _ssl,
+    'diretorios': _directories,
+    'waf': _waf,
+}
+
+
+def _import_multi_tcp_scan():
+    # O scanner de portas é um pacote de script; no fim do sys.path para o utils da raiz
+    # continuar valendo (os dois têm port_services.get_service_name)
+    if PORT_SCAN_DIR not in sys.path:
+        sys.path.append(PORT_SCAN_DIR)
+    from scanner.multi_scan import multi_tcp_scan
+    return multi_tcp_scan
+
+
+class BatchRunner:
+    """Executa módulos para muitos alvos em paralelo, dentro de um único processo"""
+
+    def __init__(self, modules: Iterable[str] = ALL_MODULES, concurrency: int = BATCH_CONCURRENCY,
+                 ports: Iterable[int] = DEFAULT_PORTS, on_result: Optional[Callable[[Dict], None]] = None,
+                 target_budget: Optional[float] = BATCH_TARGET_BUDGET, module_budget: Optional[float] = BATCH_MODULE_BUDGET,
+                 urgent: Iterable[str] = ()):
+        self.modules = [module for module in MODULES if module in set(modules)]
+        self.concurrency = max(1, concurrency)
+        self.ports = list(ports)
+        # Chamado a cada módulo concluído (ex.: saída JSON Lines)
+        self.on_result = on_result
+        self.target_budget = target_budget
+        self.module_budget = module_budget
+        # Alvo -> [segundos gastos, módulos rodando, início do trecho atual]
+        self._clocks: Dict[str, List[float]] = {}
+        # Fila de prioridade dos trabalhos (alvo, módulo); promote() nela adianta um alvo em andamento
+        self.scheduler = Scheduler('lote', self.concurrency)
+        self.urgent = set(urgent)
+        self._lock = threading.Lock()
+
+    def _start_target(self, target: str) -> Optional[float]:
+        # O orçamento do alvo conta só o tempo em que algum módulo dele está rodando: a espera na
+        # fila, enquanto os outros alvos andam, não gasta nada. Retorna o prazo de quem começa agora
+        if not self.target_budget:
+            return None
+        with self._lock:
+            clock = self._clocks.setdefault(target, [0.0, 0, 0.0])
+            now = time.monotonic()
+            spent = clock[0] + (now - clock[2] if clock[1] else 0)
+            if not clock[1]:
+                clock[2] = now
+            clock[1] += 1
+            return now + self.target_budget - spent
+
+    def _stop_target(self, target: str):
+        if not self.target_budget:
+            return
+        with self._lock:
+            clock = self._clocks[target]
+            clock[1] -= 1
+            if not clock[1]:
+                clock[0] += time.monotonic() - clock[2]
+
+    def _record(self, results: Dict, target: str, module: str, started: float, result=None, error=None,
+                incomplete: bool = False):
+        entry = {'status': 'erro' if error else 'ok', 'duracao': round(time.perf_counter() - started, 3)}
+        if error:
+            entry['erro'] = error
+        else:
+            entry['resultado'] = result
+        if incomplete:
+            # Cortado pelo orçamento de tempo: o que veio é parcial
+            entry['incompleto'] = True
+        with self._lock:
+            results[target][module] = entry
+            if self.on_result is not None:
+                self.on_result(dict(entry, alvo=target, modulo=module))
+
+    def _run_module(self, results: Dict, target: str, module: str):
+        started = time.perf_counter()
+        try:
+            with budget(self.module_budget, self._start_target(target)) as limit:
+                try:
+                    with span(f"lote.{module}", target=target), memory_boundary(f"{module} {target}"):
+                        result = TARGET_MODULES[module](target)
+                except DeadlineExceeded as e:
+                    self._record(results, target, module, started, error=f"{type(e).__name__}: {e}", incomplete=True)
+                except Exception as e:
+                    self._record(results, target, module, started, error=f"{type(e).__name__}: {e}")
+                else:
+                    # Só o que o prazo cortou é parcial; terminar depois dele sem corte nenhum não é.
+                    # Um timeout encurtado que venceu conta, mesmo sem ninguém consultar o prazo depois
+                    self._record(results, target, module, started, result, incomplete=limit is not None and limit.cut())
+        finally:
+            self._stop_target(target)
+
+    def _run_ports(self, results: Dict, targets: List[str]):
+        # Um único loop de eventos para todos os hosts, com concorrência dividida entre eles
+        started = time.perf_counter()
+        hosts = {}
+        for target in targets:
+            try:
+                hosts[target] = resolve_host(target)
+            except (OSError, ValueError) as e:
+                self._record(results, target, 'portas', started, error=f"Não foi possível resolver: {e}")
+        if not hosts:
+            return
+        # Um scan só para todos os hosts, com o orçamento de módulo dele: o prazo de cada alvo
+        # só começa no primeiro módulo do próprio alvo, não enquanto ele espera na fila
+        try:
+            with span('lote.portas', hosts=len(hosts), ports=len(self.ports)), \
+                    memory_boundary(f"portas {len(hosts)} hosts"), budget(self.module_budget):
+                scans = _import_multi_tcp_scan()(sorted(set(hosts.values())), self.ports)
+        except Exception as e:
+            for target in hosts:
+                self._record(results, target, 'portas', started, error=f"{type(e).__name__}: {e}")
+            return
+        for target, ip in hosts.items():
+            state_map = scans.get(ip)
+            # Portas sem resposta quando o prazo acabou
+            missing = len(state_map.pending(self.ports))
+            result = {
+                'ip': ip,
+                'abertas': [{'porta': port, 'servico': get_service_name(port)} for port in state_map.open_ports()],
+                'estados': state_map.counts(),
+            }
+            if missing:
+                result['nao_escaneadas'] = missing
+            self._record(results, target, 'portas', started, result, incomplete=bool(missing))
+
+    def run(self, targets: Iterable[str]) -> Dict:
+        """Executa os módulos e retorna o resumo {'inicio', 'duracao', 'resumo', 'alvos'}"""
+        targets = list(targets)
+        started = time.perf_counter()
+        start_time = datetime.now().isoformat(timespec='seconds')
+        results: Dict[str, Dict] = {target: {} for target in targets}
+
+        # Saída dos módulos (prints, tqdm.write) vai para stderr; stdout fica para o resumo
+        # Os módulos dividem o pool do runtime com os grupos que eles mesmos abrem (subdomínios,
+        # diretórios), atendidos em rodízio
+        with contextlib.redirect_stdout(sys.stderr), self.scheduler as scheduler:
+            futures = []
+            if 'portas' in self.modules and targets:
+                # Um trabalho só para todos os alvos, fora do limite por alvo
+                futures.append(scheduler.submit(None, 'portas', self._run_ports, results, targets))
+            # Módulo a módulo: os primeiros despachos, feitos enquanto a fila ainda enche, já se
+            # espalham pelos alvos
+            for module in self.modules:
+                if module == 'portas':
+                    continue
+                for target in targets:
+                    futures.append(scheduler.submit(target, module, self._run_module, results, target, module,
+                                                    priority=URGENT if target in self.urgent else None))
+            for future in scheduler.as_completed(futures):
+                future.result()
+
+        entries = [entry for modules in results.values() for entry in modules.values()]
+        return {
+            'inicio': start_time,
+            'duracao': round(time.perf_counter() - started, 3),
+            'modulos': self.modules,
+            'resumo': {
+                'alvos': len(targets),
+                'execucoes': len(entries),
+                'sucesso': sum(1 for entry in entries if entry['status'] == 'ok'),
+                'erros': sum(1 for entry in entries if entry['status'] == 'erro'),
+                'incompletos': sum(1 for entry in entries if entry.get('incompleto')),
+            },
+            'fila': self.scheduler.stats(),
+            'alvos': results,
+        }
+
+
+def write_json(data, output: TextIO, indent: Optional[int] = 2):
+    # Resultados de WHOIS trazem datetime; o resto já é JSON
+    json.dump(data, output, indent=indent, ensure_ascii=False, default=str)
+    output.write('\n')
+    output.flush()
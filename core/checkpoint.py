@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+from typing import Dict, Optional, Tuple
+from config.settings import CHECKPOINT_DIR, CHECKPOINT_INTERVAL
+from core.port_state import PortStateMap
+
+JOURNAL_MAGIC = b'RBJ1'
+# Cabeçalho: tamanho do JSON com os parâmetros do scan
+HEADER = struct.Struct('!I')
+# Registro: tamanho do host, protocolo, tamanho dos estados compactados
+RECORD = struct.Struct('!HBI')
+PROTOCOLS = ('tcp', 'udp')
+# Bit do byte de protocolo: estados gravados como pares (porta, estado) em vez do mapa inteiro
+PAIRS_FLAG = 0x80
+# Acima disso o diário é reescrito só com o último snapshot de cada host
+COMPACT_SIZE = 1024 * 1024
+
+
+def journal_path(meta: Dict) -> str:
+    """Caminho do diário de um scan, derivado dos seus parâmetros"""
+    key = json.dumps(meta, sort_keys=True).encode()
+    return os.path.join(CHECKPOINT_DIR, hashlib.sha1(key).hexdigest()[:16] + '.journal')
+
+
+class ScanJournal:
+    """Diário de checkpoints: snapshots compactados dos PortStateMap gravados periodicamente"""
+
+    def __init__(self, meta: Dict, path: Optional[str] = None, interval: float = CHECKPOINT_INTERVAL):
+        self.meta = meta
+        self.path = path or journal_path(meta)
+        self.interval = interval
+        self._maps: Dict[Tuple[str, str], PortStateMap] = {}
+        # Portas escaneadas no último snapshot gravado, para pular mapas sem mudança
+        self._written: Dict[Tuple[str, str], int] = {}
+        self._file = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> Dict[Tuple[str, str], PortStateMap]:
+        """Lê o diário do mesmo scan; o último snapshot de cada (host, protocolo) vale"""
+        maps = {}
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return maps
+        if not data.startswith(JOURNAL_MAGIC):
+            return maps
+
+        try:
+            pos = len(JOURNAL_MAGIC)
+            size, = HEADER.unpack_from(data, pos)
+            pos += HEADER.size
+            if json.loads(data[pos:pos + size]) != self.meta:
+                return maps
+            pos += size
+            while pos + RECORD.size <= len(data):
+                host_size, flags, states_size = RECORD.unpack_from(data, pos)
+                end = pos + RECORD.size + host_size + states_size
+                if end > len(data):
+                    # Registro cortado por um crash no meio da gravação
+                    break
+                host = data[pos + RECORD.size:pos + RECORD.size + host_size].decode()
+                states = data[pos + RECORD.size + host_size:end]
+                protocol = PROTOCOLS[flags & ~PAIRS_FLAG]
+                decode = PortStateMap.from_pairs if flags & PAIRS_FLAG else PortStateMap.from_bytes
+                maps[(host, protocol)] = decode(states, host, protocol)
+                pos = end
+        except (ValueError, IndexError, struct.error, UnicodeDecodeError):
+            pass
+        return maps
+
+    def track(self, state_map: PortStateMap) -> PortStateMap:
+        """Inclui o mapa nos próximos checkpoints"""
+        self._maps[(state_map.host, state_map.protocol)] = state_map
+        return state_map
+
+    def _record(self, key: Tuple[str, str], state_map: PortStateMap) -> bytes:
+        # Mapas ainda em dicionário (os hosts de uma faixa grande que acharam pouco ou nada) vão
+        # como pares, sem montar e compactar 64 KiB para cada um
+        host = key[0].encode()
+        flags = PROTOCOLS.index(key[1])
+        states = state_map.to_pairs()
+        if states is None:
+            states = state_map.to_bytes()
+        else:
+            flags |= PAIRS_FLAG
+        return RECORD.pack(len(host), flags, len(states)) + host + states
+
+    def _rewrite(self):
+        # Novo arquivo com cabeçalho e um snapshot por mapa, trocado de forma atômica
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        meta = json.dumps(self.meta, sort_keys=True).encode()
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(JOURNAL_MAGIC + HEADER.pack(len(meta)) + meta)
+            for key, state_map in self._maps.items():
+                # Host sem nenhuma porta escaneada: retomar sem ele dá no mesmo
+                self._written[key] = len(state_map)
+                if self._written[key]:
+                    f.write(self._record(key, state_map))
+            f.flush()
+            os.fsync(f.fileno())
+        if self._file is not None:
+            self._file.close()
+        os.replace(tmp, self.path)
+        self._file = open(self.path, 'ab')
+
+    def checkpoint(self):
+        """Acrescenta ao diário um snapshot de cada mapa que mudou desde o último"""
+        with self._lock:
+            if self._file is None or self._file.tell() > COMPACT_SIZE:
+                self._rewrite()
+                return
+            changed = [(key, state_map) for key, state_map in self._maps.items()
+                       if len(state_map) != self._written.get(key, 0)]
+            if not changed:
+                return
+            for key, state_map in changed:
+                self._written[key] = len(state_map)
+                self._file.write(self._record(key, state_map))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.checkpoint()
+            except OSError as e:
+                print(f"Erro ao gravar checkpoint: {e}")
+
+    def start(self) -> 'ScanJournal':
+        """Começa um diário novo e grava checkpoints a cada `interval` segundos"""
+        self._rewrite()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def finish(self, complete: bool):
+        """Scan completo apaga o diário; incompleto grava o snapshot final para retomar"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            if not complete:
+                # Snapshot final já compactado: um registro por mapa
+                self._rewrite()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if complete:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        else:
+            print(f"Progresso salvo em {self.path}; use --resume para continuar")
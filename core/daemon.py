@@ -0,0 +1,411 @@
+import collections
+import contextlib
+import hmac
+import importlib
+import json
+import os
+import secrets
+import socketserver
+import sys
+import threading
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+from config.settings import (BATCH_CONCURRENCY, BATCH_TARGET_BUDGET, BATCH_MODULE_BUDGET, DAEMON_MAX_JOBS,
+                             DAEMON_KEEP_JOBS, DAEMON_TOKEN)
+from core.batch import ALL_MODULES, MODULES, BatchRunner, parse_ports
+from core.metrics import REGISTRY
+from core.runtime import get_runtime
+from core.timing import TimingProfile, get_timing, use_timing
+
+# Módulos importados na subida: o primeiro job não paga a importação (requests, dnspython,
+# whois, cryptography...) nem a carga da base de assinaturas
+WARM_MODULES = (
+    'modules.web.tech_detector', 'modules.web.waf_detector', 'modules.web.ssl_analyzer',
+    'modules.web.dir_scanner', 'modules.dns.enumerator',
+)
+
+
+class Job:
+    """Um pedido de execução em lote; as linhas de resultado ficam disponíveis enquanto ele roda"""
+
+    def __init__(self, targets: List[str], modules: List[str], ports: Optional[List[int]], concurrency: int,
+                 timing: Optional[TimingProfile] = None, target_budget: float = BATCH_TARGET_BUDGET,
+                 module_budget: float = BATCH_MODULE_BUDGET, urgent: Optional[List[str]] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.targets = targets
+        self.modules = modules
+        self.ports = ports
+        self.concurrency = concurrency
+        # Perfil próprio do job; None segue o do daemon (-T na subida)
+        self.timing = timing
+        self.target_budget = target_budget
+        self.module_budget = module_budget
+        options = {'ports': ports} if ports else {}
+        # Criado já na fila: alvos podem ser promovidos antes de o job começar
+        self.runner = BatchRunner(modules, concurrency, on_result=self._append, target_budget=target_budget,
+                                  module_budget=module_budget, urgent=urgent or (), **options)
+        self.state = 'na_fila'
+        self.created = datetime.now().isoformat(timespec='seconds')
+        # Uma linha por módulo concluído e o resumo na última, como no --formato jsonl
+        self.lines: List[Dict] = []
+        self.summary: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.cond = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.state in ('concluido', 'erro')
+
+    def _append(self, line: Dict) -> None:
+        with self.cond:
+            self.lines.append(line)
+            self.cond.notify_all()
+
+    def run(self) -> None:
+        with self.cond:
+            self.state = 'executando'
+        try:
+            with use_timing(self.timing) if self.timing else contextlib.nullcontext():
+                summary = self.runner.run(self.targets)
+        except Exception as e:
+            with self.cond:
+                self.error = f"{type(e).__name__}: {e}"
+                self.state = 'erro'
+        else:
+            with self.cond:
+                self.summary = summary
+                self.lines.append({key: value for key, value in summary.items() if key != 'alvos'})
+                self.state = 'concluido'
+        finally:
+            with self.cond:
+                self.cond.notify_all()
+
+    def describe(self, full: bool = False) -> Dict:
+        with self.cond:
+            data = {
+                'id': self.id,
+                'estado': self.state,
+                'criado': self.created,
+                'alvos': len(self.targets),
+                'modulos': self.modules,
+                'execucoes_concluidas': len(self.lines) - (1 if self.summary else 0),
+            }
+            if self.timing is not None:
+                data['temporizacao'] = self.timing.describe()
+            data['orcamento'] = {'alvo': self.target_budget, 'modulo': self.module_budget}
+            if self.state == 'executando':
+                data['fila'] = self.runner.scheduler.stats()
+            if self.error:
+                data['erro'] = self.error
+            if self.summary is not None:
+                data['resumo'] = self.summary['resumo']
+                data['duracao'] = self.summary['duracao']
+                if full:
+                    data['resultados'] = self.summary['alvos']
+            return data
+
+    def follow(self, start: int = 0):
+        """Gera as linhas a partir de `start`, esperando as próximas até o job terminar"""
+        index = start
+        while True:
+            with self.cond:
+                while index >= len(self.lines) and not self.done:
+                    self.cond.wait()
+                lines = self.lines[index:]
+                done = self.done
+            yield from lines
+            index += len(lines)
+            if done and index >= len(self.lines):
+                return
+
+
+def parse_job(request: Dict) -> Job:
+    """Valida o corpo de POST /jobs: {"alvos": [...], "modulos": [...], "portas": "22,80", "paralelo": 8,
+    "timing": "polite", "ajustes": ["web.timeout=5"], "orcamento": 60, "orcamento_modulo": 20, "urgentes": [...]}"""
+    if not isinstance(request, dict):
+        raise ValueError("o corpo deve ser um objeto JSON")
+    targets = request.get('alvos')
+    if isinstance(targets, str):
+        targets = [targets]
+    if not targets or not isinstance(targets, list) or not all(isinstance(t, str) for t in targets):
+        raise ValueError("'alvos' deve ser uma lista de alvos não vazia")
+    targets = list(dict.fromkeys(t.strip() for t in targets if t.strip()))
+
+    modules = request.get('modulos', 'todos')
+    if isinstance(modules, str):
+        modules = [m.strip() for m in modules.split(',') if m.strip()]
+    if modules == ['todos']:
+        modules = list(ALL_MODULES)
+    invalid = [m for m in modules if m not in MODULES]
+    if invalid or not modules:
+        raise ValueError(f"módulos inválidos: {', '.join(map(str, invalid)) or 'nenhum'}")
+
+    ports = request.get('portas')
+    if isinstance(ports, str):
+        ports = parse_ports(ports)
+    elif ports is not None:
+        if not isinstance(ports, list) or not all(isinstance(p, int) and 1 <= p <= 65535 for p in ports):
+            raise ValueError("'portas' deve ser uma lista de portas ou um texto como '22,80,8000-8100'")
+        ports = sorted(set(ports))
+
+    concurrency = request.get('paralelo', BATCH_CONCURRENCY)
+    if not isinstance(concurrency, int) or concurrency < 1:
+        raise ValueError("'paralelo' deve ser um inteiro positivo")
+
+    timing = request.get('timing')
+    adjustments = request.get('ajustes', [])
+    if isinstance(adjustments, str):
+        adjustments = [adjustments]
+    if not isinstance(adjustments, list) or not all(isinstance(a, str) for a in adjustments):
+        raise ValueError("'ajustes' deve ser uma lista como [\"timeout=5\", \"banner.threads=8\"]")
+    profile = None
+    if timing is not None or adjustments:
+        if timing is None:
+            # Só ajustes: valem por cima do perfil (e dos ajustes) com que o daemon subiu
+            base = get_timing()
+            timing, adjustments = base.name, base.adjustments + adjustments
+        profile = TimingProfile(timing, adjustments)
+
+    budgets = []
+    for field, default in (('orcamento', BATCH_TARGET_BUDGET), ('orcamento_modulo', BATCH_MODULE_BUDGET)):
+        value = request.get(field, default)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"'{field}' deve ser um número de segundos (0 = sem limite)")
+        budgets.append(value)
+    return Job(targets, modules, ports, concurrency, profile, *budgets, urgent=parse_targets(request, 'urgentes'))
+
+
+def parse_targets(request: Dict, field: str) -> List[str]:
+    """Lista de alvos de um campo opcional do corpo (texto ou lista)"""
+    targets = request.get(field, [])
+    if isinstance(targets, str):
+        targets = [targets]
+    if not isinstance(targets, list) or not all(isinstance(t, str) for t in targets):
+        raise ValueError(f"'{field}' deve ser uma lista de alvos")
+    return [t.strip() for t in targets if t.strip()]
+
+
+class JobManager:
+    """Fila de jobs do daemon, executados no runtime compartilhado"""
+
+    def __init__(self, max_jobs: int = DAEMON_MAX_JOBS, keep: int = DAEMON_KEEP_JOBS):
+        self.keep = keep
+        self.jobs: Dict[str, Job] = collections.OrderedDict()
+        self.group = get_runtime().group('daemon', max_jobs)
+        self._lock = threading.Lock()
+
+    def submit(self, job: Job) -> Job:
+        with self._lock:
+            self.jobs[job.id] = job
+            self._prune()
+        self.group.submit(job.run)
+        return job
+
+    def _prune(self):
+        # Descarta os concluídos mais antigos além do limite; os em andamento ficam sempre
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self.jobs.values())
+
+
+def warm_up() -> None:
+    """Carrega na subida o que os jobs reaproveitam: módulos, base de assinaturas, sessão HTTP, loop"""
+    for name in WARM_MODULES:
+        importlib.import_module(name)
+    from core.service_probes import get_service_database
+    from core.http import get_session
+    get_service_database()
+    get_session()
+    get_runtime().loop  # sobe o loop de eventos
+
+
+def _handler(manager: JobManager, token: Optional[str] = None, hosts: Optional[set] = None):
+    # token e hosts só valem no TCP. Qualquer página aberta no navegador do operador alcança
+    # 127.0.0.1: o token barra os POSTs dela, e a checagem do Host barra o DNS rebinding
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, data) -> None:
+            body = json.dumps(data, ensure_ascii=False, default=str).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _allowed(self) -> bool:
+            if hosts is not None and (self.headers.get('Host') or '').lower() not in hosts:
+                self._send_json(403, {'erro': 'Host não permitido'})
+                return False
+            if token is not None:
+                scheme, _, given = (self.headers.get('Authorization') or '').partition(' ')
+                if scheme.lower() != 'bearer' or not hmac.compare_digest(given.strip().encode(), token.encode()):
+                    self._send_json(401, {'erro': 'token ausente ou inválido'})
+                    return False
+            return True
+
+        def _job(self, job_id: str) -> Optional[Job]:
+            job = manager.get(job_id)
+            if job is None:
+                self._send_json(404, {'erro': f"job {job_id} não encontrado"})
+            return job
+
+        def do_POST(self):
+            if not self._allowed():
+                return
+            # Formulários e fetch "simples" (text/plain) não mandam application/json sem preflight
+            if (self.headers.get('Content-Type') or '').split(';')[0].strip().lower() != 'application/json':
+                self._send_json(415, {'erro': 'use Content-Type: application/json'})
+                return
+            parts = [part for part in urlparse(self.path).path.split('/') if part]
+            if parts != ['jobs'] and not (len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'urgentes'):
+                self._send_json(404, {'erro': 'rota não encontrada'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                request = json.loads(self.rfile.read(length) or b'null')
+                if parts == ['jobs']:
+                    job = parse_job(request)
+                else:
+                    if not isinstance(request, dict):
+                        raise ValueError("o corpo deve ser um objeto JSON")
+                    targets = parse_targets(request, 'alvos')
+            except ValueError as e:
+                # json.JSONDecodeError também é ValueError
+                self._send_json(400, {'erro': str(e)})
+                return
+            if parts == ['jobs']:
+                manager.submit(job)
+                self._send_json(202, dict(job.describe(), url=f"/jobs/{job.id}"))
+                return
+            # POST /jobs/ID/urgentes: os alvos passam na frente na fila do job, mesmo com ele rodando
+            job = self._job(parts[1])
+            if job is not None:
+                promoted = sum(job.runner.scheduler.promote(target) for target in targets)
+                self._send_json(200, {'alvos': targets, 'trabalhos_promovidos': promoted})
+
+        def do_GET(self):
+            if not self._allowed():
+                return
+            url = urlparse(self.path)
+            parts = [part for part in url.path.split('/') if part]
+            if parts == ['jobs']:
+                self._send_json(200, {'jobs': [job.describe() for job in manager.list()]})
+            elif len(parts) == 2 and parts[0] == 'jobs':
+                job = self._job(parts[1])
+                if job is not None:
+                    self._send_json(200, job.describe(full=True))
+            elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'resultados':
+                job = self._job(parts[1])
+                if job is not None:
+                    self._stream(job, parse_qs(url.query).get('desde', ['0'])[0])
+            elif url.path == '/metrics':
+                body = REGISTRY.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self._send_json(404, {'erro': 'rota não encontrada'})
+
+        def _stream(self, job: Job, start: str) -> None:
+            # JSON Lines sem Content-Length: cada módulo sai assim que termina e a conexão
+            # fecha depois do resumo (HTTP/1.0)
+            try:
+                start = max(0, int(start))
+            except ValueError:
+                self._send_json(400, {'erro': "'desde' deve ser um inteiro"})
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.end_headers()
+            try:
+                for line in job.follow(start):
+                    self.wfile.write(json.dumps(line, ensure_ascii=False, default=str).encode() + b'\n')
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+if hasattr(socketserver, 'UnixStreamServer'):  # não existe no Windows
+    class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def get_request(self):
+            # BaseHTTPRequestHandler espera (host, porta) em client_address
+            conn, _ = self.socket.accept()
+            return conn, ('unix', 0)
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """'unix:/caminho.sock', 'HOST:PORTA' ou só 'PORTA' (em 127.0.0.1)"""
+    if address.startswith('unix:'):
+        return address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def _local_hosts(host: str, port: int) -> set:
+    # Valores aceitos no cabeçalho Host: os nomes do loopback e o endereço em que o daemon ouve
+    names = {'localhost', '127.0.0.1', '[::1]', host if ':' not in host else f'[{host}]'}
+    return {f'{name}:{port}'.lower() for name in names}
+
+
+def create_server(address: Union[str, Tuple[str, int]], manager: JobManager, token: Optional[str] = None):
+    """Servidor da API; no TCP exige o token (Bearer) em todas as rotas"""
+    if isinstance(address, str):
+        handler = _handler(manager)
+        if not hasattr(socketserver, 'UnixStreamServer'):
+            raise ValueError("sockets Unix não são suportados nesta plataforma")
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(address)
+        # Socket só para o dono: quem alcança o arquivo pode disparar scans
+        umask = os.umask(0o177)
+        try:
+            return _UnixHTTPServer(address, handler)
+        finally:
+            os.umask(umask)
+    if not token:
+        raise ValueError("a API por TCP exige um token")
+    server = ThreadingHTTPServer(address, BaseHTTPRequestHandler)
+    server.RequestHandlerClass = _handler(manager, token, _local_hosts(address[0], server.server_address[1]))
+    server.daemon_threads = True
+    return server
+
+
+def serve(address: str, token: Optional[str] = DAEMON_TOKEN) -> None:
+    """Modo daemon: aceita jobs pela API local até Ctrl+C"""
+    parsed = parse_address(address)
+    manager = JobManager()
+    if not isinstance(parsed, str):
+        token = token or secrets.token_urlsafe(32)
+    server = create_server(parsed, manager, token)
+    try:
+        warm_up()
+        where = parsed if isinstance(parsed, str) else f"http://{parsed[0]}:{server.server_address[1]}"
+        print(f"ReconBomb daemon ouvindo em {where}", file=sys.stderr, flush=True)
+        if not isinstance(parsed, str):
+            print(f"Token da API (Authorization: Bearer): {token}", file=sys.stderr, flush=True)
+        # Saída dos módulos vai para stderr durante toda a vida do daemon
+        with contextlib.redirect_stdout(sys.stderr):
+            server.serve_forever()
+    finally:
+        server.server_close()
+        if isinstance(parsed, str):
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(parsed)
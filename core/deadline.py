@@ -0,0 +1,105 @@
+import contextlib
+import contextvars
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Orçamento de tempo do alvo (ou do módulo) esgotado antes da operação de rede"""
+
+
+class Budget:
+    """Prazo absoluto de uma execução; `exhausted` marca que algo foi cortado por ele e
+    `clamped` que algum timeout foi encurtado para caber nele"""
+
+    __slots__ = ('expires', 'exhausted', 'clamped')
+
+    def __init__(self, expires: float):
+        self.expires = expires
+        self.exhausted = False
+        self.clamped = False
+
+    def cut(self) -> bool:
+        """True se o prazo cortou alguma coisa: esgotado, ou um timeout encurtado que venceu"""
+        return self.exhausted or (self.clamped and self.remaining() <= 0)
+
+    def remaining(self) -> float:
+        return self.expires - time.monotonic()
+
+
+# O prazo segue para as tarefas do runtime e do loop de eventos abertas dentro do bloco
+_current: contextvars.ContextVar = contextvars.ContextVar('deadline', default=None)
+
+
+@contextlib.contextmanager
+def budget(seconds: Optional[float] = None, expires: Optional[float] = None):
+    """Limita o tempo do bloco a `seconds` (ou até o instante `expires`, em time.monotonic).
+
+    Um bloco dentro de outro nunca vai além do prazo de fora. Sem limite nenhum o bloco roda
+    como antes e o valor do with é None.
+    """
+    limits = [limit for limit in (expires, seconds and time.monotonic() + seconds) if limit]
+    parent = _current.get()
+    if parent is not None:
+        limits.append(parent.expires)
+    if not limits:
+        yield None
+        return
+    current = Budget(min(limits))
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+        if parent is not None and parent.expires <= current.expires:
+            parent.exhausted = parent.exhausted or current.exhausted
+            parent.clamped = parent.clamped or current.clamped
+
+
+def remaining() -> Optional[float]:
+    """Segundos até o prazo em vigor (None sem prazo)"""
+    current = _current.get()
+    return None if current is None else current.remaining()
+
+
+def expired() -> bool:
+    """True depois do prazo; quem para um laço por isso deixa o resultado marcado como parcial"""
+    current = _current.get()
+    if current is None or current.remaining() > 0:
+        return False
+    current.exhausted = True
+    return True
+
+
+def check() -> None:
+    """DeadlineExceeded se o prazo já passou (antes de operações que não aceitam timeout)"""
+    if expired():
+        raise DeadlineExceeded("orçamento de tempo esgotado")
+
+
+def clamp(timeout: Optional[float]) -> Optional[float]:
+    """Encurta o timeout de uma operação de rede para caber no prazo; sem tempo, DeadlineExceeded"""
+    current = _current.get()
+    if current is None:
+        return timeout
+    left = current.remaining()
+    if left <= 0:
+        current.exhausted = True
+        raise DeadlineExceeded("orçamento de tempo esgotado")
+    if timeout is None or left < timeout:
+        current.clamped = True
+        return left
+    return timeout
+
+
+async def bounded(coro):
+    """Espera a corotina no máximo até o prazo; depois dele ela é cancelada e o retorno é None"""
+    left = remaining()
+    if left is None:
+        return await coro
+    import asyncio
+    try:
+        return await asyncio.wait_for(coro, max(0, left))
+    except asyncio.TimeoutError:
+        _current.get().exhausted = True
+        return None
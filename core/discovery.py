@@ -0,0 +1,394 @@
+import asyncio
+import errno
+import ipaddress
+import os
+import queue
+import socket
+import struct
+import sys
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from config.settings import DISCOVERY_TCP_PORTS
+from core.net import checksum, default_concurrency, expand_targets, get_source_ip, tcp_connect
+from core.metrics import HOSTS_DISCOVERED
+from core.ratelimit import get_rate_limiter
+from core.runtime import get_runtime
+from core.timing import get_timing
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+# Reenvios de ICMP/ARP para quem ainda não respondeu (perda de pacote)
+PROBE_ROUNDS = 2
+# Envios entre cada pausa para o loop ler as respostas
+SEND_BATCH = 256
+
+ETH_P_ARP = 0x0806
+ARP_REQUEST = 1
+ARP_REPLY = 2
+# Rota ativa em /proc/net/route
+RTF_UP = 0x1
+
+# Tabela de vizinhos via netlink (rtnetlink): ela informa há quanto tempo cada entrada foi
+# confirmada, o que /proc/net/arp não informa
+RTM_NEWNEIGH = 28
+RTM_GETNEIGH = 30
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NDA_DST = 1
+NDA_CACHEINFO = 3
+NUD_INCOMPLETE = 0x01
+NUD_FAILED = 0x20
+NUD_NOARP = 0x40
+NUD_PERMANENT = 0x80
+NLMSG_HEADER = struct.Struct('=IHHII')
+NDMSG = struct.Struct('=BBHiHBB')
+RTATTR = struct.Struct('=HH')
+NDA_CACHE = struct.Struct('=IIII')  # confirmado, usado, atualizado (em ticks), refcnt
+
+LINUX = sys.platform.startswith('linux')
+
+
+def _open_icmp() -> Tuple[Optional[socket.socket], bool]:
+    """Socket ICMP sem privilégio (SOCK_DGRAM) se o kernel permitir, senão raw; (socket, é_raw)"""
+    for sock_type in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+        try:
+            sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+        except OSError:
+            # SOCK_DGRAM depende de net.ipv4.ping_group_range; SOCK_RAW exige root
+            continue
+        sock.setblocking(False)
+        return sock, sock_type == socket.SOCK_RAW
+    return None, False
+
+
+def _echo_request(ident: int, seq: int) -> bytes:
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    payload = b'reconbomb'
+    csum = checksum(header + payload)
+    return header[:2] + struct.pack('!H', csum) + header[4:] + payload
+
+
+def _parse_echo_reply(packet: bytes, raw: bool, ident: int) -> bool:
+    if raw:
+        # Socket raw entrega o cabeçalho IP junto
+        packet = packet[(packet[0] & 0x0f) * 4:]
+    if len(packet) < 8 or packet[0] != ICMP_ECHO_REPLY:
+        return False
+    # No SOCK_DGRAM o kernel troca o identificador e só entrega as respostas deste socket
+    return not raw or struct.unpack('!H', packet[4:6])[0] == ident
+
+
+def local_networks() -> List[Tuple[str, ipaddress.IPv4Network]]:
+    """Redes diretamente conectadas (rotas sem gateway) como (interface, rede)"""
+    networks = []
+    try:
+        with open('/proc/net/route') as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                iface, dest, gateway, flags, mask = fields[0], fields[1], fields[2], int(fields[3], 16), fields[7]
+                if gateway != '00000000' or not flags & RTF_UP or dest == '00000000':
+                    continue
+                # Os campos vêm em hexadecimal na ordem de bytes do host (little-endian)
+                address = socket.inet_ntoa(struct.pack('<I', int(dest, 16)))
+                netmask = socket.inet_ntoa(struct.pack('<I', int(mask, 16)))
+                networks.append((iface, ipaddress.ip_network(f"{address}/{netmask}")))
+    except (OSError, ValueError, IndexError, StopIteration):
+        pass
+    return networks
+
+
+def _mac_address(iface: str) -> Optional[bytes]:
+    try:
+        with open(f'/sys/class/net/{iface}/address') as f:
+            mac = bytes.fromhex(f.read().strip().replace(':', ''))
+    except (OSError, ValueError):
+        return None
+    return mac if len(mac) == 6 and any(mac) else None
+
+
+def _arp_request(mac: bytes, src_ip: str, dst_ip: str) -> bytes:
+    ethernet = b'\xff' * 6 + mac + struct.pack('!H', ETH_P_ARP)
+    arp = struct.pack('!HHBBH', 1, 0x0800, 6, 4, ARP_REQUEST)
+    return ethernet + arp + mac + socket.inet_aton(src_ip) + b'\0' * 6 + socket.inet_aton(dst_ip)
+
+
+def _parse_arp_reply(frame: bytes) -> Optional[str]:
+    if len(frame) < 42 or frame[12:14] != b'\x08\x06':
+        return None
+    if struct.unpack('!H', frame[20:22])[0] != ARP_REPLY:
+        return None
+    return socket.inet_ntoa(frame[28:32])
+
+
+def _neighbor_cache(max_age: float) -> List[str]:
+    """IPv4 da tabela de vizinhos do kernel confirmados nos últimos max_age segundos.
+
+    Entradas antigas (STALE) continuam completas depois que o host cai, e as estáticas nunca
+    são confirmadas, então só contam as que o kernel confirmou durante as sondas.
+    """
+    if not LINUX or not hasattr(socket, 'AF_NETLINK'):
+        return []
+    hz = os.sysconf('SC_CLK_TCK')
+    hosts = []
+    try:
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, 0) as sock:
+            sock.settimeout(1.0)
+            sock.bind((0, 0))
+            request = NDMSG.pack(socket.AF_INET, 0, 0, 0, 0, 0, 0)
+            sock.send(NLMSG_HEADER.pack(NLMSG_HEADER.size + len(request), RTM_GETNEIGH,
+                                        NLM_F_REQUEST | NLM_F_DUMP, 1, 0) + request)
+            while True:
+                data = sock.recv(65536)
+                pos = 0
+                while pos + NLMSG_HEADER.size <= len(data):
+                    length, kind, _, _, _ = NLMSG_HEADER.unpack_from(data, pos)
+                    if kind in (NLMSG_DONE, NLMSG_ERROR) or length < NLMSG_HEADER.size:
+                        return hosts
+                    if kind == RTM_NEWNEIGH:
+                        ip = _parse_neighbor(data[pos + NLMSG_HEADER.size:pos + length], max_age * hz)
+                        if ip is not None:
+                            hosts.append(ip)
+                    pos += (length + 3) & ~3
+    except (OSError, struct.error):
+        return hosts
+
+
+def _parse_neighbor(message: bytes, max_ticks: float) -> Optional[str]:
+    family, _, _, _, state, _, _ = NDMSG.unpack_from(message)
+    if family != socket.AF_INET or state & (NUD_INCOMPLETE | NUD_FAILED | NUD_NOARP | NUD_PERMANENT):
+        return None
+    attrs = {}
+    pos = NDMSG.size
+    while pos + RTATTR.size <= len(message):
+        length, kind = RTATTR.unpack_from(message, pos)
+        if length < RTATTR.size:
+            break
+        attrs[kind] = message[pos + RTATTR.size:pos + length]
+        pos += (length + 3) & ~3
+    if len(attrs.get(NDA_DST, b'')) != 4 or len(attrs.get(NDA_CACHEINFO, b'')) < NDA_CACHE.size:
+        return None
+    confirmed, _, _, _ = NDA_CACHE.unpack_from(attrs[NDA_CACHEINFO])
+    return socket.inet_ntoa(attrs[NDA_DST]) if confirmed <= max_ticks else None
+
+
+class HostDiscovery:
+    """Descobre hosts ativos com ICMP echo, TCP ping e ARP disparados em paralelo"""
+
+    def __init__(self, timeout: Optional[float] = None, tcp_ports: Iterable[int] = DISCOVERY_TCP_PORTS,
+                 concurrency: Optional[int] = None):
+        # None usa o perfil de temporização
+        timing = get_timing()
+        self.timeout = timeout or timing.get('timeout', 'descoberta')
+        self.tcp_ports = list(tcp_ports)
+        self.concurrency = concurrency or timing.get('concurrency', 'descoberta') or default_concurrency()
+
+    async def run(self, hosts: List[str], on_host: Callable[[str, str], None]):
+        """Sonda os hosts e chama on_host(ip, método) na primeira resposta de cada um"""
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        # ICMP, ARP e TCP ping contam no mesmo orçamento de sondas dos scans de porta
+        self.limiter = get_rate_limiter()
+        wanted = set(hosts)
+        found = set()
+        all_found = asyncio.Event()
+        if not wanted:
+            return
+
+        def report(ip: str, method: str):
+            if ip in wanted and ip not in found:
+                found.add(ip)
+                HOSTS_DISCOVERED.inc(method)
+                on_host(ip, method)
+                if len(found) == len(wanted):
+                    all_found.set()
+
+        ipv4 = [host for host in hosts if ipaddress.ip_address(host).version == 4]
+        readers = []
+        senders = []
+
+        icmp, raw = _open_icmp() if ipv4 else (None, False)
+        if icmp is not None:
+            ident = os.getpid() & 0xffff
+
+            def on_icmp():
+                while True:
+                    try:
+                        packet, address = icmp.recvfrom(1024)
+                    except (BlockingIOError, InterruptedError):
+                        return
+                    except OSError:
+                        continue
+                    if _parse_echo_reply(packet, raw, ident):
+                        report(address[0], 'icmp')
+
+            loop.add_reader(icmp.fileno(), on_icmp)
+            readers.append(icmp)
+            senders.append(self._send_rounds(
+                icmp, ipv4, found, lambda seq, host: (_echo_request(ident, seq & 0xffff), (host, 0))))
+
+        for sock, mac, src_ip, targets in self._open_arp(ipv4):
+            def on_arp(sock=sock):
+                while True:
+                    try:
+                        frame = sock.recv(128)
+                    except (BlockingIOError, InterruptedError):
+                        return
+                    except OSError:
+                        continue
+                    ip = _parse_arp_reply(frame)
+                    if ip is not None:
+                        report(ip, 'arp')
+
+            loop.add_reader(sock.fileno(), on_arp)
+            readers.append(sock)
+            senders.append(self._send_rounds(
+                sock, targets, found, lambda seq, host, mac=mac, src_ip=src_ip: (_arp_request(mac, src_ip, host), None)))
+
+        tasks = {loop.create_task(self._tcp_ping(loop, hosts, found, report))}
+        tasks.update(loop.create_task(sender) for sender in senders)
+        finished = loop.create_task(all_found.wait())
+        try:
+            # Termina quando todas as sondas acabarem ou quando todos os hosts responderem
+            while tasks and not finished.done():
+                done, _ = await asyncio.wait(tasks | {finished}, return_when=asyncio.FIRST_COMPLETED)
+                tasks -= done
+            if len(found) < len(wanted):
+                # O kernel resolve ARP ao enviar para a rede local mesmo sem privilégio;
+                # quem respondeu ao ARP mas filtra ICMP e TCP aparece no cache de vizinhos
+                for ip in _neighbor_cache(time.monotonic() - started):
+                    report(ip, 'arp')
+        finally:
+            finished.cancel()
+            for task in tasks:
+                task.cancel()
+            for sock in readers:
+                loop.remove_reader(sock.fileno())
+                sock.close()
+
+    async def _send_rounds(self, sock, hosts, found, build):
+        # Um envio por host a cada rodada, reenviando só para quem ainda não respondeu
+        for _ in range(PROBE_ROUNDS):
+            for seq, host in enumerate(hosts):
+                if host in found:
+                    continue
+                await self.limiter.wait_async('probe', host)
+                await self._send(sock, *build(seq, host))
+                if seq % SEND_BATCH == SEND_BATCH - 1:
+                    await asyncio.sleep(0)
+            await asyncio.sleep(self.timeout / PROBE_ROUNDS)
+
+    @staticmethod
+    async def _send(sock, data, address):
+        while True:
+            try:
+                if address is not None:
+                    sock.sendto(data, address)
+                else:
+                    sock.send(data)
+                return
+            except (BlockingIOError, InterruptedError):
+                await asyncio.sleep(0.001)
+            except OSError as e:
+                # Fila da interface cheia: espera; host inalcançável: ignora
+                if e.errno != errno.ENOBUFS:
+                    return
+                await asyncio.sleep(0.001)
+
+    async def _tcp_ping(self, loop, hosts, found, report):
+        # Qualquer resposta ao connect (aceito ou RST) prova que o host está ativo.
+        # Uma porta por vez em todos os hosts, pulando quem já respondeu por outro método
+        semaphore = asyncio.Semaphore(self.concurrency)
+        sockets = get_runtime().sockets
+        pending = set()
+
+        async def ping(host, port, family):
+            async with sockets:
+                err = await tcp_connect(loop, host, port, family, self.timeout)
+            if err in (0, errno.ECONNREFUSED):
+                report(host, f'tcp/{port}')
+
+        def on_done(task):
+            pending.discard(task)
+            semaphore.release()
+
+        try:
+            for port in self.tcp_ports:
+                for host in hosts:
+                    if host in found:
+                        continue
+                    await semaphore.acquire()
+                    await self.limiter.wait_async('probe', host)
+                    if host in found:
+                        semaphore.release()
+                        continue
+                    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+                    task = loop.create_task(ping(host, port, family))
+                    task.add_done_callback(on_done)
+                    pending.add(task)
+            if pending:
+                await asyncio.wait(set(pending))
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _open_arp(self, hosts):
+        # ARP ativo precisa de AF_PACKET (Linux, root); sem ele fica só o cache de vizinhos
+        if not LINUX or not hosts or not hasattr(socket, 'AF_PACKET'):
+            return []
+        by_iface: Dict[str, List[str]] = {}
+        networks = local_networks()
+        for host in hosts:
+            address = ipaddress.ip_address(host)
+            for iface, network in networks:
+                if address in network:
+                    by_iface.setdefault(iface, []).append(host)
+                    break
+
+        opened = []
+        for iface, targets in by_iface.items():
+            mac = _mac_address(iface)
+            if mac is None:
+                continue
+            try:
+                sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP))
+            except OSError:
+                break
+            try:
+                sock.bind((iface, ETH_P_ARP))
+                sock.setblocking(False)
+                opened.append((sock, mac, get_source_ip(targets[0]), targets))
+            except OSError:
+                sock.close()
+        return opened
+
+
+def iter_live_hosts(targets: Iterable, timeout: Optional[float] = None,
+                    tcp_ports: Iterable[int] = DISCOVERY_TCP_PORTS) -> Iterator[Tuple[str, str]]:
+    """Gera (ip, método) de cada host ativo assim que ele responde"""
+    hosts = expand_targets(targets)
+    answers: queue.Queue = queue.Queue()
+    done = object()
+    discovery = HostDiscovery(timeout, tcp_ports)
+
+    # Roda no loop compartilhado; esta thread só consome a fila
+    future = get_runtime().spawn(discovery.run(hosts, lambda ip, method: answers.put((ip, method))))
+    future.add_done_callback(lambda _: answers.put(done))
+    try:
+        while True:
+            item = answers.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        # Consumidor parou antes do fim (break, Ctrl+C): a descoberta não segue sozinha no loop
+        future.cancel()
+    future.result()
+
+
+def discover_hosts(targets: Iterable, timeout: Optional[float] = None,
+                   tcp_ports: Iterable[int] = DISCOVERY_TCP_PORTS) -> List[str]:
+    """Lista de hosts ativos, na ordem em que responderam"""
+    return [ip for ip, _ in iter_live_hosts(targets, timeout, tcp_ports)]
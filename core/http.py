@@ -0,0 +1,70 @@
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Optional
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from config.settings import MAX_THREADS
+from core.deadline import DeadlineExceeded, clamp
+from core.ratelimit import get_rate_limiter
+from core.metrics import HTTP_RESPONSES, IN_FLIGHT, STAGE_LATENCY
+from core.tracing import span
+
+
+class DeadlineTimeout(DeadlineExceeded, requests.exceptions.Timeout):
+    """Prazo esgotado; os módulos já tratam como um timeout qualquer do requests"""
+
+
+def _clamp_timeout(timeout):
+    try:
+        if isinstance(timeout, tuple):
+            return tuple(clamp(part) for part in timeout)
+        return clamp(timeout)
+    except DeadlineExceeded as e:
+        raise DeadlineTimeout(str(e)) from None
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """Adapter que passa cada requisição (inclusive redirecionamentos) pelo limitador global
+    e encurta o timeout dela para caber no orçamento de tempo do alvo"""
+
+    def send(self, request, **kwargs):
+        with span('http', method=request.method, url=request.url) as current:
+            timeout = kwargs.get('timeout')
+            # Sem orçamento nem entra na fila do limitador; depois dele, o que sobrou
+            _clamp_timeout(timeout)
+            get_rate_limiter().wait('request', urlsplit(request.url).hostname)
+            kwargs['timeout'] = _clamp_timeout(timeout)
+            status = 'error'
+            IN_FLIGHT.inc('http')
+            try:
+                with STAGE_LATENCY.time('http'):
+                    response = super().send(request, **kwargs)
+                status = str(response.status_code)
+                # O corpo ainda não foi lido aqui; o tamanho vem do cabeçalho
+                length = response.headers.get('Content-Length', '')
+                current.set(status=response.status_code, bytes=int(length) if length.isdigit() else None)
+                return response
+            finally:
+                IN_FLIGHT.dec('http')
+                HTTP_RESPONSES.inc(status)
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Sessão HTTP compartilhada: reaproveita conexões e respeita o limite de requisições/s"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                # Sem cookies entre requisições, como o requests.get avulso
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = RateLimitedAdapter(pool_connections=MAX_THREADS, pool_maxsize=MAX_THREADS)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
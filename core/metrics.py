@@ -0,0 +1,335 @@
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from config.settings import METRICS_INTERVAL
+
+# Limites dos buckets de latência (s), em escala logarítmica de 0,5 ms a 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Shard(dict):
+    # Só a thread dona escreve; o lock dela só disputa com leituras e resets de outras threads
+    __slots__ = ('lock',)
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+
+
+class MetricsRegistry:
+    """Métricas do processo; cada thread grava no seu próprio shard, com um lock só dele"""
+
+    def __init__(self):
+        self.metrics: Dict[str, '_Metric'] = {}
+        self._shards: List[_Shard] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            # Um lock preso por outra thread no fork ficaria preso para sempre no filho
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        for shard in self._shards:
+            shard.lock = threading.Lock()
+
+    def shard(self) -> _Shard:
+        # Criado uma vez por thread; depois disso só a própria thread escreve nele
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _register(self, metric: '_Metric') -> '_Metric':
+        with self._lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> 'Counter':
+        return self._register(Counter(self, name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> 'Gauge':
+        return self._register(Gauge(self, name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> 'Histogram':
+        return self._register(Histogram(self, name, help_text, labels, buckets))
+
+    def raw(self) -> Dict[Tuple, object]:
+        """Soma de todos os shards: {(métrica, valores dos labels): valor}"""
+        merged: Dict[Tuple, object] = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            with shard.lock:
+                # Cópia das listas dos histogramas também: a dona continua escrevendo nelas
+                _accumulate(merged, shard)
+        return merged
+
+    def drain(self) -> Dict[Tuple, object]:
+        """Retorna e zera os valores (para enviar de um processo filho ao principal)"""
+        merged: Dict[Tuple, object] = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # Lidos e zerados sob o mesmo lock: nenhum inc entre os dois se perde
+            with shard.lock:
+                _accumulate(merged, shard)
+                shard.clear()
+        return merged
+
+    def merge(self, data: Dict[Tuple, object]) -> None:
+        """Soma valores vindos de outro processo no shard da thread atual"""
+        shard = self.shard()
+        with shard.lock:
+            _accumulate(shard, data)
+
+    def _collect(self, name: str) -> Dict[Tuple, object]:
+        return {labels: value for (metric, labels), value in self.raw().items() if metric == name}
+
+    def snapshot(self) -> Dict:
+        """Estado atual de todas as métricas em formato JSON"""
+        data = {'timestamp': time.time(), 'metrics': {}}
+        for name, metric in list(self.metrics.items()):
+            data['metrics'][name] = {
+                'type': metric.kind,
+                'help': metric.help,
+                'values': [dict(zip(metric.labels, labels), **metric.export(value))
+                           for labels, value in sorted(self._collect(name).items())],
+            }
+        return data
+
+    def to_prometheus(self) -> str:
+        """Métricas no formato de texto do Prometheus"""
+        lines = []
+        for name, metric in list(self.metrics.items()):
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, value in sorted(self._collect(name).items()):
+                lines.extend(metric.prometheus_lines(labels, value))
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            with shard.lock:
+                shard.clear()
+
+
+def _accumulate(target: Dict, source: Dict) -> None:
+    for key, value in source.items():
+        current = target.get(key)
+        if isinstance(value, list):
+            target[key] = list(value) if current is None else [a + b for a, b in zip(current, value)]
+        else:
+            target[key] = (current or 0) + value
+
+
+def _format_labels(names: Iterable[str], values: Iterable, extra: str = '') -> str:
+    parts = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, registry: MetricsRegistry, name: str, help_text: str, labels: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+
+    def export(self, value) -> Dict:
+        return {'value': value}
+
+    def prometheus_lines(self, labels: Tuple, value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, labels)} {value}"]
+
+
+class Counter(_Metric):
+    """Contador que só cresce (sondas enviadas, respostas, timeouts...)"""
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        with shard.lock:
+            shard[key] = shard.get(key, 0) + amount
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (ex.: conexões em voo); inc/dec em threads diferentes se somam"""
+    kind = 'gauge'
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Distribuição por buckets fixos, com soma e contagem"""
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help_text, labels, buckets):
+        super().__init__(registry, name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with shard.lock:
+            # [contagem por bucket..., +Inf, soma]
+            counts = shard.get(key)
+            if counts is None:
+                counts = shard[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def time(self, *labels) -> '_Timer':
+        """Context manager que observa a duração do bloco"""
+        return _Timer(self, labels)
+
+    def quantile(self, q: float, *labels) -> Optional[float]:
+        """Quantil estimado por interpolação linear dentro do bucket (como o histogram_quantile)"""
+        value = self.registry._collect(self.name).get(labels)
+        if not value or not sum(value[:-1]):
+            return None
+        counts = value[:-1]
+        rank = q * sum(counts)
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def export(self, value) -> Dict:
+        counts = value[:-1]
+        return {'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], counts)),
+                'count': sum(counts), 'sum': value[-1]}
+
+    def prometheus_lines(self, labels, value) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip([str(b) for b in self.buckets] + ['+Inf'], value[:-1]):
+            cumulative += count
+            le = 'le="%s"' % bound
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {value[-1]}")
+        lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+REGISTRY = MetricsRegistry()
+
+# Métricas compartilhadas pelos módulos
+PROBES_SENT = REGISTRY.counter('reconbomb_probes_sent_total', 'Sondas enviadas (inclui retransmissões)', ('protocol',))
+PROBE_RETRIES = REGISTRY.counter('reconbomb_probe_retries_total', 'Retransmissões de sondas', ('protocol',))
+PROBE_REPLIES = REGISTRY.counter('reconbomb_probe_replies_total', 'Respostas recebidas por estado', ('protocol', 'state'))
+PROBE_TIMEOUTS = REGISTRY.counter('reconbomb_probe_timeouts_total', 'Sondas sem resposta dentro do timeout', ('protocol',))
+IN_FLIGHT = REGISTRY.gauge('reconbomb_in_flight', 'Operações em andamento', ('stage',))
+STAGE_LATENCY = REGISTRY.histogram('reconbomb_stage_latency_seconds', 'Latência por estágio', ('stage',))
+HTTP_RESPONSES = REGISTRY.counter('reconbomb_http_responses_total', 'Respostas HTTP por status', ('status',))
+DNS_QUERIES = REGISTRY.counter('reconbomb_dns_queries_total', 'Consultas DNS por RCODE', ('rcode',))
+HOSTS_DISCOVERED = REGISTRY.counter('reconbomb_hosts_discovered_total', 'Hosts ativos por método de descoberta', ('method',))
+SCHEDULER_QUEUED = REGISTRY.gauge('reconbomb_scheduler_queued', 'Trabalhos (alvo x módulo) na fila do modo em lote', ('module',))
+SCHEDULER_WAIT = REGISTRY.histogram('reconbomb_scheduler_wait_seconds', 'Espera na fila do modo em lote até o despacho', ('module',),
+                                    buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0))
+RATE_LIMIT_WAIT = REGISTRY.counter('reconbomb_rate_limit_wait_seconds_total', 'Tempo esperando o limitador de taxa', ('kind',))
+
+
+class MetricsReporter:
+    """Grava snapshots periódicos (JSON, ou Prometheus se o arquivo terminar em .prom)"""
+
+    def __init__(self, path: str, interval: float = METRICS_INTERVAL, registry: MetricsRegistry = REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self):
+        if self.path.endswith('.prom'):
+            data = self.registry.to_prometheus()
+        else:
+            data = json.dumps(self.registry.snapshot(), indent=2)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"Erro ao gravar métricas: {e}")
+
+    def start(self) -> 'MetricsReporter':
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Para a gravação periódica e grava o snapshot final"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+
+
+def serve_metrics(port: int, host: str = '127.0.0.1', registry: MetricsRegistry = REGISTRY):
+    """Expõe /metrics (Prometheus) e /metrics.json em uma thread em segundo plano"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics.json':
+                body, content_type = json.dumps(registry.snapshot()).encode(), 'application/json'
+            elif self.path == '/metrics':
+                body, content_type = registry.to_prometheus().encode(), 'text/plain; version=0.0.4'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,119 @@
+import errno
+import ipaddress
+import socket
+import struct
+from typing import Iterable, List
+
+try:
+    import resource
+except ImportError:  # Windows não tem RLIMIT_NOFILE
+    resource = None
+
+# Descritores reservados para stdout, logs, resolver DNS etc.
+FD_RESERVE = 64
+MAX_CONCURRENCY = 10000
+# Limite do select() no Windows
+WINDOWS_CONCURRENCY = 500
+
+IN_PROGRESS = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY)
+
+
+def default_concurrency() -> int:
+    """Sockets simultâneos permitidos pelo RLIMIT_NOFILE, subindo o limite soft até o hard"""
+    if resource is None:
+        return WINDOWS_CONCURRENCY
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY:
+        hard = MAX_CONCURRENCY + FD_RESERVE
+    if soft != resource.RLIM_INFINITY and soft < hard:
+        # Subir o soft até o hard não exige privilégio
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+            soft = hard
+        except (ValueError, OSError):
+            pass
+    if soft == resource.RLIM_INFINITY:
+        soft = hard
+
+    return max(1, min(soft - FD_RESERVE, MAX_CONCURRENCY))
+
+
+def get_source_ip(ip: str) -> str:
+    """IP de origem que o kernel usaria para chegar ao alvo"""
+    # connect() em UDP não envia nada, só escolhe a rota
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.connect((ip, 9))
+        return s.getsockname()[0]
+
+
+def expand_targets(targets: Iterable) -> List[str]:
+    """Expande IPs, redes CIDR e nomes de host em uma lista de IPs sem repetição"""
+    hosts = []
+    seen = set()
+    for target in targets:
+        target = str(target).strip()
+        if not target:
+            continue
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+            if network.num_addresses == 1:
+                addresses = [network.network_address]
+            else:
+                addresses = network.hosts()
+        except ValueError:
+            # Nome de host
+            try:
+                addresses = [ipaddress.ip_address(socket.gethostbyname(target))]
+            except socket.gaierror:
+                print(f"Erro: Não foi possível resolver o endereço '{target}'")
+                continue
+        for address in addresses:
+            host = str(address)
+            if host not in seen:
+                seen.add(host)
+                hosts.append(host)
+    return hosts
+
+
+def checksum(data: bytes) -> int:
+    """Checksum da Internet (RFC 1071), usado em ICMP e TCP"""
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def _wake(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+async def tcp_connect(loop, ip: str, port: int, family: int, timeout: float):
+    """Connect não bloqueante: retorna o errno (0 = aceito) ou None se estourou o timeout"""
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    # Fecha com RST em vez de FIN para nao acumular TIME_WAIT
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+    try:
+        err = sock.connect_ex((ip, port))
+        if err in IN_PROGRESS:
+            # Espera o socket ficar gravavel sem criar uma task extra como o wait_for
+            future = loop.create_future()
+            fd = sock.fileno()
+            loop.add_writer(fd, _wake, future, True)
+            timer = loop.call_later(timeout, _wake, future, False)
+            try:
+                if not await future:
+                    return None
+            finally:
+                loop.remove_writer(fd)
+                timer.cancel()
+            err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        return err
+    except OSError as e:
+        return e.errno
+    finally:
+        sock.close()
@@ -0,0 +1,81 @@
+import queue
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+from core.runtime import get_runtime
+from core.tracing import span
+
+
+class Stage:
+    """Etapa de um pipeline: `fn` recebe os valores de `requires`, nessa ordem, e o retorno dela
+    fica disponível para as etapas seguintes com o nome da etapa"""
+
+    __slots__ = ('name', 'fn', 'requires')
+
+    def __init__(self, name: str, fn: Callable, requires: Sequence[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.requires = tuple(requires)
+
+
+class Pipeline:
+    """Executa cada etapa assim que as entradas dela ficam prontas, as independentes em paralelo.
+
+    As etapas rodam no pool do runtime, em um grupo próprio; quem chama run() adianta as da
+    fila enquanto espera. O tempo total fica perto do da cadeia de dependências mais longa, e
+    não da soma das etapas.
+    """
+
+    def __init__(self, name: str, stages: Iterable[Stage], inputs: Sequence[str] = ()):
+        self.name = name
+        self.stages = list(stages)
+        self.inputs = tuple(inputs)
+        self._check()
+
+    def _check(self) -> None:
+        # Valida o grafo na montagem: nomes únicos, entradas conhecidas, nenhum ciclo
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names) or set(names) & set(self.inputs):
+            raise ValueError(f"pipeline {self.name}: nomes de etapas repetidos")
+        known = set(self.inputs)
+        waiting = list(self.stages)
+        while waiting:
+            ready = [stage for stage in waiting if known.issuperset(stage.requires)]
+            if not ready:
+                missing = sorted({name for stage in waiting for name in stage.requires} - known - set(names))
+                problem = f"entradas desconhecidas: {', '.join(missing)}" if missing else "dependências circulares"
+                raise ValueError(f"pipeline {self.name}: {problem}")
+            known.update(stage.name for stage in ready)
+            waiting = [stage for stage in waiting if stage not in ready]
+
+    def _run_stage(self, stage: Stage, args: List[object]):
+        with span(f"{self.name}.{stage.name}"):
+            return stage.fn(*args)
+
+    def run(self, on_result: Optional[Callable[[str, object], None]] = None, **inputs) -> Dict[str, object]:
+        """Executa o pipeline e retorna {etapa: resultado} na ordem em que as etapas foram declaradas.
+
+        on_result(etapa, resultado) é chamado na thread de quem chamou run(), assim que cada etapa
+        termina. Se uma etapa falhar, as que ainda não começaram são descartadas e a exceção segue.
+        """
+        missing = [name for name in self.inputs if name not in inputs]
+        if missing:
+            raise ValueError(f"pipeline {self.name}: faltam as entradas {', '.join(missing)}")
+        values = dict(inputs)
+        waiting = list(self.stages)
+        running: Dict[Future, Stage] = {}
+        # Uma fila para o run inteiro: cada etapa ganha um callback só, quando é enviada
+        finished: queue.SimpleQueue = queue.SimpleQueue()
+        with get_runtime().group(f"pipeline.{self.name}", len(self.stages)) as group:
+            while waiting or running:
+                ready = [stage for stage in waiting if all(name in values for name in stage.requires)]
+                for stage in ready:
+                    waiting.remove(stage)
+                    future = group.submit(self._run_stage, stage, [values[name] for name in stage.requires])
+                    future.add_done_callback(finished.put)
+                    running[future] = stage
+                future = group.next_done(finished)
+                stage = running.pop(future)
+                values[stage.name] = future.result()
+                if on_result is not None:
+                    on_result(stage.name, values[stage.name])
+        return {stage.name: values[stage.name] for stage in self.stages}
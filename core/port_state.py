@@ -0,0 +1,233 @@
+import struct
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Estados de porta; 0 significa "não escaneada"
+UNSCANNED = 0
+OPEN = 1
+CLOSED = 2
+FILTERED = 3
+OPEN_FILTERED = 4  # UDP sem resposta nenhuma: aberta ou filtrada
+
+STATE_NAMES = ("", "Open", "Closed", "Filtered", "Open|Filtered")
+STATE_CODES = {name: code for code, name in enumerate(STATE_NAMES) if name}
+
+PORT_COUNT = 65536
+# Até quantas portas o estado fica em um dicionário antes de virar o bytearray de 64 KiB
+SPARSE_LIMIT = 256
+
+# Só as trocas de representação (e as escritas no dicionário, no máximo SPARSE_LIMIT por
+# mapa) passam por aqui; escritas no bytearray continuam sem lock
+_convert_lock = threading.Lock()
+
+
+class PortStateMap:
+    """Estado das portas de um host/protocolo.
+
+    Começa em um dicionário porta -> estado, que não custa nada para os hosts de um scan grande
+    que ainda não começaram, e passa para um bytearray de 64 KiB acima de SPARSE_LIMIT portas.
+    compact() guarda o bytearray compactado quando o host termina; as leituras descompactam
+    uma cópia temporária e a próxima escrita volta para o bytearray.
+    """
+
+    __slots__ = ('host', 'protocol', '_sparse', '_states', '_packed', '_packed_count')
+
+    def __init__(self, host: Optional[str] = None, protocol: str = 'tcp'):
+        self.host = str(host) if host is not None else None
+        self.protocol = protocol
+        self._sparse: Optional[Dict[int, int]] = {}
+        self._states: Optional[bytearray] = None
+        self._packed: Optional[bytes] = None
+        # Portas escaneadas no mapa compactado, para len() não descompactar
+        self._packed_count = 0
+
+    def _dense(self) -> bytearray:
+        # Bytearray para escrita, criado (ou descompactado) na primeira vez que precisa
+        with _convert_lock:
+            if self._states is None:
+                states = bytearray(zlib.decompress(self._packed)) if self._packed is not None else bytearray(PORT_COUNT)
+                for port, state in (self._sparse or {}).items():
+                    states[port] = state
+                self._states = states
+                self._sparse = self._packed = None
+            return self._states
+
+    def _view(self) -> Union[bytearray, bytes, Dict[int, int]]:
+        # Leitura: o bytearray, uma cópia descompactada ou uma cópia do dicionário
+        states = self._states
+        if states is not None:
+            return states
+        with _convert_lock:
+            if self._states is not None:
+                return self._states
+            if self._packed is not None:
+                return zlib.decompress(self._packed)
+            return dict(self._sparse)
+
+    def set(self, port: int, state: int) -> None:
+        """Define o estado de uma porta (OPEN, CLOSED, FILTERED, OPEN_FILTERED)"""
+        # Sem isso uma porta negativa cairia do fim do bytearray (-1 viraria 65535)
+        if not 0 <= port < PORT_COUNT:
+            raise ValueError(f"porta fora do intervalo 0-{PORT_COUNT - 1}: {port}")
+        states = self._states
+        if states is None:
+            with _convert_lock:
+                sparse = self._sparse
+                if sparse is not None and (port in sparse or len(sparse) < SPARSE_LIMIT):
+                    if state:
+                        sparse[port] = state
+                    else:
+                        sparse.pop(port, None)
+                    return
+            states = self._dense()
+        # Escrita de um único byte: segura entre threads sem lock
+        states[port] = state
+
+    def get(self, port: int, default=None) -> Optional[str]:
+        """Retorna o nome do estado da porta ou default se não foi escaneada"""
+        state = self.state(port)
+        return STATE_NAMES[state] if state else default
+
+    def state(self, port: int) -> int:
+        if not 0 <= port < PORT_COUNT:
+            raise IndexError(port)
+        states = self._view()
+        if isinstance(states, dict):
+            return states.get(port, UNSCANNED)
+        return states[port]
+
+    # Interface de dicionário para quem ainda usa resultados["porta"] = "Open"
+    def __setitem__(self, port: int, state: Union[int, str]) -> None:
+        self.set(port, STATE_CODES[state] if isinstance(state, str) else state)
+
+    def __getitem__(self, port: int) -> str:
+        state = self.state(port)
+        if not state:
+            raise KeyError(port)
+        return STATE_NAMES[state]
+
+    def __contains__(self, port: int) -> bool:
+        return 0 <= port < PORT_COUNT and self.state(port) != UNSCANNED
+
+    def __len__(self) -> int:
+        if self._states is None and self._packed is not None:
+            with _convert_lock:
+                if self._states is None and self._packed is not None:
+                    return self._packed_count
+        states = self._view()
+        if isinstance(states, dict):
+            return len(states)
+        return PORT_COUNT - states.count(UNSCANNED)
+
+    def ports(self, state: int) -> Iterator[int]:
+        """Itera só as portas em um estado, usando bytearray.find (em C)"""
+        states = self._view()
+        if isinstance(states, dict):
+            yield from sorted(port for port, value in states.items() if value == state)
+            return
+        port = states.find(state)
+        while port != -1:
+            yield port
+            port = states.find(state, port + 1)
+
+    def pending(self, ports: Iterable[int]) -> List[int]:
+        """Portas da lista que ainda não foram escaneadas (para retomar um scan)"""
+        states = self._view()
+        if isinstance(states, dict):
+            return [port for port in ports if port not in states]
+        return [port for port in ports if not states[port]]
+
+    def open_ports(self) -> Iterator[int]:
+        return self.ports(OPEN)
+
+    def count(self, state: int) -> int:
+        """Conta as portas em um estado (bytearray.count, sem laço em Python)"""
+        states = self._view()
+        if isinstance(states, dict):
+            return sum(1 for value in states.values() if value == state)
+        return states.count(state)
+
+    def counts(self) -> Dict[str, int]:
+        states = self._view()
+        if isinstance(states, dict):
+            values = list(states.values())
+            return {STATE_NAMES[state]: values.count(state) for state in range(1, len(STATE_NAMES))}
+        return {STATE_NAMES[state]: states.count(state) for state in range(1, len(STATE_NAMES))}
+
+    def items(self) -> Iterator[Tuple[int, str]]:
+        states = self._view()
+        if isinstance(states, dict):
+            for port in sorted(states):
+                yield port, STATE_NAMES[states[port]]
+            return
+        for port, state in enumerate(states):
+            if state:
+                yield port, STATE_NAMES[state]
+
+    def to_dict(self) -> Dict[int, str]:
+        return dict(self.items())
+
+    def compact(self) -> None:
+        """Libera o bytearray de um host que terminou: volta ao dicionário se couber nele,
+        senão fica compactado (um sweep típico cabe em poucas centenas de bytes)"""
+        with _convert_lock:
+            states = self._states
+            if states is None:
+                return
+            count = PORT_COUNT - states.count(UNSCANNED)
+            if count <= SPARSE_LIMIT:
+                self._sparse = {port: state for port, state in enumerate(states) if state}
+            else:
+                self._packed = zlib.compress(bytes(states))
+                self._packed_count = count
+            self._states = None
+
+    def to_bytes(self) -> bytes:
+        """Serializa compactado; um sweep típico cabe em poucas centenas de bytes"""
+        packed = self._packed
+        if packed is not None and self._states is None:
+            return packed
+        states = self._view()
+        if isinstance(states, dict):
+            dense = bytearray(PORT_COUNT)
+            for port, state in states.items():
+                dense[port] = state
+            states = dense
+        return zlib.compress(bytes(states))
+
+    def to_pairs(self) -> Optional[bytes]:
+        """Serializa só as portas escaneadas de um mapa ainda em dicionário: as portas (uint16,
+        big-endian) e depois um byte de estado por porta. None para mapas em bytearray ou
+        compactados, que usam to_bytes()"""
+        with _convert_lock:
+            sparse = self._sparse
+            if sparse is None:
+                return None
+            ports = sorted(sparse)
+            states = bytes(sparse[port] for port in ports)
+        return struct.pack(f'!{len(ports)}H', *ports) + states
+
+    @classmethod
+    def from_pairs(cls, data: bytes, host: Optional[str] = None, protocol: str = 'tcp') -> 'PortStateMap':
+        count, extra = divmod(len(data), 3)
+        if extra:
+            raise ValueError("pares de PortStateMap com tamanho errado")
+        state_map = cls(host, protocol)
+        for port, state in zip(struct.unpack_from(f'!{count}H', data), data[2 * count:]):
+            state_map.set(port, state)
+        return state_map
+
+    @classmethod
+    def from_bytes(cls, data: bytes, host: Optional[str] = None, protocol: str = 'tcp') -> 'PortStateMap':
+        state_map = cls(host, protocol)
+        states = zlib.decompress(data)
+        if len(states) != PORT_COUNT:
+            raise ValueError("snapshot de PortStateMap com tamanho errado")
+        state_map._states = bytearray(states)
+        state_map._sparse = None
+        state_map.compact()
+        return state_map
+
+    def __repr__(self) -> str:
+        return f"PortStateMap(host={self.host!r}, protocol={self.protocol!r}, {self.counts()})"
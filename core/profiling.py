@@ -0,0 +1,287 @@
+import atexit
+import collections
+import contextlib
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+from config.settings import PROFILE_INTERVAL, PROFILE_TRACEMALLOC_FRAMES, PROFILE_TOP_ALLOCATIONS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SamplingProfiler:
+    """Amostra as pilhas de todas as threads em intervalos fixos (tempo de relógio, inclui espera de I/O)"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples: collections.Counter = collections.Counter()
+        self.sample_count = 0
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({_relative(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def sample(self) -> None:
+        # Threads de pool viram uma raiz só (ThreadPoolExecutor-0_3 -> ThreadPoolExecutor-0)
+        names = {thread.ident: re.sub(r'_\d+$', '', thread.name) for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, 'thread'))
+            self.samples[';'.join(reversed(stack))] += 1
+        self.sample_count += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> 'SamplingProfiler':
+        self._thread = threading.Thread(target=self._run, name='reconbomb-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write_collapsed(self, path: str) -> None:
+        """Uma linha 'raiz;...;folha contagem' por pilha (flamegraph.pl, speedscope, inferno)"""
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class MemoryAccounting:
+    """Snapshots do tracemalloc nas fronteiras dos módulos, atribuídos ao código do projeto"""
+
+    def __init__(self, frames: int = PROFILE_TRACEMALLOC_FRAMES, top: int = PROFILE_TOP_ALLOCATIONS):
+        self.frames = frames
+        self.top = top
+        self.boundaries: List[Dict] = []
+        self._sites: Dict[tuple, Optional[str]] = {}
+        self._lock = threading.Lock()
+        # Fronteiras abertas agora; o pico do tracemalloc é do processo, então só vale para
+        # uma fronteira que rodou sozinha do começo ao fim
+        self._active: List[Dict] = []
+
+    def start(self) -> None:
+        tracemalloc.start(self.frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+
+    def _site(self, frames: tuple) -> Optional[str]:
+        # Linha mais interna do projeto na pilha (as pilhas brutas vêm da mais recente para a
+        # mais antiga); sem nenhuma, a mais interna fora do import system
+        site = self._sites.get(frames, False)
+        if site is not False:
+            return site
+        site = None
+        for filename, lineno in frames:
+            if filename.startswith(ROOT):
+                site = None if filename == __file__ else f"{_relative(filename)}:{lineno}"
+                break
+            if site is None and not filename.startswith('<frozen'):
+                site = f"{_relative(filename)}:{lineno} (fora do projeto)"
+        self._sites[frames] = site
+        return site
+
+    def totals(self) -> Dict[str, List[int]]:
+        """Bytes e blocos vivos por linha do projeto"""
+        snapshot = tracemalloc.take_snapshot()
+        by_frames = _group_raw(snapshot)
+        if by_frames is None:
+            # API pública: mais lenta, mas não depende do formato interno do CPython
+            by_frames = {}
+            for stat in snapshot.statistics('traceback'):
+                # O Traceback vem do mais antigo para o mais recente; _site quer o contrário
+                frames = tuple((frame.filename, frame.lineno) for frame in reversed(list(stat.traceback)))
+                entry = by_frames.setdefault(frames, [0, 0])
+                entry[0] += stat.size
+                entry[1] += stat.count
+        sites: Dict[str, List[int]] = {}
+        for frames, (size, count) in by_frames.items():
+            site = self._site(frames)
+            if site is not None:
+                entry = sites.setdefault(site, [0, 0])
+                entry[0] += size
+                entry[1] += count
+        return sites
+
+    @contextlib.contextmanager
+    def boundary(self, label: str):
+        before = self.totals()
+        # reset_peak só existe a partir do 3.9; antes disso fica só o pico do processo
+        state = {'overlap': not hasattr(tracemalloc, 'reset_peak')}
+        with self._lock:
+            if self._active:
+                # Rodando junto com outra: nenhuma das duas tem um pico só seu
+                state['overlap'] = True
+                for other in self._active:
+                    other['overlap'] = True
+            elif not state['overlap']:
+                tracemalloc.reset_peak()
+            self._active.append(state)
+            baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            with self._lock:
+                self._active.remove(state)
+                peak = None if state['overlap'] else tracemalloc.get_traced_memory()[1] - baseline
+            after = self.totals()
+            sites = {}
+            for site in set(before) | set(after):
+                size_before, count_before = before.get(site, (0, 0))
+                size_after, count_after = after.get(site, (0, 0))
+                if size_after != size_before:
+                    sites[site] = [size_after - size_before, count_after - count_before]
+            with self._lock:
+                self.boundaries.append({
+                    'label': label,
+                    'duration': duration,
+                    'peak': peak,
+                    'retained': sum(size for size, _ in sites.values()),
+                    'sites': sites,
+                })
+
+    def write_report(self, path: str) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        remaining = self.totals()
+        by_file: collections.Counter = collections.Counter()
+        for site, (size, _) in remaining.items():
+            by_file[site.split(':', 1)[0]] += size
+
+        lines = [
+            "Relatório de alocações (tracemalloc)",
+            f"Memória rastreada no fim: {_size(current)}; pico: {_size(peak)}",
+            "Cada alocação é atribuída à linha mais interna do projeto na pilha (ex.: o resposta.text",
+            "lido dentro do requests conta para a linha do módulo que o pediu). Fronteiras que rodaram",
+            "ao mesmo tempo (modo em lote com --paralelo > 1) veem as alocações umas das outras e",
+            "ficam sem pico, que o tracemalloc só mede para o processo inteiro.",
+            "",
+        ]
+        for entry in self.boundaries:
+            peak = '' if entry['peak'] is None else f", pico {_size(entry['peak'], sign=True)}"
+            lines.append(f"== {entry['label']} ({entry['duration']:.2f} s, retido {_size(entry['retained'], sign=True)}{peak}) ==")
+            lines.extend(_site_lines(entry['sites'], self.top, sign=True))
+            lines.append("")
+        lines.append("== Ainda alocado no fim, por arquivo ==")
+        for filename, size in by_file.most_common(self.top):
+            lines.append(f"  {_size(size):>12}  {filename}")
+        lines.append("")
+        lines.append("== Ainda alocado no fim, por linha ==")
+        lines.extend(_site_lines(remaining, self.top))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+def _group_raw(snapshot) -> Optional[Dict[tuple, List[int]]]:
+    # Tuplas brutas (domínio, tamanho, pilha, ...): agrupar por elas é ~3x mais rápido que
+    # Snapshot.statistics, que cria um objeto por pilha. É um atributo interno do CPython;
+    # se ele mudar de formato, None e quem chamou usa a API pública
+    traces = getattr(snapshot.traces, '_traces', None)
+    if not isinstance(traces, (list, tuple)):
+        return None
+    if traces and not (isinstance(traces[0], tuple) and isinstance(traces[0][1], int)
+                       and isinstance(traces[0][2], tuple)):
+        return None
+    by_frames: Dict[tuple, List[int]] = {}
+    try:
+        for trace in traces:
+            size, frames = trace[1], trace[2]
+            entry = by_frames.get(frames)
+            if entry is None:
+                by_frames[frames] = [size, 1]
+            else:
+                entry[0] += size
+                entry[1] += 1
+    except (TypeError, IndexError):
+        return None
+    return by_frames
+
+
+def _relative(filename: str) -> str:
+    # Fora do projeto, relativo à entrada do sys.path (asyncio/base_events.py, requests/models.py)
+    if filename.startswith(ROOT):
+        return os.path.relpath(filename, ROOT)
+    prefixes = [path for path in sys.path if path and filename.startswith(path + os.sep)]
+    return os.path.relpath(filename, max(prefixes, key=len)) if prefixes else filename
+
+
+def _site_lines(sites: Dict[str, List[int]], top: int, sign: bool = False) -> List[str]:
+    ranked = sorted(sites.items(), key=lambda item: abs(item[1][0]), reverse=True)[:top]
+    count_format = '{:>+8d}' if sign else '{:>8d}'
+    return [f"  {_size(size, sign):>12}  {count_format.format(count)} blocos  {site}"
+            for site, (size, count) in ranked]
+
+
+def _size(size: float, sign: bool = False) -> str:
+    prefix = '+' if sign and size > 0 else ''
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024 or unit == 'MiB':
+            return f"{prefix}{size:.0f} {unit}" if unit == 'B' else f"{prefix}{size:.1f} {unit}"
+        size /= 1024
+
+
+class Profiler:
+    """Modo --profile: amostragem das pilhas e contabilidade de memória até o fim do processo"""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.sampler = SamplingProfiler()
+        self.memory = MemoryAccounting() if PROFILE_TRACEMALLOC_FRAMES else None
+
+    def start(self) -> 'Profiler':
+        if self.memory is not None:
+            self.memory.start()
+        self.sampler.start()
+        return self
+
+    def stop(self) -> List[str]:
+        """Para a coleta e grava PREFIXO.folded e PREFIXO.alloc.txt"""
+        self.sampler.stop()
+        files = [f"{self.prefix}.folded"]
+        self.sampler.write_collapsed(files[0])
+        if self.memory is not None:
+            files.append(f"{self.prefix}.alloc.txt")
+            self.memory.write_report(files[1])
+            self.memory.stop()
+        # stderr: no modo em lote o stdout é só do resumo JSON
+        print(f"Perfil: {self.sampler.sample_count} amostras; gravado em {', '.join(files)}", file=sys.stderr)
+        return files
+
+
+_profiler: Optional[Profiler] = None
+
+
+def start_profiling(prefix: str) -> Profiler:
+    """Liga o --profile; os arquivos são gravados na saída do processo"""
+    global _profiler
+    _profiler = Profiler(prefix).start()
+    atexit.register(_profiler.stop)
+    return _profiler
+
+
+def memory_boundary(label: str):
+    """Fronteira de módulo para o relatório de memória; não faz nada sem --profile"""
+    if _profiler is None or _profiler.memory is None:
+        return contextlib.nullcontext()
+    return _profiler.memory.boundary(label)
@@ -0,0 +1,133 @@
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from config.settings import RATE_LIMITS, RATE_BURST
+from core.metrics import RATE_LIMIT_WAIT
+
+
+class TokenBucket:
+    """Balde de tokens no formato GCRA: guarda só o horário teórico da próxima liberação"""
+
+    __slots__ = ('rate', 'interval', 'tolerance', '_tat', '_lock')
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.interval = 1.0 / rate
+        # Rajada permitida: quantos envios podem sair de uma vez depois de um tempo ocioso
+        burst = max(1.0, burst if burst is not None else rate * RATE_BURST)
+        self.tolerance = (burst - 1) * self.interval
+        self._tat = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, count: int = 1, now: Optional[float] = None) -> float:
+        """Reserva `count` tokens e retorna o horário (time.monotonic) em que podem ser usados"""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            tat = max(self._tat, now)
+            self._tat = tat + count * self.interval
+        # Quem chega depois fica atrás na fila, sem disputar tokens
+        return max(now, tat - self.tolerance)
+
+
+class RateLimiter:
+    """Limites de taxa do processo por tipo de envio, no total e por destino"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]] = RATE_LIMITS):
+        # tipo -> (envios/s no total, envios/s por destino); 0 = sem limite
+        self.limits = dict(limits)
+        self._global: Dict[str, TokenBucket] = {}
+        self._per_destination: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+        for kind in self.limits:
+            self._reset(kind)
+
+    def _reset(self, kind: str):
+        global_rate, _ = self.limits[kind]
+        if global_rate:
+            self._global[kind] = TokenBucket(global_rate)
+        else:
+            self._global.pop(kind, None)
+        for key in [key for key in self._per_destination if key[0] == kind]:
+            del self._per_destination[key]
+
+    def configure(self, kind: str, global_rate: Optional[float] = None, per_destination: Optional[float] = None):
+        """Altera os limites de um tipo (None mantém o valor atual, 0 remove o limite)"""
+        with self._lock:
+            current = self.limits.get(kind, (0, 0))
+            self.limits[kind] = (current[0] if global_rate is None else global_rate,
+                                 current[1] if per_destination is None else per_destination)
+            self._reset(kind)
+
+    def _bucket(self, kind: str, destination: str) -> Optional[TokenBucket]:
+        key = (kind, destination)
+        bucket = self._per_destination.get(key)
+        if bucket is None:
+            rate = self.limits.get(kind, (0, 0))[1]
+            if not rate:
+                return None
+            with self._lock:
+                bucket = self._per_destination.setdefault(key, TokenBucket(rate))
+        return bucket
+
+    def reserve(self, kind: str, destination=None, count: int = 1) -> float:
+        """Reserva envios no destino e no total; retorna quantos segundos esperar"""
+        now = time.monotonic()
+        ready = now
+        if destination is not None:
+            bucket = self._bucket(kind, str(destination))
+            if bucket is not None:
+                ready = bucket.reserve(count, now)
+        # O limite global é reservado para quando o destino já estiver liberado
+        bucket = self._global.get(kind)
+        if bucket is not None:
+            ready = bucket.reserve(count, ready)
+        return ready - now
+
+    def wait(self, kind: str, destination=None, count: int = 1) -> None:
+        """Bloqueia a thread até o envio estar dentro dos limites"""
+        delay = self.reserve(kind, destination, count)
+        if delay > 0:
+            RATE_LIMIT_WAIT.inc(kind, amount=delay)
+            time.sleep(delay)
+
+    async def wait_async(self, kind: str, destination=None, count: int = 1) -> None:
+        """Versão para asyncio: cede o loop em vez de bloquear"""
+        delay = self.reserve(kind, destination, count)
+        if delay > 0:
+            # Já carregado por quem roda o loop; no topo pesaria no import dos modos síncronos
+            import asyncio
+            RATE_LIMIT_WAIT.inc(kind, amount=delay)
+            await asyncio.sleep(delay)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+# Limitador de um job com limites próprios (modo daemon); o contexto segue para as tarefas do
+# runtime e do loop de eventos abertas pelo job
+_scoped: contextvars.ContextVar = contextvars.ContextVar('rate_limiter', default=None)
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Limitador compartilhado por todos os módulos do processo (ou o do job em andamento)"""
+    global _limiter
+    scoped = _scoped.get()
+    if scoped is not None:
+        return scoped
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
+
+
+@contextlib.contextmanager
+def scoped_rate_limiter(limiter: RateLimiter):
+    """Usa `limiter` no lugar do limitador do processo dentro do bloco"""
+    token = _scoped.set(limiter)
+    try:
+        yield limiter
+    finally:
+        _scoped.reset(token)
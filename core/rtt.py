@@ -0,0 +1,59 @@
+import threading
+from typing import Dict, Optional
+from config.settings import RTT_INITIAL_TIMEOUT, RTT_MIN_TIMEOUT, RTT_MAX_TIMEOUT, MAX_RETRIES
+from core.timing import get_timing
+
+
+class RTTEstimator:
+    """Estimador de RTT por alvo no estilo do TCP (RFC 6298: SRTT/RTTVAR)"""
+
+    def __init__(self, initial_timeout: float = RTT_INITIAL_TIMEOUT,
+                 min_timeout: float = RTT_MIN_TIMEOUT,
+                 max_timeout: float = RTT_MAX_TIMEOUT,
+                 max_retries: int = MAX_RETRIES):
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.max_retries = max_retries
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def update(self, rtt: float) -> None:
+        """Alimenta o estimador com o tempo de uma resposta recebida"""
+        with self._lock:
+            if self.srtt is None:
+                # A primeira resposta semeia o estimador
+                self.srtt = rtt
+                self.rttvar = rtt / 2
+            else:
+                self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+                self.srtt = 0.875 * self.srtt + 0.125 * rtt
+            self.samples += 1
+
+    def timeout(self, attempt: int = 0) -> float:
+        """Timeout da sonda; dobra a cada retransmissão"""
+        if self.srtt is None:
+            base = self.initial_timeout
+        else:
+            base = self.srtt + 4 * self.rttvar
+        return min(max(base * (2 ** attempt), self.min_timeout), self.max_timeout)
+
+
+_estimators: Dict[tuple, RTTEstimator] = {}
+_lock = threading.Lock()
+
+
+def get_estimator(host) -> RTTEstimator:
+    """Retorna o estimador compartilhado de um alvo, criando se necessário"""
+    # Limites e retransmissões vêm do perfil de temporização; jobs do daemon com perfis
+    # diferentes no mesmo alvo ficam cada um com o seu
+    timing = get_timing()
+    rtt, retries = timing.get('rtt', 'portas'), timing.get('retries', 'portas')
+    key = (str(host), rtt, retries)
+    with _lock:
+        estimator = _estimators.get(key)
+        if estimator is None:
+            estimator = _estimators[key] = RTTEstimator(*rtt, max_retries=retries)
+        return estimator
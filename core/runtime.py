@@ -0,0 +1,299 @@
+import collections
+import contextvars
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, Deque, Iterable, Iterator, Optional, Set
+from config.settings import RUNTIME_THREADS_PER_CPU, RUNTIME_MAX_THREADS, RUNTIME_MIN_THREADS
+from core.net import default_concurrency
+
+# Quem espera um grupo adianta as tarefas dele; sem nenhuma liberada, dorme até este prazo
+HELP_POLL = 0.05
+# Depois de um Ctrl+C, quanto run() espera a corotina cancelada fechar seus sockets
+CANCEL_GRACE = 2.0
+
+
+def default_threads() -> int:
+    """Threads do pool: RUNTIME_THREADS_PER_CPU por CPU, entre o piso e o teto configurados"""
+    cpus = os.cpu_count() or 1
+    return min(RUNTIME_MAX_THREADS, max(RUNTIME_MIN_THREADS, cpus * RUNTIME_THREADS_PER_CPU))
+
+
+class _Task:
+    __slots__ = ('group', 'future', 'fn', 'args', 'kwargs', 'context')
+
+    def __init__(self, group: 'TaskGroup', future: Future, fn: Callable, args: tuple, kwargs: dict):
+        self.group = group
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        # Como no asyncio, a tarefa vê as ContextVars de quem a submeteu (perfil de temporização
+        # e limitador de um job do daemon)
+        self.context = contextvars.copy_context()
+
+    def run(self) -> None:
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.context.run(self.fn, *self.args, **self.kwargs)
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+
+
+class TaskGroup:
+    """Tarefas de um módulo no pool compartilhado, no máximo `limit` rodando ao mesmo tempo.
+
+    Quem espera o grupo (as_completed, wait, saída do with) executa na própria thread as
+    tarefas do grupo que ainda estão na fila: um módulo chamado de dentro de outro (modo em
+    lote) não fica parado esperando uma thread livre do pool que ele mesmo ocupa.
+    """
+
+    def __init__(self, runtime: 'Runtime', name: str, limit: Optional[int] = None):
+        self.runtime = runtime
+        self.name = name
+        self.limit = max(1, limit or runtime.max_threads)
+        self.queue: Deque[_Task] = collections.deque()
+        self.running = 0
+        # Só as que ainda não terminaram: um grupo de vida longa (daemon) não acumula futures
+        self.pending: Set[Future] = set()
+        self._in_ring = False
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        # set.add/discard são atômicos sob o GIL; submit pode vir do loop de eventos (on_open)
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+        self.runtime._enqueue(_Task(self, future, fn, args, kwargs))
+        return future
+
+    def as_completed(self, futures: Optional[Iterable[Future]] = None) -> Iterator[Future]:
+        """Como concurrent.futures.as_completed, adiantando as tarefas do grupo enquanto espera"""
+        futures = list(self.pending if futures is None else futures)
+        finished: queue.SimpleQueue = queue.SimpleQueue()
+        for future in futures:
+            future.add_done_callback(finished.put)
+        for _ in futures:
+            yield self.next_done(finished)
+
+    def next_done(self, finished: queue.SimpleQueue) -> Future:
+        """Próximo futuro posto em `finished` (por add_done_callback), adiantando as tarefas do
+        grupo enquanto espera. Quem espera várias vezes usa a mesma fila, com um callback só
+        por futuro"""
+        while True:
+            try:
+                return finished.get_nowait()
+            except queue.Empty:
+                pass
+            task = self.runtime._take(self)
+            if task is not None:
+                self.runtime._execute(task, helping=True)
+                continue
+            try:
+                return finished.get(timeout=HELP_POLL)
+            except queue.Empty:
+                pass
+
+    def wait(self, futures: Optional[Iterable[Future]] = None) -> None:
+        for _ in self.as_completed(futures):
+            pass
+
+    def cancel(self) -> None:
+        """Descarta as tarefas que ainda não começaram (as que estão rodando terminam)"""
+        with self.runtime._cond:
+            tasks = list(self.queue)
+            self.queue.clear()
+        for task in tasks:
+            task.future.cancel()
+
+    def __enter__(self) -> 'TaskGroup':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.cancel()
+        self.wait()
+
+
+class Runtime:
+    """Loop de eventos e pool de threads compartilhados por todos os módulos do processo.
+
+    O trabalho bloqueante (requests, whois, dnspython, banners) entra no pool por grupos, que
+    são atendidos em rodízio: um módulo com milhares de tarefas na fila não atrasa os outros.
+    As corotinas (scans TCP/UDP, descoberta) rodam todas no mesmo loop e dividem um limite
+    global de sockets.
+    """
+
+    def __init__(self, max_threads: Optional[int] = None, max_sockets: Optional[int] = None):
+        self.max_threads = max_threads or default_threads()
+        # Cada thread do pool pode manter um socket aberto; o resto é dos scans assíncronos
+        self.max_sockets = max_sockets or max(1, default_concurrency() - self.max_threads)
+        self._cond = threading.Condition()
+        self._ring: Deque[TaskGroup] = collections.deque()
+        self._threads = 0
+        self._idle = 0
+        self._loop = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._sockets = None
+        self._loop_lock = threading.Lock()
+
+    # Pool de threads
+
+    def group(self, name: str, limit: Optional[int] = None) -> TaskGroup:
+        return TaskGroup(self, name, limit)
+
+    def _enqueue(self, task: _Task) -> None:
+        group = task.group
+        with self._cond:
+            group.queue.append(task)
+            if not group._in_ring:
+                group._in_ring = True
+                self._ring.append(group)
+            # Além do limite do grupo a tarefa espera uma das dele terminar, sem ocupar outra thread
+            if group.running + len(group.queue) <= group.limit:
+                self._wake()
+
+    def _wake(self) -> None:
+        if self._idle:
+            # Quem notifica desconta a thread ociosa, para duas tarefas não acordarem a mesma
+            self._idle -= 1
+            self._cond.notify()
+        elif self._threads < self.max_threads:
+            self._threads += 1
+            # O sufixo _N junta as threads numa raiz só no --profile
+            threading.Thread(target=self._worker, name=f"reconbomb-worker_{self._threads}",
+                             daemon=True).start()
+
+    def _pop(self, group: TaskGroup) -> _Task:
+        group.running += 1
+        return group.queue.popleft()
+
+    def _next(self) -> Optional[_Task]:
+        # Rodízio entre os grupos com fila, pulando os que estão no limite
+        for _ in range(len(self._ring)):
+            group = self._ring[0]
+            if not group.queue:
+                self._ring.popleft()
+                group._in_ring = False
+                continue
+            self._ring.rotate(-1)
+            if group.running < group.limit:
+                return self._pop(group)
+        return None
+
+    def _take(self, group: TaskGroup) -> Optional[_Task]:
+        with self._cond:
+            if group.queue and group.running < group.limit:
+                return self._pop(group)
+        return None
+
+    def _execute(self, task: _Task, helping: bool = False) -> None:
+        try:
+            task.run()
+        finally:
+            with self._cond:
+                task.group.running -= 1
+                # Vaga aberta no grupo por uma thread de fora do pool: ninguém do pool vai
+                # procurar a próxima tarefa sozinho
+                if helping and task.group.queue:
+                    self._wake()
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                task = self._next()
+                while task is None:
+                    self._idle += 1
+                    self._cond.wait()
+                    task = self._next()
+            self._execute(task)
+
+    # Loop de eventos
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            with self._loop_lock:
+                if self._loop is None:
+                    self._start_loop()
+        return self._loop
+
+    @property
+    def sockets(self):
+        """Semáforo (asyncio) do limite global de sockets; use só dentro do loop compartilhado"""
+        self.loop  # inicia o loop, que cria o semáforo
+        return self._sockets
+
+    def _start_loop(self) -> None:
+        import asyncio
+        ready = threading.Event()
+
+        def main():
+            # Seletor também no Windows: o loop proactor não tem add_reader/add_writer
+            loop = asyncio.SelectorEventLoop()
+            asyncio.set_event_loop(loop)
+            # Criado com o loop corrente definido (até o 3.9 o semáforo se prende a ele)
+            self._sockets = asyncio.Semaphore(self.max_sockets)
+            self._loop = loop
+            ready.set()
+            loop.run_forever()
+
+        self._loop_thread = threading.Thread(target=main, name='reconbomb-loop', daemon=True)
+        self._loop_thread.start()
+        ready.wait()
+
+    def spawn(self, coro) -> Future:
+        """Agenda a corotina no loop compartilhado sem esperar por ela"""
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro):
+        """Executa a corotina no loop compartilhado e espera o resultado (substitui o asyncio.run)"""
+        if threading.current_thread() is self._loop_thread:
+            coro.close()
+            raise RuntimeError("Runtime.run chamado de dentro do loop compartilhado")
+        finished = threading.Event()
+        future = self.spawn(_signal_when_done(coro, finished))
+        try:
+            return future.result()
+        except BaseException:
+            # Ctrl+C chega na thread principal: cancela a corotina e dá tempo para os finally
+            # dela fecharem os sockets antes de a exceção seguir
+            future.cancel()
+            finished.wait(CANCEL_GRACE)
+            raise
+
+
+async def _signal_when_done(coro, finished: threading.Event):
+    try:
+        return await coro
+    finally:
+        finished.set()
+
+
+_runtime: Optional[Runtime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> Runtime:
+    """Runtime do processo, criado no primeiro uso"""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = Runtime()
+    return _runtime
+
+
+def _after_fork() -> None:
+    # O filho herda o runtime sem as threads do pai (parallel_scan usa fork): começa outro
+    global _runtime, _runtime_lock
+    _runtime = None
+    _runtime_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,207 @@
+import collections
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from config.settings import BATCH_CONCURRENCY, BATCH_PER_TARGET, BATCH_MODULE_LIMITS
+from core.metrics import SCHEDULER_QUEUED, SCHEDULER_WAIT
+from core.runtime import get_runtime
+
+# Prioridades: quanto menor, mais cedo o trabalho sai da fila
+NORMAL = 0
+URGENT = -10
+
+
+class _Item:
+    __slots__ = ('key', 'target', 'module', 'fn', 'args', 'future', 'context', 'queued', 'taken')
+
+    def __init__(self, key: List, target: Optional[str], module: str, fn: Callable, args: tuple):
+        # [prioridade, posição entre os trabalhos do alvo, ordem de chegada]
+        self.key = key
+        self.target = target
+        self.module = module
+        self.fn = fn
+        self.args = args
+        self.future = Future()
+        # Como no runtime: o trabalho vê as ContextVars de quem o enfileirou, não as de quem o despachou
+        self.context = contextvars.copy_context()
+        self.queued = time.monotonic()
+        self.taken = False
+
+    def __lt__(self, other: '_Item') -> bool:
+        return self.key < other.key
+
+
+class Scheduler:
+    """Fila de prioridade de trabalhos (alvo, módulo) com limites por alvo e por módulo.
+
+    Com a mesma prioridade, o n-ésimo módulo de cada alvo sai antes do seguinte de qualquer
+    outro alvo, então alvos grandes e pequenos andam juntos. Uma vaga livre vai para o primeiro
+    trabalho da fila que caiba nela, sem esperar o da frente quando ele está barrado. O limite
+    por módulo vale sempre. O limite por alvo só segura um alvo enquanto houver trabalho de
+    outro para ocupar a vaga, assim nenhuma vaga fica ociosa com trabalho pendente.
+    """
+
+    def __init__(self, name: str = 'lote', concurrency: int = BATCH_CONCURRENCY, per_target: int = BATCH_PER_TARGET,
+                 module_limits: Optional[Dict[str, int]] = None):
+        self.concurrency = max(1, concurrency)
+        self.per_target = max(1, per_target)
+        self.module_limits = dict(BATCH_MODULE_LIMITS if module_limits is None else module_limits)
+        self.group = get_runtime().group(name, self.concurrency)
+        # Um heap por módulo: achar o próximo trabalho custa um topo por módulo, não a fila toda
+        self._queues: Dict[str, List[_Item]] = collections.defaultdict(list)
+        self._priorities: Dict[str, int] = {}
+        self._positions: collections.Counter = collections.Counter()
+        self._order = itertools.count()
+        self._queued = 0
+        self._running = 0
+        self._by_target: collections.Counter = collections.Counter()
+        self._by_module: collections.Counter = collections.Counter()
+        self._waits = [0, 0.0, 0.0]  # despachados, soma e máximo da espera
+        # Só os que ainda não terminaram, como no TaskGroup
+        self.pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, target: Optional[str], module: str, fn: Callable, *args, priority: Optional[int] = None) -> Future:
+        """Enfileira fn(*args); target None (ex.: scan de portas de todos os alvos) não conta no limite por alvo"""
+        with self._lock:
+            if priority is not None:
+                self._priorities[target] = priority
+            item = _Item([self._priorities.get(target, NORMAL), self._positions[target], next(self._order)],
+                         target, module, fn, args)
+            self._positions[target] += 1
+            heapq.heappush(self._queues[module], item)
+            self.pending.add(item.future)
+            item.future.add_done_callback(self.pending.discard)
+            self._queued += 1
+            SCHEDULER_QUEUED.inc(module)
+            self._dispatch()
+        return item.future
+
+    def promote(self, target: str, priority: int = URGENT) -> int:
+        """Muda a prioridade do alvo, inclusive dos trabalhos dele já na fila; retorna quantos mudaram"""
+        changed = 0
+        with self._lock:
+            self._priorities[target] = priority
+            for queue in self._queues.values():
+                for item in queue:
+                    if item.target == target and not item.taken:
+                        item.key[0] = priority
+                        changed += 1
+                heapq.heapify(queue)
+            self._dispatch()
+        return changed
+
+    def _limit(self, module: str) -> int:
+        return self.module_limits.get(module) or self.concurrency
+
+    def _first_fit(self, queue: List[_Item]) -> Optional[_Item]:
+        # Primeiro da fila cujo alvo está abaixo do limite; os barrados voltam para o heap
+        barred = []
+        found = None
+        while queue:
+            item = queue[0]
+            if item.taken:
+                heapq.heappop(queue)
+            elif item.target is None or self._by_target[item.target] < self.per_target:
+                found = item
+                break
+            else:
+                barred.append(heapq.heappop(queue))
+        for item in barred:
+            heapq.heappush(queue, item)
+        return found
+
+    def _pick(self) -> Optional[_Item]:
+        best = fallback = None
+        for module, queue in self._queues.items():
+            if not queue or self._by_module[module] >= self._limit(module):
+                continue
+            item = self._first_fit(queue)
+            if item is not None and (best is None or item < best):
+                best = item
+            if queue and (fallback is None or queue[0] < fallback):
+                fallback = queue[0]
+        # Sem ninguém abaixo do limite por alvo, a vaga não fica parada: vai para o primeiro da fila
+        return best or fallback
+
+    def _dispatch(self) -> None:
+        while self._running < self.concurrency and self._queued:
+            item = self._pick()
+            if item is None:
+                return
+            # Fica no heap marcado; sai quando chegar ao topo
+            item.taken = True
+            self._queued -= 1
+            self._running += 1
+            self._by_module[item.module] += 1
+            if item.target is not None:
+                self._by_target[item.target] += 1
+            waited = time.monotonic() - item.queued
+            self._waits[0] += 1
+            self._waits[1] += waited
+            self._waits[2] = max(self._waits[2], waited)
+            SCHEDULER_QUEUED.dec(item.module)
+            SCHEDULER_WAIT.observe(waited, item.module)
+            self.group.submit(self._execute, item)
+
+    def _execute(self, item: _Item) -> None:
+        try:
+            if item.future.set_running_or_notify_cancel():
+                try:
+                    result = item.context.run(item.fn, *item.args)
+                except BaseException as e:
+                    item.future.set_exception(e)
+                else:
+                    item.future.set_result(result)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._by_module[item.module] -= 1
+                if item.target is not None:
+                    self._by_target[item.target] -= 1
+                self._dispatch()
+
+    def as_completed(self, futures: Iterable[Future]) -> Iterator[Future]:
+        """Como TaskGroup.as_completed: quem espera adianta os trabalhos já despachados"""
+        return self.group.as_completed(futures)
+
+    def wait(self) -> None:
+        for _ in self.as_completed(list(self.pending)):
+            pass
+
+    def cancel(self) -> None:
+        """Descarta os trabalhos que ainda estão na fila (os despachados terminam)"""
+        with self._lock:
+            for module, queue in self._queues.items():
+                for item in queue:
+                    if not item.taken:
+                        item.future.cancel()
+                        SCHEDULER_QUEUED.dec(module)
+                queue.clear()
+            self._queued = 0
+
+    def stats(self) -> Dict:
+        """Profundidade da fila por módulo, trabalhos em andamento e espera na fila (s)"""
+        with self._lock:
+            depth = {module: sum(1 for item in queue if not item.taken) for module, queue in self._queues.items()}
+            dispatched, total, longest = self._waits
+            return {
+                'na_fila': self._queued,
+                'fila_por_modulo': {module: count for module, count in depth.items() if count},
+                'executando': self._running,
+                'despachados': dispatched,
+                'espera_media': round(total / dispatched, 3) if dispatched else 0.0,
+                'espera_max': round(longest, 3),
+            }
+
+    def __enter__(self) -> 'Scheduler':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.cancel()
+        self.wait()
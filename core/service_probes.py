@@ -0,0 +1,334 @@
+import os
+import pickle
+import re
+import socket
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+from config.settings import SERVICE_PROBES_FILE, SERVICE_PROBES_CACHE
+
+# Nome de serviço por porta, usado quando não há banner para identificar
+WELL_KNOWN_PORTS = {
+    1: "TCPMUX",
+    7: "Echo",
+    9: "Discard",
+    13: "Daytime",
+    17: "QOTD",
+    19: "CHARGEN",
+    20: "FTP data",
+    21: "FTP",
+    22: "SSH",
+    23: "Telnet",
+    25: "SMTP",
+    53: "DNS",
+    67: "DHCP Server",
+    68: "DHCP Client",
+    69: "TFTP",
+    80: "HTTP",
+    110: "POP3",
+    123: "NTP",
+    143: "IMAP",
+    161: "SNMP",
+    194: "IRC",
+    443: "HTTPS",
+    445: "SMB",
+    514: "Syslog",
+    993: "IMAPS",
+    995: "POP3S",
+    3306: "MySQL",
+    3389: "RDP",
+    5432: "PostgreSQL",
+    8080: "HTTP-Proxy",
+}
+
+# Versão do formato do cache; mude ao alterar a estrutura serializada
+CACHE_VERSION = 1
+
+_FLAG_MAP = {'i': re.IGNORECASE, 's': re.DOTALL}
+
+# Campos de versão do formato nmap (p/.../, v/.../ ...)
+FIELD_NAMES = {'p': 'product', 'v': 'version', 'i': 'info', 'h': 'hostname', 'o': 'os', 'd': 'device'}
+
+# Nomes da tabela de portas que correspondem a outro nome nas assinaturas
+SERVICE_ALIASES = {
+    'https': 'http', 'http-proxy': 'http', 'http-alt': 'http',
+    'imaps': 'imap', 'pop3s': 'pop3', 'smtps': 'smtp', 'submission': 'smtp',
+    'ftp data': 'ftp-data',
+}
+
+
+@lru_cache(maxsize=4096)
+def get_service_name(port) -> str:
+    """Nome do serviço pela porta (tabela local, depois getservbyport)"""
+    try:
+        port = int(port)
+    except ValueError:
+        return "Unknown"
+
+    service = WELL_KNOWN_PORTS.get(port)
+    if service is None:
+        try:
+            service = socket.getservbyport(port)
+        except OSError:
+            service = "Unknown"
+    return service
+
+
+def _parse_ports(spec: str) -> List[int]:
+    ports = []
+    for item in spec.split(','):
+        item = item.strip()
+        if '-' in item:
+            first, last = item.split('-', 1)
+            ports.extend(range(int(first), int(last) + 1))
+        elif item:
+            ports.append(int(item))
+    return ports
+
+
+def _read_delimited(text: str, pos: int) -> Tuple[str, int]:
+    """Lê um campo no formato <delimitador>conteúdo<delimitador>, como m|...| ou p/.../"""
+    delim = text[pos]
+    end = text.index(delim, pos + 1)
+    return text[pos + 1:end], end + 1
+
+
+def _unescape(payload: str) -> bytes:
+    return payload.encode('latin-1').decode('unicode_escape').encode('latin-1')
+
+
+def _parse_match(line: str) -> Dict:
+    directive, rest = line.split(' ', 1)
+    service, rest = rest.split(' ', 1)
+    if not rest.startswith('m'):
+        raise ValueError(f"Linha de assinatura inválida: {line}")
+    pattern, pos = _read_delimited(rest, 1)
+
+    flags = 0
+    while pos < len(rest) and rest[pos] in _FLAG_MAP:
+        flags |= _FLAG_MAP[rest[pos]]
+        pos += 1
+
+    fields = {}
+    while pos < len(rest):
+        if rest[pos].isspace():
+            pos += 1
+            continue
+        if rest.startswith('cpe:', pos):
+            _, pos = _read_delimited(rest, pos + 4)
+            continue
+        key = rest[pos]
+        value, pos = _read_delimited(rest, pos + 1)
+        fields[key] = value
+
+    return {
+        'service': service,
+        'pattern': pattern,
+        'flags': flags,
+        'fields': fields,
+        'soft': directive == 'softmatch',
+    }
+
+
+def parse_probes(text: str) -> List[Dict]:
+    """Converte o texto no formato nmap-service-probes em uma lista de sondas"""
+    probes = []
+    probe = None
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            if line.startswith('Probe '):
+                _, protocol, name, rest = line.split(' ', 3)
+                payload, _ = _read_delimited(rest, 1)
+                probe = {
+                    'protocol': protocol,
+                    'name': name,
+                    'payload': _unescape(payload),
+                    'ports': set(),
+                    'sslports': set(),
+                    'rarity': 5,
+                    'matches': [],
+                }
+                probes.append(probe)
+            elif probe is None:
+                raise ValueError("diretiva antes da primeira Probe")
+            elif line.startswith('ports '):
+                probe['ports'].update(_parse_ports(line[6:]))
+            elif line.startswith('sslports '):
+                probe['sslports'].update(_parse_ports(line[9:]))
+            elif line.startswith('rarity '):
+                probe['rarity'] = int(line[7:])
+            elif line.startswith(('match ', 'softmatch ')):
+                probe['matches'].append(_parse_match(line))
+        except (ValueError, IndexError) as e:
+            raise ValueError(f"Erro na linha {number} da base de sondas: {e}") from e
+    return probes
+
+
+def _service_hint(port: int) -> str:
+    name = get_service_name(port).lower()
+    return SERVICE_ALIASES.get(name, name)
+
+
+class ServiceDatabase:
+    """Base de assinaturas indexada por sonda e por dica de porta"""
+
+    def __init__(self, probes: List[Dict]):
+        self.probes = {probe['name']: probe for probe in probes}
+        self.order = sorted(self.probes, key=lambda name: self.probes[name]['rarity'])
+        # (sonda, serviço) -> índices das assinaturas daquele serviço na sonda
+        self.by_service: Dict[Tuple[str, str], List[int]] = {}
+        for probe in probes:
+            for idx, match in enumerate(probe['matches']):
+                self.by_service.setdefault((probe['name'], match['service']), []).append(idx)
+        # (sonda, porta) -> ordem de teste das assinaturas, montada na primeira consulta
+        self._plans: Dict[Tuple[str, int], List[Tuple[str, int]]] = {}
+        self._compiled: Dict[Tuple[str, int], re.Pattern] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = SERVICE_PROBES_FILE, cache_path: Optional[str] = SERVICE_PROBES_CACHE) -> 'ServiceDatabase':
+        """Carrega a base, usando o cache em disco se estiver atualizado"""
+        stat = os.stat(path)
+        key = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    cached = pickle.load(f)
+                if cached.get('key') == key:
+                    return cls(cached['probes'])
+            except Exception:
+                # O cache é só atalho: truncado, de outra versão ou ilegível, a base é lida de novo
+                pass
+
+        with open(path, encoding='latin-1') as f:
+            probes = parse_probes(f.read())
+
+        if cache_path:
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                tmp = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp, 'wb') as f:
+                    pickle.dump({'key': key, 'probes': probes}, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, cache_path)
+            except OSError:
+                pass
+        return cls(probes)
+
+    def _plan(self, probe_name: str, port: int) -> List[Tuple[str, int]]:
+        plan = self._plans.get((probe_name, port))
+        if plan is not None:
+            return plan
+        # Vários BannerGrabber consultam ao mesmo tempo: o plano é montado uma vez só, e
+        # quem lê sem lock vê o dicionário antes ou depois da inserção, nunca pela metade
+        with self._lock:
+            plan = self._plans.get((probe_name, port))
+            if plan is None:
+                plan = self._plans[(probe_name, port)] = self._build_plan(probe_name, port)
+        return plan
+
+    def _build_plan(self, probe_name: str, port: int) -> List[Tuple[str, int]]:
+        hint = _service_hint(port)
+        hinted = [name for name in self.order
+                  if port in self.probes[name]['ports'] or port in self.probes[name]['sslports']]
+        first = [probe_name] if probe_name in self.probes else []
+        plan = []
+        seen = set()
+
+        def add(name, indexes):
+            for idx in indexes:
+                if (name, idx) not in seen:
+                    seen.add((name, idx))
+                    plan.append((name, idx))
+
+        # 1. assinaturas do serviço esperado na porta, na sonda que gerou o banner
+        #    e nas sondas que citam a porta; 2. o resto dessas sondas; 3. todo o resto
+        for name in first + hinted:
+            add(name, self.by_service.get((name, hint), ()))
+        for name in first + hinted:
+            add(name, range(len(self.probes[name]['matches'])))
+        for name in self.order:
+            add(name, range(len(self.probes[name]['matches'])))
+        return plan
+
+    def _regex(self, name: str, idx: int) -> re.Pattern:
+        # Cada regex só é compilada na primeira vez que é testada
+        regex = self._compiled.get((name, idx))
+        if regex is None:
+            with self._lock:
+                regex = self._compiled.get((name, idx))
+                if regex is None:
+                    match = self.probes[name]['matches'][idx]
+                    regex = self._compiled[(name, idx)] = re.compile(match['pattern'], match['flags'])
+        return regex
+
+    def identify(self, port: int, banner: Union[bytes, str], probe_name: str = 'NULL') -> Optional[Dict]:
+        """Identifica serviço e versão a partir do banner"""
+        if not banner:
+            return None
+        if isinstance(banner, bytes):
+            # latin-1 preserva os bytes 1:1 para as assinaturas binárias
+            banner = banner.decode('latin-1')
+
+        soft = None
+        for name, idx in self._plan(probe_name, port):
+            found = self._regex(name, idx).search(banner)
+            if not found:
+                continue
+            match = self.probes[name]['matches'][idx]
+            if match['soft']:
+                soft = soft or {'service': match['service'], 'soft': True}
+                continue
+            return self._build_result(match, found)
+        return soft
+
+    def _build_result(self, match: Dict, found) -> Dict:
+        def expand(value: str) -> str:
+            def group(m):
+                try:
+                    return found.group(int(m.group(1))) or ''
+                except IndexError:
+                    return ''
+            return re.sub(r'\$(\d)', group, value).strip(' ;')
+
+        result = {'service': match['service'], 'soft': False}
+        for key, field in FIELD_NAMES.items():
+            if key in match['fields']:
+                value = expand(match['fields'][key])
+                if value:
+                    result[field] = value
+        return result
+
+
+_database: Optional[ServiceDatabase] = None
+_database_lock = threading.Lock()
+
+
+def get_service_database() -> ServiceDatabase:
+    """Base compartilhada, carregada na primeira chamada"""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = ServiceDatabase.load()
+    return _database
+
+
+def identify_service(port: int, banner: Union[bytes, str], probe_name: str = 'NULL') -> Optional[Dict]:
+    return get_service_database().identify(port, banner, probe_name)
+
+
+def describe_service(port: int, banner: Union[bytes, str, None] = None, probe_name: str = 'NULL') -> str:
+    """Texto curto para exibição: produto/versão se identificado, senão o nome pela porta"""
+    info = identify_service(port, banner, probe_name) if banner else None
+    if not info or info['soft']:
+        return get_service_name(port)
+    text = info.get('product') or info['service']
+    if info.get('version'):
+        text += f" {info['version']}"
+    if info.get('info'):
+        text += f" ({info['info']})"
+    return text
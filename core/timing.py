@@ -0,0 +1,139 @@
+import contextlib
+import contextvars
+import math
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+from config.settings import RATE_LIMITS, TIMING_PROFILE, TIMING_PROFILES
+from core.ratelimit import RateLimiter, get_rate_limiter, scoped_rate_limiter
+
+# -T0..-T5, como no nmap
+ALIASES = {str(index): name for index, name in enumerate(TIMING_PROFILES)}
+# Módulos que leem o perfil; um ajuste "modulo.chave" só vale para eles
+MODULES = ('portas', 'descoberta', 'banner', 'rede', 'web', 'waf', 'ssl', 'diretorios', 'dns')
+KEYS = ('timeout', 'rtt', 'retries', 'concurrency', 'threads')
+
+
+def _parse_value(key: str, text: str):
+    if key == 'rtt':
+        values = tuple(float(part) for part in text.split(','))
+        if len(values) != 3 or not 0 < values[1] <= values[0] <= values[2]:
+            raise ValueError("rtt é 'inicial,mínimo,máximo', com mínimo <= inicial <= máximo")
+        return values
+    if key == 'timeout':
+        value = float(text)
+        if value <= 0:
+            raise ValueError("timeout deve ser positivo")
+        return value
+    value = int(text)
+    if key == 'concurrency' and value == 0:
+        return None
+    if value < (0 if key == 'retries' else 1):
+        raise ValueError(f"valor inválido para {key}: {text}")
+    return value
+
+
+class TimingProfile:
+    """Perfil de temporização com os ajustes do usuário por cima"""
+
+    def __init__(self, name: str = TIMING_PROFILE, overrides: Iterable[str] = ()):
+        name = ALIASES.get(str(name), str(name))
+        if name not in TIMING_PROFILES:
+            raise ValueError(f"perfil de temporização desconhecido: {name} "
+                             f"(use {', '.join(TIMING_PROFILES)} ou 0-{len(TIMING_PROFILES) - 1})")
+        self.name = name
+        self.values = TIMING_PROFILES[name]
+        self.rates: Dict[str, Tuple[float, float]] = dict(self.values['rates'])
+        self.overrides: Dict[Tuple[Optional[str], str], object] = {}
+        self.adjustments = list(overrides)
+        for override in self.adjustments:
+            self._apply(override)
+
+    def _apply(self, override: str) -> None:
+        """'[modulo.]chave=valor' ou 'rate.tipo=total[/por destino]'"""
+        target, sep, text = override.partition('=')
+        if not sep:
+            raise ValueError(f"ajuste sem '=': {override}")
+        module, _, key = target.strip().rpartition('.')
+        module = module or None
+        text = text.strip()
+        if module == 'rate':
+            # Um tipo com erro de digitação seria guardado e não limitaria nada
+            if key not in RATE_LIMITS:
+                raise ValueError(f"tipo de taxa desconhecido no ajuste {override} (use {', '.join(RATE_LIMITS)})")
+        else:
+            if module is not None and module not in MODULES:
+                raise ValueError(f"módulo desconhecido no ajuste {override} (use {', '.join(MODULES)})")
+            if key not in KEYS:
+                raise ValueError(f"chave desconhecida no ajuste {override} (use {', '.join(KEYS)} ou rate.TIPO)")
+        try:
+            if module == 'rate':
+                total, _, per_destination = text.partition('/')
+                rates = (float(total), float(per_destination or 0))
+                # 0 é "sem limite"; um valor negativo também desligaria o limite sem ninguém pedir
+                if not all(0 <= rate and math.isfinite(rate) for rate in rates):
+                    raise ValueError("a taxa deve ser um número >= 0 (0 = sem limite)")
+                self.rates[key] = rates
+            else:
+                self.overrides[(module, key)] = _parse_value(key, text)
+        except ValueError as e:
+            raise ValueError(f"valor inválido no ajuste {override}: {e}") from None
+
+    def get(self, key: str, module: Optional[str] = None):
+        """Ajuste do módulo > ajuste geral > valor do perfil para o módulo > valor geral do perfil"""
+        for source in ((module, key), (None, key)):
+            if source in self.overrides:
+                return self.overrides[source]
+        return self.values.get('modulos', {}).get(module, {}).get(key, self.values[key])
+
+    def describe(self) -> Dict:
+        return {'perfil': self.name, 'ajustes': self.adjustments}
+
+
+_default: Optional[TimingProfile] = None
+# Perfil de um job do daemon; segue para as tarefas do runtime como o limitador de taxa
+_current: contextvars.ContextVar = contextvars.ContextVar('timing', default=None)
+_limiters: Dict[tuple, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_timing() -> TimingProfile:
+    """Perfil em vigor: o do job em andamento ou o do processo"""
+    global _default
+    profile = _current.get()
+    if profile is not None:
+        return profile
+    if _default is None:
+        _default = TimingProfile()
+    return _default
+
+
+def set_timing(profile: TimingProfile) -> None:
+    """Perfil do processo inteiro (-T na linha de comando); aplica os limites de taxa dele"""
+    global _default
+    _default = profile
+    limiter = get_rate_limiter()
+    for kind, (global_rate, per_destination) in profile.rates.items():
+        limiter.configure(kind, global_rate, per_destination)
+
+
+@contextlib.contextmanager
+def use_timing(profile: TimingProfile):
+    """Perfil só dentro do bloco (um job do daemon).
+
+    Jobs com os mesmos limites de taxa dividem um limitador; com os limites do processo, usam o
+    do processo. Assim dois jobs "polite" no mesmo alvo não somam o dobro da taxa.
+    """
+    rates = tuple(sorted(profile.rates.items()))
+    token = _current.set(profile)
+    try:
+        if rates == tuple(sorted(get_rate_limiter().limits.items())):
+            yield profile
+            return
+        with _limiters_lock:
+            limiter = _limiters.get(rates)
+            if limiter is None:
+                limiter = _limiters[rates] = RateLimiter(profile.rates)
+        with scoped_rate_limiter(limiter):
+            yield profile
+    finally:
+        _current.reset(token)
@@ -0,0 +1,169 @@
+import atexit
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from config.settings import TRACE_MAX_EVENTS
+
+
+class Span:
+    """Trecho cronometrado; spans abertos na mesma thread ficam aninhados"""
+    __slots__ = ('tracer', 'name', 'attrs', 'id', 'parent', 'started')
+
+    def __init__(self, tracer: 'Tracer', name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs) -> None:
+        """Acrescenta atributos conhecidos só no fim (status, bytes, rcode...)"""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1].id if stack else None
+        self.id = next(self.tracer._ids)
+        stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ended = time.perf_counter()
+        if exc_type is not None:
+            self.attrs.setdefault('error', f"{exc_type.__name__}: {exc}")
+        self.tracer._stack().pop()
+        self.tracer._record(self, ended)
+
+
+class _NoopSpan:
+    """Devolvido quando o tracing está desligado: não mede nem guarda nada"""
+    __slots__ = ()
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Coleta spans do processo e exporta no formato Chrome trace-event (chrome://tracing, Perfetto)"""
+
+    def __init__(self, max_events: int = TRACE_MAX_EVENTS):
+        self.enabled = False
+        self.max_events = max_events
+        self.dropped = 0
+        self._events: List[Dict] = []
+        self._threads: Dict[int, str] = {}
+        self._local = threading.local()
+        # itertools.count é thread-safe no CPython
+        self._ids = itertools.count(1)
+        self._epoch = time.perf_counter()
+
+    def start(self) -> 'Tracer':
+        self._epoch = time.perf_counter()
+        self.enabled = True
+        return self
+
+    def stop(self) -> None:
+        self.enabled = False
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def _stack(self) -> List[Span]:
+        try:
+            return self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+            return stack
+
+    def _record(self, span: Span, ended: float) -> None:
+        if len(self._events) >= self.max_events:
+            self.dropped += 1
+            return
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        args = {key: value for key, value in span.attrs.items() if value is not None}
+        args['span_id'] = span.id
+        if span.parent is not None:
+            args['parent_id'] = span.parent
+        # list.append é atômico sob o GIL, sem lock no caminho quente
+        self._events.append({
+            'name': span.name,
+            'cat': span.name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': round((span.started - self._epoch) * 1e6, 1),
+            'dur': round((ended - span.started) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': tid,
+            'args': args,
+        })
+
+    def events(self) -> List[Dict]:
+        return list(self._events)
+
+    def to_chrome(self) -> Dict:
+        """Trace completo: spans como eventos 'X' e nomes das threads como metadados"""
+        pid = os.getpid()
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                    for tid, name in list(self._threads.items())]
+        return {
+            'traceEvents': metadata + self.events(),
+            'displayTimeUnit': 'ms',
+            'otherData': {'dropped_spans': self.dropped},
+        }
+
+    def export(self, path: str) -> None:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.to_chrome(), f, default=str)
+        os.replace(tmp, path)
+
+    def reset(self) -> None:
+        self._events = []
+        self._threads = {}
+        self.dropped = 0
+
+
+TRACER = Tracer()
+
+
+def span(name: str, **attrs):
+    """Abre um span no tracer global (no-op barato quando o tracing está desligado)"""
+    if not TRACER.enabled:
+        return NOOP_SPAN
+    return Span(TRACER, name, attrs)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decora um método de módulo: um span por chamada, com o primeiro argumento como 'target'"""
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not TRACER.enabled:
+                return func(self, *args, **kwargs)
+            with Span(TRACER, span_name, {'target': str(args[0]) if args else None}):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start_tracing(path: str) -> Tracer:
+    """Liga o tracing e grava o trace em path na saída do processo"""
+    atexit.register(TRACER.export, path)
+    return TRACER.start()
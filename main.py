@@ -1,26 +1,22 @@
 from utils.cli import (
-    mostrar_banner, mostrar_menu_principal, mostrar_menu_escaneamento,
+    mostrar_banner, mostrar_menu_principal,
     obter_entrada, mostrar_resultados, mostrar_erro, mostrar_sucesso,
-    mostrar_progresso, display_hosts
+    mostrar_progresso
 )
-from modules.web.tech_detector import DetectorTecnologias
-from modules.web.waf_detector import DetectorWAF
-from modules.web.ssl_analyzer import AnalisadorSSL
-from modules.web.dir_scanner import EscaneadorDiretorios
-from modules.dns.enumerator import EnumeradorDNS
-from modules.network.network_scanner import ScannerRede
-import socket
 import sys
-import urllib3
-from datetime import datetime
-from colorama import Fore, Style, init
-from urllib.parse import unquote, urlparse
-from tqdm import tqdm
 import os
 import subprocess
+import argparse
+from config.settings import (BATCH_CONCURRENCY, BATCH_TARGET_BUDGET, BATCH_MODULE_BUDGET, DAEMON_ADDRESS, DAEMON_TOKEN,
+                             TIMING_PROFILE, TIMING_PROFILES)
+from core.batch import ALL_MODULES, MODULES, BatchRunner, dns_pipeline, load_targets, parse_ports, web_pipeline, write_json
+from core.tracing import span, start_tracing
+from core.profiling import memory_boundary, start_profiling
+from core.timing import TimingProfile, set_timing
+
+# Os módulos de reconhecimento (requests, bs4, dnspython, whois, cryptography...) são
+# importados só quando a opção correspondente é usada, para o programa abrir rápido
 
-init()
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 def executar_portscan():
     """Executa o script main.py do módulo portscan"""
     try:
@@ -41,47 +37,132 @@ def executar_portscan():
         mostrar_erro(f"Erro inesperado: {str(e)}")
 
 
+# Título de cada etapa dos pipelines na tela; as etapas independentes rodam em paralelo e cada
+# resultado aparece assim que fica pronto
+TITULOS_WEB = {
+    'tecnologias': "Tecnologias Detectadas",
+    'waf': "WAF Detectado",
+    'certificado': "Informações do Certificado SSL/TLS",
+    'protocolos': "Protocolos SSL/TLS Suportados",
+    'hsts': "Configuração HSTS",
+}
+TITULOS_DNS = {
+    'whois': "Informações WHOIS",
+    'registros': "Registros DNS",
+    'subdominios': "Subdomínios Encontrados",
+    'transferencia_zona': "Resultados da Transferência de Zona",
+}
+
 def reconhecimento_web(alvo):
-    mostrar_progresso("Iniciando reconhecimento web...")
-    detector_tech = DetectorTecnologias()
-    resultados_tech = detector_tech.detectar_tecnologias(alvo)
-    mostrar_resultados("Tecnologias Detectadas", resultados_tech)
-    detector_waf = DetectorWAF()
-    resultados_waf = detector_waf.detectar_waf(alvo)
-    mostrar_resultados("WAF Detectado", resultados_waf)
-    analisador_ssl = AnalisadorSSL()
-    resultados_ssl = analisador_ssl.obter_info_certificado(alvo)
-    mostrar_resultados("Informações do Certificado SSL/TLS", resultados_ssl)
-    protocolos_ssl = analisador_ssl.verificar_protocolos_ssl(alvo)
-    mostrar_resultados("Protocolos SSL/TLS Suportados", protocolos_ssl)
-    resultados_hsts = analisador_ssl.verificar_hsts(alvo)
-    mostrar_resultados("Configuração HSTS", resultados_hsts)
+    with span('reconhecimento_web', target=alvo), memory_boundary(f"reconhecimento_web {alvo}"):
+        mostrar_progresso("Iniciando reconhecimento web...")
+        web_pipeline().run(alvo=alvo, on_result=lambda etapa, resultado: mostrar_resultados(TITULOS_WEB[etapa], resultado))
 
 def reconhecimento_dns(alvo):
-    mostrar_progresso("Iniciando enumeração DNS...")
-    enumerador_dns = EnumeradorDNS()
-    resultados_whois = enumerador_dns.obter_info_whois(alvo)
-    mostrar_resultados("Informações WHOIS", resultados_whois)
-    resultados_dns = enumerador_dns.obter_registros_dns(alvo)
-    mostrar_resultados("Registros DNS", resultados_dns)
-    resultados_subdominios = enumerador_dns.encontrar_subdominios(alvo)
-    mostrar_resultados("Subdomínios Encontrados", resultados_subdominios)
-    resultados_zona = enumerador_dns.realizar_transferencia_zona(alvo)
-    mostrar_resultados("Resultados da Transferência de Zona", resultados_zona)
+    with span('reconhecimento_dns', target=alvo), memory_boundary(f"reconhecimento_dns {alvo}"):
+        mostrar_progresso("Iniciando enumeração DNS...")
+        dns_pipeline().run(alvo=alvo, on_result=lambda etapa, resultado: mostrar_resultados(TITULOS_DNS[etapa], resultado))
 
 def escanear_diretorios(alvo):
-    mostrar_progresso("Iniciando escaneamento de diretórios...")
-    escaneador_dir = EscaneadorDiretorios()
-    resultados = escaneador_dir.escanear_diretorios(alvo)
-    if resultados:
-        mostrar_resultados("Diretórios e Arquivos Encontrados", {
-            'total': len(resultados),
-            'itens': resultados
-        })
-    else:
-        mostrar_erro("Nenhum diretório ou arquivo encontrado")
+    from modules.web.dir_scanner import EscaneadorDiretorios
+    with span('escanear_diretorios', target=alvo), memory_boundary(f"escanear_diretorios {alvo}"):
+        mostrar_progresso("Iniciando escaneamento de diretórios...")
+        escaneador_dir = EscaneadorDiretorios()
+        resultados = escaneador_dir.escanear_diretorios(alvo)
+        if resultados:
+            mostrar_resultados("Diretórios e Arquivos Encontrados", {
+                'total': len(resultados),
+                'itens': resultados
+            })
+        else:
+            mostrar_erro("Nenhum diretório ou arquivo encontrado")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='ReconBomb - sem argumentos abre o menu interativo')
+    parser.add_argument('--alvos', metavar='ARQUIVO', help='Arquivo com um alvo por linha ("-" para a entrada padrão); executa sem menu')
+    parser.add_argument('--modulos', default='todos', help=f'Módulos separados por vírgula ({", ".join(MODULES)}) ou "todos" ({", ".join(ALL_MODULES)})')
+    parser.add_argument('--portas', help='Portas do módulo portas (ex.: 22,80,8000-8100); padrão: portas comuns')
+    parser.add_argument('--paralelo', type=int, default=BATCH_CONCURRENCY, help='Execuções (alvo x módulo) simultâneas')
+    parser.add_argument('--orcamento', type=float, default=BATCH_TARGET_BUDGET, metavar='SEGUNDOS',
+                        help=f'Tempo máximo por alvo, com algum módulo rodando; a espera na fila não conta (0 = sem limite; padrão {BATCH_TARGET_BUDGET})')
+    parser.add_argument('--orcamento-modulo', type=float, default=BATCH_MODULE_BUDGET, metavar='SEGUNDOS',
+                        help=f'Tempo máximo de cada módulo em cada alvo (0 = sem limite; padrão {BATCH_MODULE_BUDGET})')
+    parser.add_argument('--urgentes', metavar='ALVO[,ALVO...]',
+                        help='Alvos que passam na frente dos outros na fila do modo em lote')
+    parser.add_argument('--saida', metavar='ARQUIVO', help='Grava os resultados em ARQUIVO em vez da saída padrão')
+    parser.add_argument('--formato', choices=['json', 'jsonl'], default='json',
+                        help='json: resumo único no fim; jsonl: uma linha por módulo concluído e o resumo na última')
+    parser.add_argument('--daemon', nargs='?', const=DAEMON_ADDRESS, metavar='ENDERECO',
+                        help=f'Fica residente recebendo jobs por uma API HTTP local (HOST:PORTA ou unix:/caminho.sock; padrão {DAEMON_ADDRESS})')
+    parser.add_argument('--daemon-token', metavar='TOKEN',
+                        help='Token exigido pela API do daemon por TCP (padrão: DAEMON_TOKEN ou um aleatório, mostrado na subida)')
+    parser.add_argument('--profile', nargs='?', const='reconbomb-profile', metavar='PREFIXO',
+                        help='Amostra as pilhas de todas as threads e mede alocações por módulo; grava PREFIXO.folded e PREFIXO.alloc.txt')
+    parser.add_argument('--trace', metavar='ARQUIVO', help='Grava spans (módulos, requisições HTTP, consultas DNS, handshakes TLS) em ARQUIVO no formato Chrome trace')
+    parser.add_argument('-T', '--timing', default=TIMING_PROFILE, metavar='PERFIL',
+                        help=f'Perfil de temporização: {", ".join(TIMING_PROFILES)} ou 0-{len(TIMING_PROFILES) - 1} (padrão {TIMING_PROFILE})')
+    parser.add_argument('--timing-set', action='append', default=[], metavar='[MODULO.]CHAVE=VALOR',
+                        help='Ajusta um valor do perfil (ex.: timeout=4, banner.threads=16, rtt=0.5,0.1,2, rate.request=50/10)')
+    args = parser.parse_args()
+
+    modulos = [m.strip() for m in args.modulos.split(',') if m.strip()]
+    if modulos == ['todos']:
+        modulos = list(ALL_MODULES)
+    invalidos = [m for m in modulos if m not in MODULES]
+    if invalidos:
+        parser.error(f"Módulos inválidos: {', '.join(invalidos)}")
+    args.modulos = modulos
+    args.urgentes = [alvo.strip() for alvo in (args.urgentes or '').split(',') if alvo.strip()]
+    if args.orcamento < 0 or args.orcamento_modulo < 0:
+        parser.error("Os orçamentos de tempo não podem ser negativos")
+    if args.portas:
+        try:
+            args.portas = parse_ports(args.portas)
+        except ValueError as e:
+            parser.error(str(e))
+    try:
+        args.timing = TimingProfile(args.timing, args.timing_set)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+def executar_lote(args):
+    """Modo em lote: roda os módulos para todos os alvos e imprime o resumo em JSON"""
+    alvos = load_targets(args.alvos)
+    saida = open(args.saida, 'w', encoding='utf-8') if args.saida else sys.stdout
+    try:
+        on_result = (lambda resultado: write_json(resultado, saida, indent=None)) if args.formato == 'jsonl' else None
+        opcoes = {'ports': args.portas} if args.portas else {}
+        resumo = BatchRunner(args.modulos, args.paralelo, on_result=on_result, target_budget=args.orcamento,
+                             module_budget=args.orcamento_modulo, urgent=args.urgentes, **opcoes).run(alvos)
+        if args.formato == 'jsonl':
+            write_json({k: v for k, v in resumo.items() if k != 'alvos'}, saida, indent=None)
+        else:
+            write_json(resumo, saida)
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+    return 1 if resumo['resumo']['erros'] else 0
 
 def main():
+    args = parse_args()
+    set_timing(args.timing)
+    if args.trace:
+        # Gravado na saída, inclusive depois de Ctrl+C; abra em chrome://tracing ou ui.perfetto.dev
+        start_tracing(args.trace)
+    if args.profile:
+        start_profiling(args.profile)
+    if args.daemon:
+        from core.daemon import serve
+        serve(args.daemon, args.daemon_token or DAEMON_TOKEN)
+        return
+    if args.alvos:
+        sys.exit(executar_lote(args))
+
+    from colorama import init
+    import urllib3
+    init()
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
     mostrar_banner()
     
     while True:
@@ -97,6 +178,7 @@ def main():
             alvo = obter_entrada("Digite o alvo (domínio)")
             reconhecimento_dns(alvo)
         elif escolha == "4":
+            from modules.web.ssl_analyzer import AnalisadorSSL
             alvo = obter_entrada("Digite o alvo (URL ou domínio)")
             analisador_ssl = AnalisadorSSL()
             resultados = analisador_ssl.obter_info_certificado(alvo)
@@ -107,6 +189,7 @@ def main():
             alvo = obter_entrada("Digite o alvo (URL)")
             escanear_diretorios(alvo)
         elif escolha == "6":
+            from modules.web.waf_detector import DetectorWAF
             alvo = obter_entrada("Digite o alvo (URL)")
             detector_waf = DetectorWAF()
             resultados = detector_waf.detectar_waf(alvo)
@@ -4,18 +4,32 @@ import dns.zone
 import dns.query
 import whois
 from typing import Dict, List, Optional, Union
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from core.runtime import get_runtime
+from core.timing import get_timing
 import re
 from datetime import datetime
 from urllib.parse import urlparse
 import requests
 import json
+from core.http import get_session
+from core.ratelimit import get_rate_limiter
+from core.metrics import DNS_QUERIES, STAGE_LATENCY
+from core.tracing import span, traced
+from core.deadline import check, clamp, expired
+
+# Cache de respostas (respeita o TTL) compartilhado pelos enumeradores do processo: no modo
+# daemon os jobs seguintes reaproveitam as consultas dos anteriores
+_cache = dns.resolver.Cache()
+
 
 class EnumeradorDNS:
     def __init__(self):
+        timing = get_timing()
+        self.threads = timing.get('threads', 'dns')
         self.resolver = dns.resolver.Resolver()
-        self.resolver.timeout = 5
-        self.resolver.lifetime = 10
+        self.resolver.timeout = timing.get('timeout', 'dns')
+        self.resolver.lifetime = 2 * self.resolver.timeout
+        self.resolver.cache = _cache
         
         # Servidores DNS públicos com fallback
         self.dns_servers = [
@@ -43,6 +57,7 @@ class EnumeradorDNS:
         dominio = parsed.netloc
         return '.'.join(dominio.split('.')[-2:]) if dominio else url
 
+    @traced()
     def obter_info_whois(self, dominio: str) -> Dict:
         """Consulta WHOIS com suporte especial para domínios .br"""
         dominio_limpo = self._extrair_dominio_para_whois(dominio)
@@ -52,8 +67,11 @@ class EnumeradorDNS:
             return self._consultar_whois_br(dominio_limpo)
             
         try:
-            # Consulta WHOIS padrão para outros domínios
-            info = whois.whois(dominio_limpo)
+            # Consulta WHOIS padrão para outros domínios (sem timeout ajustável: só não começa
+            # depois do prazo do alvo)
+            check()
+            with span('whois', target=dominio_limpo):
+                info = whois.whois(dominio_limpo)
             return self._parse_whois_data(info, dominio_limpo)
         except Exception as e:
             return {
@@ -66,7 +84,7 @@ class EnumeradorDNS:
         """Consulta especializada para domínios brasileiros usando a API do Registro.br"""
         try:
             url = f"https://rdap.registro.br/domain/{dominio}"
-            response = requests.get(url, timeout=10)
+            response = get_session().get(url, timeout=self.resolver.lifetime)
             data = response.json()
             
             return {
@@ -109,20 +127,52 @@ class EnumeradorDNS:
             return dominio
         return dominio
 
+    def _resolver(self, resolver: dns.resolver.Resolver, dominio: str, tipo: str):
+        """Executa a consulta registrando RCODE e latência nas métricas e no trace"""
+        lifetime = clamp(resolver.lifetime)
+        rcode = 'NOERROR'
+        with span('dns', qname=dominio, qtype=tipo, server=resolver.nameservers[0]) as atual:
+            try:
+                with STAGE_LATENCY.time('dns'):
+                    return resolver.resolve(dominio, tipo, lifetime=lifetime)
+            except dns.resolver.NXDOMAIN:
+                rcode = 'NXDOMAIN'
+                raise
+            except dns.resolver.NoAnswer:
+                raise
+            except dns.resolver.Timeout:
+                rcode = 'TIMEOUT'
+                raise
+            except dns.resolver.NoNameservers:
+                rcode = 'SERVFAIL'
+                raise
+            except Exception:
+                rcode = 'ERROR'
+                raise
+            finally:
+                DNS_QUERIES.inc(rcode)
+                atual.set(rcode=rcode)
+
     def _consultar_registro_dns(self, dominio: str, tipo: str) -> List[str]:
         """Consulta um tipo específico de registro DNS com fallback"""
+        limitador = get_rate_limiter()
         try:
-            respostas = self.resolver.resolve(dominio, tipo)
+            limitador.wait('query', self.resolver.nameservers[0])
+            respostas = self._resolver(self.resolver, dominio, tipo)
             return [str(r) for r in respostas]
         except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
             return []
         except dns.resolver.Timeout:
-            # Tentar com outro servidor DNS
+            # Tentar com outro servidor DNS, um de cada vez e só enquanto houver orçamento
             for server in self.dns_servers:
+                if expired():
+                    break
                 try:
                     temp_resolver = dns.resolver.Resolver()
                     temp_resolver.nameservers = [server]
-                    respostas = temp_resolver.resolve(dominio, tipo)
+                    temp_resolver.timeout = temp_resolver.lifetime = self.resolver.timeout
+                    limitador.wait('query', server)
+                    respostas = self._resolver(temp_resolver, dominio, tipo)
                     return [str(r) for r in respostas]
                 except:
                     continue
@@ -130,18 +180,19 @@ class EnumeradorDNS:
         except Exception:
             return []
 
+    @traced()
     def obter_registros_dns(self, dominio: str) -> Dict[str, List[str]]:
         """Obtém múltiplos registros DNS com paralelismo"""
         dominio = self._extrair_dominio(dominio)
         resultados = {}
         
-        with ThreadPoolExecutor(max_workers=4) as executor:
+        with get_runtime().group('dns', min(4, self.threads)) as grupo:
             futures = {
-                executor.submit(self._consultar_registro_dns, dominio, tipo): tipo
+                grupo.submit(self._consultar_registro_dns, dominio, tipo): tipo
                 for tipo in self.tipos_registros
             }
             
-            for future in as_completed(futures):
+            for future in grupo.as_completed(futures):
                 tipo = futures[future]
                 resultados[tipo] = future.result()
         
@@ -160,28 +211,31 @@ class EnumeradorDNS:
             return None
         return None
 
+    @traced()
     def encontrar_subdominios(self, dominio: str) -> List[str]:
         """Encontra subdomínios usando força bruta paralelizada"""
         dominio = self._extrair_dominio(dominio)
         subdominios = set()
         
-        with ThreadPoolExecutor(max_workers=8) as executor:
+        with get_runtime().group('subdominios', self.threads) as grupo:
             futures = [
-                executor.submit(self._testar_subdominio, dominio, sub)
+                grupo.submit(self._testar_subdominio, dominio, sub)
                 for sub in self.subdominios_comuns
             ]
             
-            for future in as_completed(futures):
+            for future in grupo.as_completed(futures):
                 result = future.result()
                 if result:
                     subdominios.add(result)
         
         # Tentar transferência de zona como fallback
         try:
-            respostas = self.resolver.resolve(dominio, 'NS')
+            respostas = self.resolver.resolve(dominio, 'NS', lifetime=clamp(self.resolver.lifetime))
             for resposta in respostas:
                 try:
-                    zona = dns.zone.from_xfr(dns.query.xfr(str(resposta), dominio))
+                    with span('axfr', server=str(resposta), zone=dominio):
+                        zona = dns.zone.from_xfr(dns.query.xfr(str(resposta), dominio, timeout=self.resolver.timeout,
+                                                               lifetime=clamp(self.resolver.lifetime)))
                     subdominios.update(f"{nome}.{dominio}" for nome in zona.nodes.keys())
                 except:
                     continue
@@ -190,21 +244,25 @@ class EnumeradorDNS:
         
         return sorted(subdominios)
 
-    def realizar_transferencia_zona(self, dominio: str) -> List[Dict[str, str]]:
-        """Tenta realizar transferência de zona DNS"""
+    @traced()
+    def realizar_transferencia_zona(self, dominio: str, ns_servers: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """Tenta realizar transferência de zona DNS (ns_servers: registros NS já consultados)"""
         dominio = self._extrair_dominio(dominio)
         resultados = []
         
         try:
             # Obter servidores de nomes
-            ns_servers = self._consultar_registro_dns(dominio, 'NS')
+            if ns_servers is None:
+                ns_servers = self._consultar_registro_dns(dominio, 'NS')
             if not ns_servers:
                 return []
             
             for server in ns_servers:
                 try:
                     # Tentar transferência de zona AXFR
-                    zona = dns.zone.from_xfr(dns.query.xfr(server, dominio))
+                    with span('axfr', server=server, zone=dominio):
+                        zona = dns.zone.from_xfr(dns.query.xfr(server, dominio, timeout=self.resolver.timeout,
+                                                               lifetime=clamp(self.resolver.lifetime)))
                     for nome, no in zona.nodes.items():
                         for tipo in self.tipos_registros:
                             try:
@@ -1,6 +1,18 @@
-from utils.cli import display_menu, analyze_host
-from scanner.network_utils import discover_hosts
+import atexit
+import os
+import sys
+
+# Permite importar os pacotes da raiz do projeto (config, core) ao rodar este arquivo direto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from utils.cli import parse_args, display_menu, analyze_host, scan_hosts, find_open_ports, serve_scan
+from utils.port_services import get_service_name
+from core.ratelimit import get_rate_limiter
+from core.timing import set_timing
+from core.metrics import MetricsReporter, serve_metrics
+from core.profiling import memory_boundary, start_profiling
 import socket
+import ipaddress
 
 def get_local_ip():
     try:
@@ -28,11 +40,45 @@ def resolve_target(target):
         return None
 
 def main():
+    args = parse_args()
+    # Antes do --max-rate, que tem a palavra final sobre a taxa de sondas
+    set_timing(args.timing)
+    if args.max_rate is not None:
+        get_rate_limiter().configure('probe', global_rate=args.max_rate)
+    if args.metrics_file:
+        # O snapshot final é gravado na saída, inclusive depois de Ctrl+C
+        atexit.register(MetricsReporter(args.metrics_file).start().stop)
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    if args.profile:
+        start_profiling(args.profile)
+    if args.worker:
+        # Worker do scan distribuído: recebe lotes do coordenador até ele avisar que acabou
+        from scanner.distributed import run_worker, parse_address
+        scanned = run_worker(parse_address(args.worker, 'localhost'), args.token)
+        print(f"Worker encerrado: {scanned} portas escaneadas")
+        return
+    if args.serve:
+        with memory_boundary("serve_scan"):
+            serve_scan(args.target, args.start, args.end, args.protocol, args.serve, args.token, args.resume,
+                       args.expected_workers)
+        return
+    if args.target:
+        # Modo direto: escaneia o alvo da linha de comando sem o menu
+        with memory_boundary(f"find_open_ports {args.target}"):
+            open_ports = find_open_ports(args.target, args.start, args.end, args.protocol,
+                                         scan_type=args.scan_type, resume=args.resume, workers=args.workers)
+        for protocol, ports in open_ports.items():
+            for port in ports:
+                print(f"{protocol.upper()} porta {port}: {get_service_name(port)}")
+        return
+
     while True:
         print("\nMenu Principal:")
         print("1. Escanear rede local")
         print("2. Escanear um host específico (IP ou URL)")
-        print("3. Sair do programa")
+        print("3. Escanear vários hosts (IPs, URLs ou redes CIDR)")
+        print("4. Sair do programa")
 
         try:
             option = int(input("\nSelecione uma opção: "))
@@ -45,6 +91,7 @@ def main():
                 network = f"{local_ip.rsplit('.', 1)[0]}.0/24"
                 print(f"Detectado IP local: {local_ip}")
                 print(f"Escaneando a rede {network} para encontrar hosts ativos...")
+                from scanner.network_utils import discover_hosts
                 active_hosts = discover_hosts(network)
                 if not active_hosts:
                     print("Nenhum host ativo encontrado na rede")
@@ -55,7 +102,8 @@ def main():
                     print("Saindo...")
                     break
 
-                analyze_host(selected_ip)
+                with memory_boundary(f"analyze_host {selected_ip}"):
+                    analyze_host(selected_ip, resume=args.resume, workers=args.workers, scan_type=args.scan_type)
 
             elif option == 2:
                 target = input("Digite o IP ou URL do host (ex.: https://ensino.hashi.pro.br/): ").strip()
@@ -65,9 +113,31 @@ def main():
                     continue
 
                 print(f"Endereço resolvido: {ip}")
-                analyze_host(ip)
+                with memory_boundary(f"analyze_host {ip}"):
+                    analyze_host(ip, resume=args.resume, workers=args.workers, scan_type=args.scan_type)
 
             elif option == 3:
+                targets = []
+                for target in input("Digite os alvos separados por vírgula (ex.: 192.168.0.0/24, 10.0.0.5): ").split(","):
+                    target = target.strip()
+                    if not target:
+                        continue
+                    try:
+                        ipaddress.ip_network(target, strict=False)
+                        targets.append(target)
+                    except ValueError:
+                        ip = resolve_target(target)
+                        if ip:
+                            targets.append(ip)
+                if not targets:
+                    print("Nenhum alvo válido informado")
+                    continue
+                start_port = int(input("Porta inicial: "))
+                end_port = int(input("Porta final: "))
+                with memory_boundary(f"scan_hosts {', '.join(targets)}"):
+                    scan_hosts(targets, start_port, end_port, resume=args.resume, workers=args.workers)
+
+            elif option == 4:
                 print("Saindo do programa...")
                 break
 
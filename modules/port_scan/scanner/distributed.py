@@ -0,0 +1,333 @@
+import collections
+import hmac
+import ipaddress
+import json
+import socket
+import struct
+import threading
+import time
+import zlib
+from array import array
+from tqdm import tqdm
+from utils.port_services import get_service_name
+from scanner.parallel_scan import split_shards
+from scanner.tcp_scan import tcp_scan
+from scanner.udp_scan import udp_scan
+from core.net import expand_targets
+from core.port_state import PortStateMap
+
+DEFAULT_PORT = 7878
+# Sem nenhuma mensagem do worker nesse tempo o lote volta para a fila
+LEASE_TIMEOUT = 30
+HEARTBEAT_INTERVAL = 5
+CONNECT_RETRIES = 10
+
+# Quadro: tipo (1 byte) + tamanho do conteudo (4 bytes)
+FRAME = struct.Struct('!BI')
+MAX_FRAME = 16 * 1024 * 1024
+HELLO, LEASE, DONE, OPEN, HEARTBEAT, RESULT, REJECT = range(1, 8)
+
+LEASE_HEADER = struct.Struct('!IBB')  # lote, protocolo, tamanho do host
+OPEN_PORT = struct.Struct('!IH')      # lote, porta
+PROGRESS = struct.Struct('!II')       # lote, portas concluidas
+UNIT_ID = struct.Struct('!I')
+PROTOCOLS = ('tcp', 'udp')
+
+
+def send_frame(sock, kind, payload=b''):
+    sock.sendall(FRAME.pack(kind, len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("conexao encerrada")
+        data += chunk
+    return bytes(data)
+
+
+def recv_frame(sock):
+    kind, size = FRAME.unpack(_recv_exact(sock, FRAME.size))
+    if size > MAX_FRAME:
+        raise ConnectionError(f"quadro grande demais ({size} bytes)")
+    return kind, _recv_exact(sock, size)
+
+
+def parse_address(address, default_host='127.0.0.1'):
+    host, _, port = str(address).rpartition(':')
+    return host or default_host, int(port or DEFAULT_PORT)
+
+
+def is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        # Nome de host ou '' (todas as interfaces)
+        return False
+
+
+class ScanCoordinator:
+    # Divide alvos x portas em lotes, empresta os lotes aos workers que se
+    # conectam e junta os resultados em um unico conjunto {host: PortStateMap}
+
+    # expected_workers dimensiona os lotes; sem ele os lotes sao os menores possiveis, para
+    # equilibrar quantos workers se conectarem
+
+    def __init__(self, targets, ports, protocol='tcp', address=('127.0.0.1', DEFAULT_PORT), token=None,
+                 results=None, on_open=None, expected_workers=None):
+        # Quem se conecta recebe alvos e devolve resultados: fora do loopback so com token
+        if not token and not is_loopback(address[0]):
+            raise ValueError(f"o coordenador so ouve em {address[0] or 'todas as interfaces'} com um token (--token)")
+        self.protocol = protocol
+        self.address = address
+        self.token = token or ''
+        self.on_open = on_open
+        hosts = expand_targets(targets)
+        ports = list(ports)
+        self.results = results if results is not None else {}
+        for host in hosts:
+            if host not in self.results:
+                self.results[host] = PortStateMap(host, protocol)
+
+        pending = {host: self.results[host].pending(ports) for host in hosts}
+        self.units = split_shards(hosts, pending, expected_workers)
+        # Lotes que faltam por host; o mapa do host e compactado quando o ultimo chega
+        self.left = collections.Counter(host for host, _ in self.units)
+        self.queue = collections.deque(range(len(self.units)))
+        self.completed = set()
+        # Lote -> portas ja concluidas segundo o ultimo heartbeat
+        self.in_progress = {}
+        self.workers = 0
+        self.cond = threading.Condition()
+        self.events = collections.deque()
+        self.server = None
+
+    def _next_unit(self):
+        with self.cond:
+            while True:
+                if self.queue:
+                    unit = self.queue.popleft()
+                    self.in_progress[unit] = 0
+                    return unit
+                if len(self.completed) == len(self.units):
+                    return None
+                self.cond.wait(1.0)
+
+    def _release(self, unit):
+        # Worker caiu ou sumiu: o lote volta para a frente da fila
+        with self.cond:
+            if unit not in self.completed and unit in self.in_progress:
+                del self.in_progress[unit]
+                self.queue.appendleft(unit)
+                self.cond.notify()
+
+    def _complete(self, unit, data):
+        host, ports = self.units[unit]
+        states = zlib.decompress(data)
+        if len(states) != len(ports):
+            raise ValueError("resultado com tamanho errado")
+        with self.cond:
+            if unit in self.completed:
+                # Resultado atrasado de um lote ja reatribuido e concluido
+                return
+            state_map = self.results[host]
+            for port, state in zip(ports, states):
+                if state:
+                    state_map.set(port, state)
+            self.left[host] -= 1
+            if not self.left[host]:
+                state_map.compact()
+            self.completed.add(unit)
+            self.in_progress.pop(unit, None)
+            self.cond.notify_all()
+
+    def _handle(self, conn, peer):
+        unit = None
+        registered = False
+        try:
+            conn.settimeout(LEASE_TIMEOUT)
+            kind, payload = recv_frame(conn)
+            hello = json.loads(payload) if kind == HELLO else {}
+            if kind != HELLO or not hmac.compare_digest(str(hello.get('token', '')), self.token):
+                send_frame(conn, REJECT, "token invalido".encode())
+                return
+            name = hello.get('name') or f"{peer[0]}:{peer[1]}"
+            with self.cond:
+                self.workers += 1
+            registered = True
+            self.events.append(f"Worker conectado: {name}")
+
+            while True:
+                unit = self._next_unit()
+                if unit is None:
+                    send_frame(conn, DONE)
+                    return
+                host, ports = self.units[unit]
+                header = LEASE_HEADER.pack(unit, PROTOCOLS.index(self.protocol), len(host.encode()))
+                send_frame(conn, LEASE, header + host.encode() + array('H', ports).tobytes())
+
+                while True:
+                    kind, payload = recv_frame(conn)
+                    if kind == OPEN:
+                        _, port = OPEN_PORT.unpack(payload)
+                        self.events.append((host, port))
+                    elif kind == HEARTBEAT:
+                        leased, done = PROGRESS.unpack(payload)
+                        with self.cond:
+                            if leased in self.in_progress:
+                                self.in_progress[leased] = done
+                    elif kind == RESULT:
+                        leased, = UNIT_ID.unpack_from(payload)
+                        self._complete(leased, payload[UNIT_ID.size:])
+                        if leased == unit:
+                            unit = None
+                            break
+                    else:
+                        raise ConnectionError(f"mensagem inesperada ({kind})")
+        except (OSError, ConnectionError, ValueError, struct.error, zlib.error) as e:
+            # Conexoes que nem se apresentaram (ex.: sondas de um scan) nao sao avisadas
+            if registered:
+                self.events.append(f"Worker {peer[0]}:{peer[1]} perdido: {e}")
+        finally:
+            if unit is not None:
+                self._release(unit)
+            if registered:
+                with self.cond:
+                    self.workers -= 1
+            conn.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, peer = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn, peer), daemon=True).start()
+
+    def _done_ports(self):
+        with self.cond:
+            done = sum(len(self.units[unit][1]) for unit in self.completed)
+            return done + sum(self.in_progress.values())
+
+    def serve(self):
+        if not self.units:
+            return self.results
+        self.server = socket.create_server(self.address)
+        threading.Thread(target=self._accept, daemon=True).start()
+        print(f"Coordenador ouvindo em {self.address[0]}:{self.address[1]} com {len(self.units)} lotes")
+
+        total = sum(len(ports) for _, ports in self.units)
+        try:
+            with tqdm(total=total, desc=f"Escaneando {self.protocol.upper()} (distribuído)") as progress:
+                while True:
+                    while self.events:
+                        event = self.events.popleft()
+                        if isinstance(event, tuple):
+                            host, port = event
+                            tqdm.write(f"{host} porta {port}: Open - {get_service_name(port)}")
+                            if self.on_open is not None:
+                                self.on_open(host, port)
+                        else:
+                            tqdm.write(event)
+                    progress.set_postfix(workers=self.workers, refresh=False)
+                    progress.update(self._done_ports() - progress.n)
+                    with self.cond:
+                        if len(self.completed) == len(self.units):
+                            break
+                        self.cond.wait(0.2)
+                # Da tempo aos handlers de avisar DONE aos workers ociosos
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            print("\nEscaneamento distribuído interrompido")
+        finally:
+            self.server.close()
+        return self.results
+
+
+class _Progress:
+    def __init__(self):
+        self.n = 0
+
+    def update(self, n=1):
+        self.n += n
+
+
+def run_worker(address, token=None, name=None, concurrency=None):
+    # Conecta ao coordenador, escaneia os lotes recebidos e devolve os resultados
+    for attempt in range(CONNECT_RETRIES):
+        try:
+            conn = socket.create_connection(address)
+            break
+        except OSError as e:
+            if attempt == CONNECT_RETRIES - 1:
+                print(f"Não foi possível conectar ao coordenador {address[0]}:{address[1]}: {e}")
+                return 0
+            time.sleep(1)
+
+    lock = threading.Lock()
+
+    def send(kind, payload=b''):
+        # O loop do scan (on_open) e o heartbeat enviam de threads diferentes
+        with lock:
+            send_frame(conn, kind, payload)
+
+    scanned = 0
+    try:
+        with conn:
+            scanned = _work(conn, send, token, name, concurrency)
+    except (OSError, ConnectionError, struct.error) as e:
+        print(f"Conexão com o coordenador perdida: {e}")
+    return scanned
+
+
+def _work(conn, send, token, name, concurrency):
+    scanned = 0
+    send(HELLO, json.dumps({'name': name or socket.gethostname(), 'token': token or ''}).encode())
+    while True:
+        kind, payload = recv_frame(conn)
+        if kind == DONE:
+            break
+        if kind == REJECT:
+            print(f"Coordenador recusou a conexão: {payload.decode(errors='replace')}")
+            break
+        if kind != LEASE:
+            raise ConnectionError(f"mensagem inesperada ({kind})")
+
+        unit, protocol, host_size = LEASE_HEADER.unpack_from(payload)
+        host = payload[LEASE_HEADER.size:LEASE_HEADER.size + host_size].decode()
+        ports = array('H')
+        ports.frombytes(payload[LEASE_HEADER.size + host_size:])
+        print(f"Lote {unit}: {host}, {len(ports)} portas {PROTOCOLS[protocol].upper()}")
+
+        progress = _Progress()
+        stop = threading.Event()
+
+        def heartbeat(unit=unit, progress=progress, stop=stop):
+            while not stop.wait(HEARTBEAT_INTERVAL):
+                try:
+                    send(HEARTBEAT, PROGRESS.pack(unit, progress.n))
+                except OSError:
+                    return
+
+        threading.Thread(target=heartbeat, daemon=True).start()
+        try:
+            on_open = lambda port, unit=unit: send(OPEN, OPEN_PORT.pack(unit, port))
+            if PROTOCOLS[protocol] == 'udp':
+                results = udp_scan(host, ports, on_open=on_open, progress=progress)
+            else:
+                results = tcp_scan(host, ports, concurrency, on_open=on_open, progress=progress)
+        finally:
+            stop.set()
+
+        if results.pending(ports):
+            # Scan interrompido: fecha sem resultado e o coordenador reatribui o lote
+            print("Lote incompleto, desconectando")
+            break
+        states = bytes(results.state(port) for port in ports)
+        send(RESULT, UNIT_ID.pack(unit) + zlib.compress(states))
+        scanned += len(ports)
+    return scanned
@@ -0,0 +1,149 @@
+import asyncio
+import collections
+import ipaddress
+import socket
+from tqdm import tqdm
+from utils.port_services import get_service_name
+from scanner.tcp_scan import probe_port
+from core.net import default_concurrency, expand_targets
+from core.rtt import get_estimator
+from core.runtime import get_runtime
+from core.timing import get_timing
+from core.deadline import bounded
+from core.port_state import PortStateMap, OPEN
+
+# Sondas simultaneas por host; o resto da concorrencia vai para os outros hosts
+PER_HOST_CONCURRENCY = 256
+
+
+class _HostState:
+    __slots__ = ('host', 'family', 'estimator', 'ports', 'total', 'in_flight', 'ready')
+
+    def __init__(self, host, ports, state_map):
+        self.host = host
+        self.family = socket.AF_INET6 if ipaddress.ip_address(host).version == 6 else socket.AF_INET
+        self.estimator = get_estimator(host)
+        # Num scan retomado o host tem so as portas que faltaram
+        if len(state_map):
+            ports = state_map.pending(ports)
+        self.total = len(ports)
+        self.ports = iter(ports)
+        self.in_flight = 0
+        self.ready = True
+
+
+async def _scan_hosts(hosts, ports, concurrency, per_host, timeout, retries, results):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    # Hosts entram na janela so quando ha vaga para eles: numa faixa grande o estado de
+    # cada host (iterador de portas, mapa) existe so enquanto ele esta sendo escaneado
+    waiting = iter(hosts)
+    window = max(1, concurrency)
+    active = [0]
+    # Fila circular de hosts que ainda tem portas e folga no limite por host
+    ready = collections.deque()
+    wake = asyncio.Event()
+    pending = set()
+
+    with tqdm(total=len(hosts) * len(ports), desc="Escaneando TCP (multi-host)") as progress:
+        def admit():
+            while active[0] < window:
+                host = next(waiting, None)
+                if host is None:
+                    return
+                state_map = results.get(host)
+                if state_map is None:
+                    state_map = results[host] = PortStateMap(host, 'tcp')
+                state = _HostState(host, ports, state_map)
+                # Portas ja concluidas no checkpoint contam como feitas
+                progress.update(len(ports) - state.total)
+                if state.total:
+                    active[0] += 1
+                    ready.append(state)
+
+        def finish(state):
+            # Host sem portas na fila nem sondas em voo: o mapa dele e compactado e a vaga
+            # vai para o proximo host
+            active[0] -= 1
+            results[state.host].compact()
+            admit()
+
+        def on_done(task, state, port):
+            pending.discard(task)
+            semaphore.release()
+            progress.update(1)
+            state.in_flight -= 1
+            if not state.ready and state.ports is not None:
+                state.ready = True
+                ready.append(state)
+            wake.set()
+            if task.cancelled():
+                return
+            status = task.result()
+            results[state.host].set(port, status)
+            if status == OPEN:
+                service = get_service_name(port)
+                tqdm.write(f"{state.host} porta {port}: Open - {service}")
+            if state.ports is None and not state.in_flight:
+                finish(state)
+
+        try:
+            admit()
+            while True:
+                if not ready:
+                    if not pending:
+                        break
+                    # Todos os hosts no limite: espera alguma sonda terminar
+                    wake.clear()
+                    await wake.wait()
+                    continue
+
+                await semaphore.acquire()
+                state = ready.popleft()
+                port = next(state.ports, None)
+                if port is None:
+                    state.ports = None
+                    state.ready = False
+                    semaphore.release()
+                    if not state.in_flight:
+                        finish(state)
+                    continue
+
+                retries_host = state.estimator.max_retries if retries is None else retries
+                task = loop.create_task(probe_port(loop, state.host, port, state.family, state.estimator, timeout, retries_host))
+                task.add_done_callback(lambda t, state=state, port=port: on_done(t, state, port))
+                pending.add(task)
+                state.in_flight += 1
+
+                # Round-robin: o host volta para o fim da fila, a nao ser que esteja no limite
+                if state.in_flight < per_host:
+                    ready.append(state)
+                else:
+                    state.ready = False
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+# timeout=None usa o timeout adaptativo do estimador de RTT de cada alvo.
+# results ({host: PortStateMap}) permite continuar um scan salvo em checkpoint
+def multi_tcp_scan(targets, ports, concurrency=None, per_host=PER_HOST_CONCURRENCY, timeout=None, retries=None,
+                   results=None):
+    hosts = expand_targets(targets)
+    ports = list(ports)
+    if results is None:
+        results = {}
+    if concurrency is None:
+        concurrency = get_timing().get('concurrency', 'portas') or default_concurrency()
+
+    try:
+        # No orcamento do lote o scan para no prazo; as portas ja respondidas ficam em results
+        get_runtime().run(bounded(_scan_hosts(hosts, ports, concurrency, per_host, timeout, retries, results)))
+    except KeyboardInterrupt:
+        print("\nEscaneamento multi-host interrompido")
+
+    # Hosts que nao chegaram a entrar na janela (prazo, Ctrl+C) ficam com o mapa vazio
+    for host in hosts:
+        if host not in results:
+            results[host] = PortStateMap(host, 'tcp')
+    return results
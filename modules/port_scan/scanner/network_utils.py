@@ -1,6 +1,5 @@
 import socket
-import nmap
-from concurrent.futures import ThreadPoolExecutor
+from core.discovery import iter_live_hosts
 
 def create_socket(ip_version, protocol):
     if ip_version == 6:
@@ -16,16 +15,12 @@ def create_socket(ip_version, protocol):
     return socket.socket(family, sock_type)
 
 def discover_hosts(network):
+    active_hosts = []
     try:
-        nm = nmap.PortScanner()
-        nm.scan(hosts=network, arguments='-sn')
-        
-        active_hosts = []
-        for host in nm.all_hosts():
-            if nm[host].state() == "up":
-                active_hosts.append(host)
-        
-        return active_hosts
+        # ICMP echo, TCP ping e ARP em paralelo; cada host aparece assim que responde
+        for host, method in iter_live_hosts([network]):
+            print(f"Host ativo: {host} ({method})")
+            active_hosts.append(host)
     except KeyboardInterrupt:
         print("\nEscaneamento de rede interrompido")
-        return []
\ No newline at end of file
+    return active_hosts
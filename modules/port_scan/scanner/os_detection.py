@@ -1,19 +1,130 @@
 import socket
-# A fazer : conseguir pegar banner de https (porta 443)
+import ssl
+import threading
+from core.ratelimit import get_rate_limiter
+from core.service_probes import describe_service
+from core.metrics import IN_FLIGHT, STAGE_LATENCY
+from core.runtime import get_runtime
+from core.timing import get_timing
+from core.deadline import clamp
 
-def grab_banner(ip, port):
+BANNER_BUFFER_SIZE = 4096
+
+TLS_PORTS = {443, 465, 636, 853, 989, 990, 992, 993, 994, 995, 5061, 8443}
+HTTP_PORTS = {80, 443, 8000, 8008, 8080, 8443, 8888}
+
+# Prazo de leitura por protocolo (s). Servicos que falam primeiro (FTP, SSH,
+# SMTP, POP3, IMAP, MySQL) mandam o banner logo apos o connect
+READ_DEADLINES = {
+    21: 3, 22: 3, 23: 3, 25: 5, 110: 3, 143: 3, 3306: 3, 5432: 3,
+    465: 5, 993: 3, 995: 3,
+}
+HTTP_READ_DEADLINE = 5
+DEFAULT_READ_DEADLINE = 2
+
+# Banner grabbing nao valida certificado, so quer falar com o servico; sem
+# create_default_context() o import nao paga a carga das CAs do sistema
+_tls_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+_tls_context.check_hostname = False
+_tls_context.verify_mode = ssl.CERT_NONE
+
+_buffers = threading.local()
+
+
+def _get_buffer():
+    # Um buffer por thread, reaproveitado entre as portas
+    buffer = getattr(_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _buffers.buffer = bytearray(BANNER_BUFFER_SIZE)
+    return buffer
+
+
+def _read_banner(ip, port, buffer, connect_timeout):
+    get_rate_limiter().wait('probe', ip)
+    IN_FLIGHT.inc('banner')
     try:
-        with socket.socket() as s:
-            s.settimeout(10)
-            s.connect((str(ip), port))
+        with STAGE_LATENCY.time('banner'):
+            return _exchange(ip, port, buffer, connect_timeout)
+    finally:
+        IN_FLIGHT.dec('banner')
+
+
+def _exchange(ip, port, buffer, connect_timeout):
+    # clamp encurta os prazos para caber no orcamento do alvo (modo em lote/daemon)
+    with socket.create_connection((str(ip), port), timeout=clamp(connect_timeout)) as raw:
+        sock = _tls_context.wrap_socket(raw) if port in TLS_PORTS else raw
+        try:
+            if port in HTTP_PORTS:
+                sock.settimeout(clamp(HTTP_READ_DEADLINE))
+                sock.sendall(b"GET / HTTP/1.1\r\nHost: " + str(ip).encode() + b"\r\nConnection: close\r\n\r\n")
+            else:
+                sock.settimeout(clamp(READ_DEADLINES.get(port, DEFAULT_READ_DEADLINE)))
+
+            size = sock.recv_into(buffer)
+            return bytes(buffer[:size])
+        finally:
+            if sock is not raw:
+                sock.close()
+
+
+def probe_name_for(port):
+    # Nome da sonda da base de servicos equivalente ao que foi enviado
+    return 'GetRequest' if port in HTTP_PORTS else 'NULL'
+
 
-            if port == 80 or port == 8080:  # Servidor HTTP , ficava dando timeout
-                s.sendall(b"GET / HTTP/1.1\r\nHost: " + str(ip).encode() + b"\r\n\r\n")
+def _decode(banner):
+    return banner.decode(errors='replace').strip() if banner is not None else None
 
-            banner = s.recv(1024).decode().strip()
-            return banner
+
+# connect_timeout e max_workers None usam o perfil de temporizacao
+def grab_banner(ip, port, connect_timeout=None):
+    try:
+        return _decode(_read_banner(ip, port, _get_buffer(), connect_timeout or get_timing().get('timeout', 'banner')))
     except socket.timeout:
         print(f"Erro ao capturar banner na porta {port}: Timeout")
     except Exception as e:
         print(f"Erro ao capturar banner na porta {port}: {e}")
-    return None
\ No newline at end of file
+    return None
+
+
+class BannerGrabber:
+    """Estágio de banner grabbing: recebe portas abertas enquanto o scan ainda roda"""
+
+    def __init__(self, ip, max_workers=None, connect_timeout=None):
+        timing = get_timing()
+        self.ip = str(ip)
+        self.connect_timeout = connect_timeout or timing.get('timeout', 'banner')
+        # Grupo no pool compartilhado: os banners rodam junto com o scan sem tomar todas as threads
+        self.group = get_runtime().group('banner', max_workers or timing.get('threads', 'banner'))
+        self.futures = {}
+
+    def _grab(self, port):
+        try:
+            return _read_banner(self.ip, port, _get_buffer(), self.connect_timeout)
+        except (OSError, ssl.SSLError, UnicodeError):
+            return None
+
+    def submit(self, port):
+        if port not in self.futures:
+            self.futures[port] = self.group.submit(self._grab, port)
+
+    def raw_results(self):
+        self.group.wait()
+        return {port: future.result() for port, future in sorted(self.futures.items())}
+
+    def results(self):
+        return {port: _decode(banner) for port, banner in self.raw_results().items()}
+
+    def services(self):
+        # Produto/versao pela base de assinaturas, testando primeiro as da porta
+        return {port: describe_service(port, banner, probe_name_for(port))
+                for port, banner in self.raw_results().items()}
+
+    def close(self):
+        self.group.cancel()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,159 @@
+import collections
+import multiprocessing
+import os
+import queue
+import signal
+import zlib
+from array import array
+from tqdm import tqdm
+from utils.port_services import get_service_name
+from scanner.tcp_scan import tcp_scan
+from scanner.udp_scan import udp_scan
+from core.net import default_concurrency, expand_targets
+from core.port_state import PortStateMap
+from core.ratelimit import get_rate_limiter
+from core.timing import get_timing
+from core.metrics import REGISTRY
+
+# Portas por fatia de trabalho; fatias pequenas equilibram a carga entre os
+# processos, grandes diminuem o custo fixo de cada chamada ao scan
+SHARD_SIZE = 4096
+MIN_SHARD_SIZE = 256
+# Intervalo de atualizacao da barra de progresso (s)
+POLL_INTERVAL = 0.1
+
+
+class _SharedProgress:
+    # Cada worker soma so no seu slot da memoria compartilhada, sem lock
+    def __init__(self, counters, index):
+        self.counters = counters
+        self.index = index
+
+    def update(self, n=1):
+        self.counters[self.index] += n
+
+
+def split_shards(hosts, pending, workers):
+    # Fatias de cada host, intercaladas entre hosts para espalhar a carga nos alvos.
+    # workers=None (quantidade desconhecida) usa as menores fatias, que equilibram qualquer numero
+    total = sum(len(ports) for ports in pending.values())
+    if workers is None:
+        size = MIN_SHARD_SIZE
+    else:
+        size = max(MIN_SHARD_SIZE, min(SHARD_SIZE, total // (workers * 4) or MIN_SHARD_SIZE))
+    per_host = [[(host, pending[host][i:i + size]) for i in range(0, len(pending[host]), size)] for host in hosts]
+    shards = []
+    for row in range(max((len(chunks) for chunks in per_host), default=0)):
+        for chunks in per_host:
+            if row < len(chunks):
+                shards.append(chunks[row])
+    return shards
+
+
+def _worker(index, workers, protocol, options, tasks, messages, counters):
+    # Ctrl+C e tratado so no processo principal, que encerra os workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # O limitador e por processo: cada worker fica com uma fracao do orcamento
+    limiter = get_rate_limiter()
+    for kind, (global_rate, per_destination) in list(limiter.limits.items()):
+        limiter.configure(kind, global_rate / workers, per_destination / workers)
+
+    progress = _SharedProgress(counters, index)
+    scan = udp_scan if protocol == 'udp' else tcp_scan
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        shard_id, host, packed = task
+        ports = array('H')
+        ports.frombytes(packed)
+        results = scan(host, ports, progress=progress,
+                       on_open=lambda port, host=host: messages.put(('open', host, port)), **options)
+        # Um byte de estado por porta, na ordem da fatia, compactado, junto com as
+        # metricas acumuladas na fatia para o processo principal somar
+        states = bytes(results.state(port) for port in ports)
+        messages.put(('done', shard_id, zlib.compress(states), REGISTRY.drain()))
+
+
+# Divide hosts e portas em fatias e escaneia em um pool de processos, cada um
+# com seu proprio loop. results ({host: PortStateMap}) permite retomar um scan
+def parallel_scan(targets, ports, protocol='tcp', workers=None, concurrency=None, timeout=None, retries=None,
+                  results=None, on_open=None):
+    hosts = expand_targets(targets)
+    ports = list(ports)
+    if results is None:
+        results = {}
+    for host in hosts:
+        if host not in results:
+            results[host] = PortStateMap(host, protocol)
+
+    pending = {host: results[host].pending(ports) for host in hosts}
+    workers = max(1, workers or os.cpu_count() or 1)
+    shards = split_shards(hosts, pending, workers)
+    if not shards:
+        return results
+    workers = min(workers, len(shards))
+
+    options = {'timeout': timeout, 'retries': retries}
+    if protocol != 'udp':
+        # Cada processo tem seu limite de descritores; divide para nao estourar as portas efemeras
+        concurrency = concurrency or get_timing().get('concurrency', 'portas') or default_concurrency()
+        options['concurrency'] = max(1, concurrency // workers)
+
+    context = multiprocessing.get_context()
+    tasks = context.Queue()
+    messages = context.Queue()
+    counters = context.Array('Q', workers, lock=False)
+    for shard_id, (host, shard_ports) in enumerate(shards):
+        tasks.put((shard_id, host, array('H', shard_ports).tobytes()))
+    for _ in range(workers):
+        tasks.put(None)
+
+    processes = [context.Process(target=_worker, args=(index, workers, protocol, options, tasks, messages, counters),
+                                 daemon=True)
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+
+    done = 0
+    total = sum(len(shard_ports) for _, shard_ports in shards)
+    # Fatias que faltam por host; o mapa do host e compactado quando a ultima chega
+    left = collections.Counter(host for host, _ in shards)
+    try:
+        with tqdm(total=total, desc=f"Escaneando {protocol.upper()} ({workers} processos)") as progress:
+            while done < len(shards):
+                try:
+                    message = messages.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in processes):
+                        print("\nOs processos de scan terminaram antes do fim")
+                        break
+                else:
+                    if message[0] == 'open':
+                        _, host, port = message
+                        tqdm.write(f"{host} porta {port}: Open - {get_service_name(port)}")
+                        if on_open is not None:
+                            on_open(host, port)
+                    else:
+                        _, shard_id, data, metrics = message
+                        REGISTRY.merge(metrics)
+                        host, shard_ports = shards[shard_id]
+                        state_map = results[host]
+                        for port, state in zip(shard_ports, zlib.decompress(data)):
+                            if state:
+                                state_map.set(port, state)
+                        left[host] -= 1
+                        if not left[host]:
+                            state_map.compact()
+                        done += 1
+                progress.update(sum(counters) - progress.n)
+    except KeyboardInterrupt:
+        print("\nEscaneamento paralelo interrompido")
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+
+    return results
@@ -0,0 +1,196 @@
+import errno
+import hashlib
+import os
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from tqdm import tqdm
+from utils.port_services import get_service_name
+from core.net import checksum, get_source_ip
+from core.ratelimit import get_rate_limiter
+from core.rtt import get_estimator
+from core.port_state import PortStateMap, OPEN, CLOSED, FILTERED
+from core.metrics import PROBES_SENT, PROBE_RETRIES, PROBE_REPLIES, PROBE_TIMEOUTS, STAGE_LATENCY
+
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
+
+# Quantas sondas da primeira rodada tem o horario de envio guardado para semear o RTT
+SEED_PROBES = 16
+
+# MSS 1460, igual ao que a maioria das pilhas TCP manda no SYN
+TCP_OPTIONS = struct.pack('!BBH', 2, 4, 1460)
+
+
+def syn_supported():
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP).close()
+        return True
+    except PermissionError:
+        return False
+
+
+class SynCookie:
+    # O numero de sequencia do SYN e um HMAC do alvo, entao a resposta
+    # pode ser validada sem guardar nada por sonda
+    def __init__(self, secret=None):
+        self.secret = secret or os.urandom(16)
+
+    def __call__(self, dst_ip, dst_port, src_port):
+        data = socket.inet_aton(dst_ip) + struct.pack('!HH', dst_port, src_port)
+        digest = hashlib.blake2s(data, key=self.secret, digest_size=4).digest()
+        return int.from_bytes(digest, 'big')
+
+
+def build_syn(src_ip, dst_ip, src_port, dst_port, seq):
+    offset = (5 + len(TCP_OPTIONS) // 4) << 4
+    header = struct.pack('!HHIIBBHHH', src_port, dst_port, seq, 0, offset, TCP_SYN, 1024, 0, 0) + TCP_OPTIONS
+    pseudo = socket.inet_aton(src_ip) + socket.inet_aton(dst_ip) + struct.pack('!BBH', 0, socket.IPPROTO_TCP, len(header))
+    csum = checksum(pseudo + header)
+    return header[:16] + struct.pack('!H', csum) + header[18:]
+
+
+def parse_reply(packet):
+    ihl = (packet[0] & 0x0f) * 4
+    if len(packet) < ihl + 14:
+        return None
+    src_ip = socket.inet_ntoa(packet[12:16])
+    src_port, dst_port, _, ack = struct.unpack('!HHII', packet[ihl:ihl + 12])
+    flags = packet[ihl + 13]
+    return src_ip, src_port, dst_port, ack, flags
+
+
+def _send(sock, packet, ip):
+    while True:
+        try:
+            sock.sendto(packet, (ip, 0))
+            return
+        except (BlockingIOError, socket.timeout):
+            time.sleep(0.001)
+        except OSError as e:
+            # A fila da interface encheu, espera esvaziar
+            if e.errno != errno.ENOBUFS:
+                raise
+            time.sleep(0.001)
+
+
+# timeout=None usa o timeout adaptativo do estimador de RTT do alvo.
+# on_open(port) e chamado assim que cada porta aberta e encontrada.
+# results permite continuar um PortStateMap existente (checkpoint)
+def syn_scan(ip, ports, timeout=None, retries=None, on_open=None, results=None):
+    ip = str(ip)
+    if results is None:
+        results = PortStateMap(ip, 'tcp')
+    ports = results.pending(ports)
+    already_done = len(results)
+    src_ip = get_source_ip(ip)
+    src_port = random.randint(40000, 60000)
+    cookie = SynCookie()
+    estimator = get_estimator(ip)
+    limiter = get_rate_limiter()
+    if retries is None:
+        retries = estimator.max_retries
+    wanted = set(ports)
+    seed_times = {}
+    sent_all = threading.Event()
+    stop = threading.Event()
+    sent = [0]
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    sock.settimeout(0.1)
+
+    def sender():
+        try:
+            pending = ports
+            for attempt in range(retries + 1):
+                if attempt == 0:
+                    pending = tqdm(pending, desc="Escaneando TCP (SYN)")
+                for port in pending:
+                    if stop.is_set():
+                        return
+                    packet = build_syn(src_ip, ip, src_port, port, cookie(ip, port, src_port))
+                    if attempt == 0 and sent[0] < SEED_PROBES:
+                        seed_times[port] = time.monotonic()
+                    elif attempt > 0:
+                        # Retransmissao torna a amostra ambigua (algoritmo de Karn)
+                        seed_times.pop(port, None)
+                    limiter.wait('probe', ip)
+                    _send(sock, packet, ip)
+                    PROBES_SENT.inc('syn')
+                    if attempt == 0:
+                        sent[0] += 1
+                    else:
+                        PROBE_RETRIES.inc('syn')
+
+                # Espera as respostas da rodada antes de retransmitir o que ficou sem resposta
+                deadline = time.monotonic() + (timeout or estimator.timeout(attempt))
+                while time.monotonic() < deadline and not stop.is_set() and len(results) - already_done < len(wanted):
+                    time.sleep(0.01)
+                pending = [port for port in ports if port not in results]
+                PROBE_TIMEOUTS.inc('syn', amount=len(pending))
+                if not pending:
+                    return
+        finally:
+            sent_all.set()
+
+    def receiver():
+        while not stop.is_set() and not sent_all.is_set():
+            try:
+                packet = sock.recv(65535)
+            except socket.timeout:
+                continue
+            reply = parse_reply(packet)
+            if reply is None:
+                continue
+            reply_ip, reply_port, dst_port, ack, flags = reply
+            # Ignora os nossos proprios SYN (no loopback eles tambem chegam aqui)
+            if reply_ip != ip or dst_port != src_port or reply_port not in wanted or not flags & TCP_ACK:
+                continue
+            if ack != (cookie(ip, reply_port, src_port) + 1) & 0xffffffff:
+                continue
+            if reply_port in results:
+                continue
+            started = seed_times.pop(reply_port, None)
+            if started is not None:
+                estimator.update(time.monotonic() - started)
+                STAGE_LATENCY.observe(time.monotonic() - started, 'syn')
+            if flags & TCP_SYN:
+                results.set(reply_port, OPEN)
+                PROBE_REPLIES.inc('syn', 'Open')
+                service = get_service_name(reply_port)
+                tqdm.write(f"Porta {reply_port}: Open - {service}")
+                if on_open is not None:
+                    on_open(reply_port)
+            elif flags & TCP_RST:
+                results.set(reply_port, CLOSED)
+                PROBE_REPLIES.inc('syn', 'Closed')
+
+    threads = [threading.Thread(target=receiver, daemon=True), threading.Thread(target=sender, daemon=True)]
+    try:
+        for t in threads:
+            t.start()
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(0.2)
+    except KeyboardInterrupt:
+        print("\nEscaneamento SYN interrompido")
+        stop.set()
+        for t in threads:
+            t.join()
+    finally:
+        sock.close()
+
+    # Sem resposta dentro do timeout: filtrada. Se foi interrompido, as portas
+    # sem resposta ficam pendentes para serem retomadas
+    if not stop.is_set():
+        for port in ports[:sent[0]]:
+            if port not in results:
+                results.set(port, FILTERED)
+    return results
@@ -1,30 +1,115 @@
+import asyncio
+import contextlib
+import errno
+import ipaddress
 import socket
-from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 from utils.port_services import get_service_name
+from core.rtt import get_estimator
+from core.net import default_concurrency, tcp_connect
+from core.runtime import get_runtime
+from core.timing import get_timing
+from core.ratelimit import get_rate_limiter
+from core.port_state import PortStateMap, OPEN, CLOSED, FILTERED
+from core.metrics import PROBES_SENT, PROBE_RETRIES, PROBE_REPLIES, PROBE_TIMEOUTS, IN_FLIGHT, STAGE_LATENCY
 
-def tcp_scan(ip, ports, max_threads=100):
-    results = {}
-    
-    def scan_port(port):
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(0.5)
-                result = s.connect_ex((str(ip), port))
-                if result == 0:
-                    results[port] = "Open"
+
+async def probe_port(loop, ip, port, family, estimator, timeout, retries):
+    limiter = get_rate_limiter()
+    # Limite de sockets do processo, dividido com os outros scans no mesmo loop
+    sockets = get_runtime().sockets
+    for attempt in range(retries + 1):
+        # Cada tentativa, inclusive retransmissao, conta no limite de sondas/s
+        await limiter.wait_async('probe', ip)
+        PROBES_SENT.inc('tcp')
+        if attempt:
+            PROBE_RETRIES.inc('tcp')
+        async with sockets:
+            started = loop.time()
+            IN_FLIGHT.inc('connect')
+            try:
+                err = await tcp_connect(loop, ip, port, family, timeout or estimator.timeout(attempt))
+            finally:
+                IN_FLIGHT.dec('connect')
+        if err is None:
+            # Sem resposta: retransmite com timeout maior
+            PROBE_TIMEOUTS.inc('tcp')
+            continue
+        elapsed = loop.time() - started
+        STAGE_LATENCY.observe(elapsed, 'connect')
+        if err == 0:
+            estimator.update(elapsed)
+            PROBE_REPLIES.inc('tcp', 'Open')
+            return OPEN
+        if err == errno.ECONNREFUSED:
+            estimator.update(elapsed)
+            PROBE_REPLIES.inc('tcp', 'Closed')
+            return CLOSED
+        PROBE_REPLIES.inc('tcp', 'Filtered')
+        return FILTERED
+    return FILTERED
+
+
+async def _scan(ip, ports, concurrency, timeout, retries, results, on_open, progress):
+    loop = asyncio.get_running_loop()
+    estimator = get_estimator(ip)
+    if retries is None:
+        retries = estimator.max_retries
+    family = socket.AF_INET6 if ipaddress.ip_address(ip).version == 6 else socket.AF_INET
+    semaphore = asyncio.Semaphore(concurrency)
+    ports = list(ports)
+    pending = set()
+
+    # Um progress externo (ex.: worker do scan paralelo) substitui a barra e as mensagens
+    show = progress is None
+    bar = tqdm(total=len(ports), desc="Escaneando TCP") if show else contextlib.nullcontext(progress)
+    with bar as progress:
+        def on_done(task, port):
+            pending.discard(task)
+            semaphore.release()
+            progress.update(1)
+            if task.cancelled():
+                return
+            status = task.result()
+            results.set(port, status)
+            if status == OPEN:
+                if show:
                     service = get_service_name(port)
                     # Usa tqdm.write para evitar conflito com a barra de progresso, print buga tudo
                     tqdm.write(f"Porta {port}: Open - {service}")
-                else:
-                    results[port] = "Closed"
-        except Exception:
-            results[port] = "Filtered"
+                if on_open is not None:
+                    on_open(port)
+
+        try:
+            # O semaforo limita quantos connects ficam em voo ao mesmo tempo
+            for port in ports:
+                await semaphore.acquire()
+                task = loop.create_task(probe_port(loop, ip, port, family, estimator, timeout, retries))
+                task.add_done_callback(lambda t, port=port: on_done(t, port))
+                pending.add(task)
+            if pending:
+                await asyncio.wait(set(pending))
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+# timeout=None usa o timeout adaptativo do estimador de RTT do alvo.
+# on_open(port) e chamado assim que cada porta aberta e encontrada.
+# results permite continuar um PortStateMap existente (checkpoint): so as portas
+# ainda nao escaneadas sao sondadas. progress (qualquer objeto com update(n))
+# substitui a barra do tqdm
+def tcp_scan(ip, ports, concurrency=None, timeout=None, retries=None, on_open=None, results=None, progress=None):
+    if results is None:
+        results = PortStateMap(ip, 'tcp')
+    ports = results.pending(ports)
+    if concurrency is None:
+        concurrency = get_timing().get('concurrency', 'portas') or default_concurrency()
 
     try:
-        with ThreadPoolExecutor(max_workers=max_threads) as executor:
-            list(tqdm(executor.map(scan_port, ports), total=len(ports), desc="Escaneando TCP"))
+        # Loop compartilhado do processo (seletor tambem no Windows, onde o proactor nao tem add_writer)
+        get_runtime().run(_scan(str(ip), ports, concurrency, timeout, retries, results, on_open, progress))
     except KeyboardInterrupt:
         print("\nEscaneamento TCP interrompido")
-    
-    return results
\ No newline at end of file
+
+    return results
@@ -0,0 +1,56 @@
+import struct
+
+# Sondas especificas por protocolo: a maioria dos servicos UDP ignora
+# um datagrama vazio, entao sem payload a porta nunca responde
+
+
+def _ber(tag, value):
+    return bytes([tag, len(value)]) + value
+
+
+def _dns_query():
+    # Consulta NS da raiz, com recursao desejada
+    header = struct.pack('!HHHHHH', 0x5242, 0x0100, 1, 0, 0, 0)
+    return header + b'\x00' + struct.pack('!HH', 2, 1)
+
+
+def _ntp_request():
+    # LI=0, versao 3, modo 3 (cliente)
+    return b'\x1b' + b'\x00' * 47
+
+
+def _snmp_get():
+    # SNMPv1 GetRequest de sysDescr.0 com community "public"
+    oid = _ber(0x06, bytes([0x2b, 6, 1, 2, 1, 1, 1, 0]))
+    varbind = _ber(0x30, oid + b'\x05\x00')
+    pdu = _ber(0xa0, _ber(0x02, b'\x00\x00\x52\x42') + _ber(0x02, b'\x00') + _ber(0x02, b'\x00') + _ber(0x30, varbind))
+    return _ber(0x30, _ber(0x02, b'\x00') + _ber(0x04, b'public') + pdu)
+
+
+def _ssdp_search():
+    return (b'M-SEARCH * HTTP/1.1\r\n'
+            b'HOST: 239.255.255.250:1900\r\n'
+            b'MAN: "ssdp:discover"\r\n'
+            b'MX: 1\r\n'
+            b'ST: ssdp:all\r\n\r\n')
+
+
+def _netbios_nbstat():
+    # NBSTAT do nome "*", codificado em first-level encoding
+    name = b'\x20' + b'CK' + b'A' * 30 + b'\x00'
+    header = struct.pack('!HHHHHH', 0x5242, 0x0000, 1, 0, 0, 0)
+    return header + name + struct.pack('!HH', 0x21, 1)
+
+
+UDP_PAYLOADS = {
+    53: _dns_query(),
+    123: _ntp_request(),
+    137: _netbios_nbstat(),
+    161: _snmp_get(),
+    1900: _ssdp_search(),
+    5353: _dns_query(),
+}
+
+
+def get_payload(port):
+    return UDP_PAYLOADS.get(port, b"")
@@ -1,27 +1,193 @@
+import asyncio
+import errno
+import ipaddress
 import socket
-from concurrent.futures import ThreadPoolExecutor
+import struct
+import sys
 from tqdm import tqdm
+from utils.port_services import get_service_name
+from scanner.udp_payloads import get_payload
+from core.ratelimit import get_rate_limiter
+from core.rtt import get_estimator
+from core.runtime import get_runtime
+from core.port_state import PortStateMap, OPEN, CLOSED, FILTERED, OPEN_FILTERED, STATE_NAMES
+from core.metrics import PROBES_SENT, PROBE_RETRIES, PROBE_REPLIES, PROBE_TIMEOUTS, STAGE_LATENCY
 
-def udp_scan(ip, ports, max_threads=100):
-    results = {}
-
-    def scan_port(port):
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-                s.settimeout(0.5)
-                s.sendto(b"", (str(ip), port))
-                try:
-                    data, _ = s.recvfrom(1024)
-                    results[port] = "Open" if data else "Closed"
-                except socket.timeout:
-                    results[port] = "Open" # Ver com professor se timeout pode considerar aberta
-        except Exception:
-            results[port] = "Filtered"
+# Poucos sockets compartilhados por todas as portas, em vez de um por porta
+UDP_SOCKETS = 4
+# Envios entre cada pausa para o loop ler respostas e erros ICMP
+SEND_BATCH = 256
+
+# Constantes de <linux/errqueue.h>; o modulo socket nao exporta IP_RECVERR
+IP_RECVERR = 11
+IPV6_RECVERR = 25
+SO_EE_ORIGIN_ICMP = 2
+SO_EE_ORIGIN_ICMP6 = 3
+# sock_extended_err: ee_errno, ee_origin, ee_type, ee_code, ee_pad, ee_info, ee_data
+SOCK_EXTENDED_ERR = struct.Struct('=IBBBBII')
+
+ICMP_UNREACH = 3
+ICMP_PORT_UNREACH = 3
+ICMP6_UNREACH = 1
+ICMP6_PORT_UNREACH = 4
+
+RECVERR_SUPPORTED = sys.platform.startswith('linux')
+
+
+def _open_sockets(family, count):
+    sockets = []
+    for _ in range(count):
+        sock = socket.socket(family, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
+        if RECVERR_SUPPORTED:
+            # Os erros ICMP vao para a fila de erros com o destino original,
+            # entao um socket nao conectado ainda sabe qual porta foi recusada
+            if family == socket.AF_INET6:
+                sock.setsockopt(socket.IPPROTO_IPV6, IPV6_RECVERR, 1)
+            else:
+                sock.setsockopt(socket.IPPROTO_IP, IP_RECVERR, 1)
+        sockets.append(sock)
+    return sockets
+
+
+def _classify_icmp(cmsg_data):
+    ee_errno, origin, icmp_type, icmp_code = SOCK_EXTENDED_ERR.unpack_from(cmsg_data)[:4]
+    if origin == SO_EE_ORIGIN_ICMP and icmp_type == ICMP_UNREACH:
+        return CLOSED if icmp_code == ICMP_PORT_UNREACH else FILTERED
+    if origin == SO_EE_ORIGIN_ICMP6 and icmp_type == ICMP6_UNREACH:
+        return CLOSED if icmp_code == ICMP6_PORT_UNREACH else FILTERED
+    if ee_errno == errno.ECONNREFUSED:
+        return CLOSED
+    return None
+
+
+async def _scan(ip, ports, sockets_count, timeout, retries, results, on_open, progress):
+    loop = asyncio.get_running_loop()
+    family = socket.AF_INET6 if ipaddress.ip_address(ip).version == 6 else socket.AF_INET
+    estimator = get_estimator(ip)
+    limiter = get_rate_limiter()
+    if retries is None:
+        retries = estimator.max_retries
+    ports = list(ports)
+    wanted = set(ports)
+    # Horario de envio da primeira tentativa, para amostras de RTT
+    sent_at = {}
+    answered = [0]
+    all_answered = asyncio.Event()
+    sockets = _open_sockets(family, sockets_count)
+
+    def record(port, state):
+        if port not in wanted or port in results:
+            return
+        results.set(port, state)
+        PROBE_REPLIES.inc('udp', STATE_NAMES[state])
+        started = sent_at.pop(port, None)
+        if started is not None:
+            estimator.update(loop.time() - started)
+            STAGE_LATENCY.observe(loop.time() - started, 'udp')
+        answered[0] += 1
+        if answered[0] == len(wanted):
+            all_answered.set()
+        if state == OPEN:
+            if progress is None:
+                tqdm.write(f"Porta {port}: Open - {get_service_name(port)}")
+            if on_open is not None:
+                on_open(port)
+
+    def on_readable(sock):
+        while True:
+            try:
+                _, address = sock.recvfrom(65535)
+            except BlockingIOError:
+                break
+            except OSError:
+                # Erro pendente (sk_err); o detalhe fica na fila de erros
+                continue
+            if ipaddress.ip_address(address[0].split('%')[0]) == target:
+                record(address[1], OPEN)
+
+        if not RECVERR_SUPPORTED:
+            return
+        while True:
+            try:
+                _, ancdata, _, address = sock.recvmsg(512, 512, socket.MSG_ERRQUEUE)
+            except (BlockingIOError, InterruptedError):
+                break
+            for _, _, cmsg_data in ancdata:
+                state = _classify_icmp(cmsg_data)
+                if state is not None and address:
+                    record(address[1], state)
+
+    target = ipaddress.ip_address(ip)
+    for sock in sockets:
+        loop.add_reader(sock.fileno(), on_readable, sock)
+
+    try:
+        pending = ports
+        for attempt in range(retries + 1):
+            iterator = tqdm(pending, desc="Escaneando UDP") if attempt == 0 and progress is None else pending
+            for index, port in enumerate(iterator):
+                if attempt == 0 and progress is not None:
+                    progress.update(1)
+                if port in results:
+                    continue
+                sock = sockets[port % len(sockets)]
+                await limiter.wait_async('probe', ip)
+                PROBES_SENT.inc('udp')
+                if attempt == 0:
+                    sent_at[port] = loop.time()
+                else:
+                    # Retransmissao torna a amostra ambigua (algoritmo de Karn)
+                    sent_at.pop(port, None)
+                    PROBE_RETRIES.inc('udp')
+                while True:
+                    try:
+                        sock.sendto(get_payload(port), (ip, port))
+                        break
+                    except (BlockingIOError, InterruptedError):
+                        await asyncio.sleep(0.001)
+                    except OSError as e:
+                        if e.errno == errno.ENOBUFS:
+                            await asyncio.sleep(0.001)
+                        elif e.errno == errno.ECONNREFUSED:
+                            # Erro ICMP de um envio anterior reportado aqui; reenvia
+                            on_readable(sock)
+                        else:
+                            raise
+                if index % SEND_BATCH == SEND_BATCH - 1:
+                    await asyncio.sleep(0)
+
+            try:
+                await asyncio.wait_for(all_answered.wait(), timeout or estimator.timeout(attempt))
+            except asyncio.TimeoutError:
+                pass
+            pending = [port for port in ports if port not in results]
+            PROBE_TIMEOUTS.inc('udp', amount=len(pending))
+            if not pending:
+                break
+
+        # Sem resposta nem ICMP apos as retransmissoes
+        for port in pending:
+            results.set(port, OPEN_FILTERED)
+    finally:
+        for sock in sockets:
+            loop.remove_reader(sock.fileno())
+            sock.close()
+
+
+# timeout=None usa o timeout adaptativo do estimador de RTT do alvo.
+# results permite continuar um PortStateMap existente (checkpoint).
+# on_open(port) e progress (objeto com update(n)) funcionam como no tcp_scan
+def udp_scan(ip, ports, sockets=UDP_SOCKETS, timeout=None, retries=None, results=None, on_open=None, progress=None):
+    if results is None:
+        results = PortStateMap(ip, 'udp')
+    ports = results.pending(ports)
 
     try:
-        with ThreadPoolExecutor(max_workers=max_threads) as executor:
-            list(tqdm(executor.map(scan_port, ports), total=len(ports), desc="Escaneando UDP"))
+        # Loop compartilhado do processo (seletor tambem no Windows, onde o proactor nao tem add_reader)
+        get_runtime().run(_scan(str(ip), ports, sockets, timeout, retries, results, on_open, progress))
     except KeyboardInterrupt:
-        print("\nEscaneamento UDP interrompid")
-    
-    return results
\ No newline at end of file
+        print("\nEscaneamento UDP interrompido")
+
+    return results
@@ -1,20 +1,49 @@
 import argparse
 from ipaddress import ip_address
-from scanner.tcp_scan import tcp_scan
-from scanner.udp_scan import udp_scan
-from scanner.os_detection import grab_banner
 from utils.port_services import get_service_name
+from core.port_state import PortStateMap, OPEN, OPEN_FILTERED
+from config.settings import TIMING_PROFILE, TIMING_PROFILES
+from core.timing import TimingProfile
 import ipaddress
 
+# Os scanners (asyncio, multiprocessing, ssl, tqdm...) sao importados dentro das
+# funcoes que os usam, para o --help e os modos diretos abrirem rapido
+
 def parse_args():
     parser = argparse.ArgumentParser(description='Port Scanner')
     parser.add_argument('target', nargs='?', help='IP address or network (optional if running interactively)')
     parser.add_argument('--start', type=int, default=1, help='Start port')
     parser.add_argument('--end', type=int, default=1024, help='End port')
     parser.add_argument('--protocol', choices=['tcp', 'udp'], default='tcp', help='Protocol to use for scanning')
+    parser.add_argument('--scan-type', choices=['connect', 'syn'], default='connect', help='TCP technique: full connect or half-open SYN (Linux, needs CAP_NET_RAW)')
+    parser.add_argument('--max-rate', type=float, help='Maximum probes per second across the whole process (0 = unlimited)')
+    parser.add_argument('--workers', type=int, default=1, help='Scan processes for connect/UDP scans (0 = one per CPU core)')
+    parser.add_argument('--resume', action='store_true', help='Resume an interrupted scan from its checkpoint journal')
+    parser.add_argument('--serve', metavar='[HOST:]PORT', help='Coordinate a distributed scan: lease the targets (IPs/CIDRs, comma separated) to workers')
+    parser.add_argument('--worker', metavar='HOST[:PORT]', help='Run as a worker of the coordinator at HOST:PORT')
+    parser.add_argument('--token', help='Shared secret between coordinator and workers (required to serve beyond loopback)')
+    parser.add_argument('--expected-workers', type=int, metavar='N', help='With --serve: workers expected to connect, used to size the leased batches (default: smallest batches)')
+    parser.add_argument('--metrics-file', metavar='PATH', help='Write periodic metric snapshots (JSON, or Prometheus text if PATH ends in .prom)')
+    parser.add_argument('--profile', nargs='?', const='portscan-profile', metavar='PREFIX', help='Sample every thread stack and account allocations; writes PREFIX.folded and PREFIX.alloc.txt')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT', help='Serve /metrics (Prometheus) and /metrics.json on 127.0.0.1:PORT')
+    parser.add_argument('-T', '--timing', default=TIMING_PROFILE, metavar='PROFILE',
+                        help=f'Timing profile: {", ".join(TIMING_PROFILES)} or 0-{len(TIMING_PROFILES) - 1} (default {TIMING_PROFILE})')
+    parser.add_argument('--timing-set', action='append', default=[], metavar='[MODULE.]KEY=VALUE',
+                        help='Override one profile value (e.g. portas.concurrency=200, rtt=0.5,0.1,2, rate.probe=1000/100)')
     args = parser.parse_args()
+    try:
+        args.timing = TimingProfile(args.timing, args.timing_set)
+    except ValueError as e:
+        parser.error(str(e))
     
-    if args.target:
+    if args.serve:
+        if not args.target:
+            parser.error("--serve needs the targets")
+        args.target = [target.strip() for target in args.target.split(',') if target.strip()]
+        from scanner.distributed import parse_address, is_loopback
+        if not args.token and not is_loopback(parse_address(args.serve)[0]):
+            parser.error("--serve on a non-loopback address needs --token")
+    elif args.target:
         try:
             args.target = ip_address(args.target)
         except ValueError:
@@ -40,28 +69,130 @@ def display_menu(hosts):
             print("Entrada inválida. Digite um número")
 
 
-def find_open_ports(ip, start_port=1, end_port=65535, protocol="tcp", max_threads=100):
+def _open_journal(meta, resume):
+    from core.checkpoint import ScanJournal
+    journal = ScanJournal(meta)
+    saved = journal.load() if resume else {}
+    if saved:
+        done = sum(len(state_map) for state_map in saved.values())
+        print(f"Retomando escaneamento salvo: {done} portas já concluídas")
+    elif resume:
+        print("Nenhum checkpoint encontrado para este escaneamento, começando do zero")
+    return journal, saved
+
+
+def find_open_ports(ip, start_port=1, end_port=65535, protocol="tcp", concurrency=None, scan_type="connect", resume=False,
+                    workers=1):
     open_ports = {"tcp": [], "udp": []}
     ports = range(start_port, end_port + 1)
 
+    if scan_type == "syn":
+        from scanner.syn_scan import syn_scan, syn_supported
+    if scan_type == "syn" and not syn_supported():
+        print("SYN scan requer Linux e CAP_NET_RAW (root), usando connect scan")
+        scan_type = "connect"
+    elif scan_type == "syn" and ipaddress.ip_address(str(ip)).version != 4:
+        print("SYN scan so suporta IPv4, usando connect scan")
+        scan_type = "connect"
+
+    # O diario guarda o estado das portas a cada poucos segundos; --resume pula o que ja foi feito
+    protocols = ["tcp", "udp"] if protocol == "both" else [protocol]
+    journal, saved = _open_journal({"target": str(ip), "protocols": protocols, "ports": [start_port, end_port]}, resume)
+    maps = {proto: journal.track(saved.get((str(ip), proto)) or PortStateMap(ip, proto)) for proto in protocols}
+    journal.start()
+
     try:
-        if protocol in ["tcp", "both"]:
+        if "tcp" in maps:
             print(f"Escaneando portas TCP de {start_port} a {end_port}...")
-            tcp_results = tcp_scan(ip, ports, max_threads)
-            open_ports["tcp"] = [port for port, status in tcp_results.items() if status == "Open"]
+            if scan_type == "syn":
+                syn_scan(ip, ports, results=maps["tcp"])
+            elif workers != 1:
+                # workers=0 usa um processo por núcleo
+                from scanner.parallel_scan import parallel_scan
+                parallel_scan([ip], ports, "tcp", workers or None, concurrency, results={str(ip): maps["tcp"]})
+            else:
+                from scanner.tcp_scan import tcp_scan
+                tcp_scan(ip, ports, concurrency, results=maps["tcp"])
+            open_ports["tcp"] = list(maps["tcp"].open_ports())
 
-        if protocol in ["udp", "both"]:
+        if "udp" in maps:
             print(f"Escaneando portas UDP de {start_port} a {end_port}...")
-            udp_results = udp_scan(ip, ports, max_threads)
-            open_ports["udp"] = [port for port, status in udp_results.items() if status == "Open"]
+            if workers != 1:
+                from scanner.parallel_scan import parallel_scan
+                parallel_scan([ip], ports, "udp", workers or None, results={str(ip): maps["udp"]})
+            else:
+                from scanner.udp_scan import udp_scan
+                udp_scan(ip, ports, results=maps["udp"])
+            open_ports["udp"] = list(maps["udp"].open_ports())
 
     except KeyboardInterrupt:
         print("\n\nEscaneamento interrompido")
+    finally:
+        journal.finish(all(not state_map.pending(ports) for state_map in maps.values()))
     
     print("\nEscaneamento concluído")
     return open_ports
 
-def analyze_host(ip):
+def scan_hosts(targets, start_port=1, end_port=1024, concurrency=None, resume=False, workers=1):
+    from core.net import expand_targets
+    ports = range(start_port, end_port + 1)
+    journal, saved = _open_journal({"targets": list(targets), "protocols": ["tcp"], "ports": [start_port, end_port]}, resume)
+    hosts = expand_targets(targets)
+    results = {host: journal.track(saved.get((host, "tcp")) or PortStateMap(host, "tcp")) for host in hosts}
+    journal.start()
+
+    print(f"Escaneando portas TCP de {start_port} a {end_port} em {', '.join(targets)}...")
+    try:
+        if workers != 1:
+            from scanner.parallel_scan import parallel_scan
+            parallel_scan(hosts, ports, "tcp", workers or None, concurrency, results=results)
+        else:
+            from scanner.multi_scan import multi_tcp_scan
+            multi_tcp_scan(hosts, ports, concurrency, results=results)
+    finally:
+        journal.finish(all(not state_map.pending(ports) for state_map in results.values()))
+
+    print("\nEscaneamento concluído")
+    _print_hosts_summary(results, "tcp")
+    return results
+
+def serve_scan(targets, start_port=1, end_port=1024, protocol="tcp", address=None, token=None, resume=False,
+               expected_workers=None):
+    # Coordenador do scan distribuído: os workers (main.py --worker) fazem as sondas
+    from scanner.distributed import ScanCoordinator, parse_address
+    from core.net import expand_targets
+    ports = range(start_port, end_port + 1)
+    journal, saved = _open_journal({"targets": list(targets), "protocols": [protocol], "ports": [start_port, end_port]}, resume)
+    hosts = expand_targets(targets)
+    results = {host: journal.track(saved.get((host, protocol)) or PortStateMap(host, protocol)) for host in hosts}
+    journal.start()
+
+    try:
+        coordinator = ScanCoordinator(hosts, ports, protocol, parse_address(address), token, results=results,
+                                      expected_workers=expected_workers)
+        coordinator.serve()
+    finally:
+        journal.finish(all(not state_map.pending(ports) for state_map in results.values()))
+
+    print("\nEscaneamento concluído")
+    _print_hosts_summary(results, protocol)
+    return results
+
+def _print_hosts_summary(results, protocol):
+    for host, state_map in results.items():
+        open_ports = list(state_map.open_ports())
+        if not open_ports:
+            continue
+        print(f"\n{host}:")
+        for port in open_ports:
+            print(f"  Porta {port}: {get_service_name(port)}")
+    hosts_with_ports = sum(1 for state_map in results.values() if state_map.count(OPEN))
+    print(f"\n{hosts_with_ports} de {len(results)} hosts com portas {protocol.upper()} abertas")
+
+def analyze_host(ip, resume=False, workers=1, scan_type="connect"):
+    from scanner.tcp_scan import tcp_scan
+    from scanner.udp_scan import udp_scan
+    from scanner.os_detection import grab_banner, BannerGrabber
     try:
         ip = ipaddress.ip_address(ip)
     except ValueError:
@@ -85,20 +216,19 @@ def analyze_host(ip):
                 print(f"\nEscaneando {ip} de {start_port} a {end_port} usando TCP...")
                 ports = range(start_port, end_port + 1)
                 try:
-                    results = tcp_scan(ip, ports)
-                    fechadas = 0
-                    total = 0
-                    for port, status in results.items():
-                        if status == "Open":
-                            service = get_service_name(port)
-                            banner = grab_banner(ip, port)
-                            print(f"Porta {port}: {status} - {service}")
-                            if banner:
-                                print(f"  Banner: {banner}")
-
-                        else:
-                            fechadas +=1
-                        total +=1
+                    # Os banners sao capturados em paralelo enquanto o scan continua
+                    with BannerGrabber(ip) as grabber:
+                        results = tcp_scan(ip, ports, on_open=grabber.submit)
+                        banners = grabber.results()
+                        services = grabber.services()
+                    for port in results.open_ports():
+                        service = services.get(port) or get_service_name(port)
+                        banner = banners.get(port)
+                        print(f"Porta {port}: Open - {service}")
+                        if banner:
+                            print(f"  Banner: {banner}")
+                    total = len(results)
+                    fechadas = total - results.count(OPEN)
                     print(f"Das {total} portas TCP, {fechadas} estão fechadas ou filtered e {total - fechadas} abertas")
                 except KeyboardInterrupt:
                     print("\nEscaneamento TCP interrompido")
@@ -111,16 +241,13 @@ def analyze_host(ip):
                 ports = range(start_port, end_port + 1)
                 try:
                     results = udp_scan(ip, ports)
-                    fechadas = 0
-                    total = 0
-                    for port, status in results.items():
-                        if status == "Open":
-                            service = get_service_name(port)
-                            print(f"Porta {port}: {status} - {service}")
-                        else:
-                            fechadas += 1
-                        total +=1
-                    print(f"Das {total} portas UDP, {fechadas} estão fechadas ou filtered e {total - fechadas} abertas")
+                    for port in results.open_ports():
+                        service = get_service_name(port)
+                        print(f"Porta {port}: Open - {service}")
+                    total = len(results)
+                    sem_resposta = results.count(OPEN_FILTERED)
+                    fechadas = total - results.count(OPEN) - sem_resposta
+                    print(f"Das {total} portas UDP, {fechadas} estão fechadas ou filtered, {sem_resposta} sem resposta (open|filtered) e {results.count(OPEN)} abertas")
                 except KeyboardInterrupt:
                     print("\nEscaneamento UDP interrompido")
                     continue
@@ -146,7 +273,7 @@ def analyze_host(ip):
                     suboption = int(input("Selecione uma subopção: "))
                     if suboption == 1:
                         print(f"\nProcurando portas abertas no host {ip}...")
-                        open_ports = find_open_ports(ip, start_port=1, end_port=65535)
+                        open_ports = find_open_ports(ip, start_port=1, end_port=65535, resume=resume, workers=workers, scan_type=scan_type)
                         if open_ports["tcp"] or open_ports["udp"]:
                             print("Portas abertas encontradas:")
                             if open_ports["tcp"]:
@@ -165,7 +292,7 @@ def analyze_host(ip):
                         start_port = int(input("Porta inicial: "))
                         end_port = int(input("Porta final: "))
                         print(f"\nProcurando portas abertas no host {ip} no intervalo {start_port}-{end_port}...")
-                        open_ports = find_open_ports(ip, start_port, end_port)
+                        open_ports = find_open_ports(ip, start_port, end_port, resume=resume, workers=workers, scan_type=scan_type)
                         if open_ports["tcp"] or open_ports["udp"]:
                             print("Portas abertas encontradas:")
                             if open_ports["tcp"]:
@@ -182,7 +309,7 @@ def analyze_host(ip):
                             print("Nenhuma porta aberta encontrada.")
                     elif suboption == 3:
                         print(f"\nAnalisando as portas mais utilizadas (Well-Known Ports) no host {ip}...")
-                        open_ports = find_open_ports(ip, start_port=1, end_port=1024)
+                        open_ports = find_open_ports(ip, start_port=1, end_port=1024, resume=resume, workers=workers, scan_type=scan_type)
                         if open_ports["tcp"] or open_ports["udp"]:
                             print("Portas abertas encontradas:")
                             if open_ports["tcp"]:
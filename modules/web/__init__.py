@@ -1,5 +1,16 @@
-from .tech_detector import DetectorTecnologias
-from .waf_detector import DetectorWAF
-from .ssl_analyzer import AnalisadorSSL
+import importlib
 
-__all__ = ['DetectorTecnologias', 'DetectorWAF', 'AnalisadorSSL'] 
\ No newline at end of file
+# Carregados no primeiro acesso: importar um detector não carrega os outros (bs4, cryptography...)
+_MODULOS = {
+    'DetectorTecnologias': '.tech_detector',
+    'DetectorWAF': '.waf_detector',
+    'AnalisadorSSL': '.ssl_analyzer',
+}
+
+__all__ = ['DetectorTecnologias', 'DetectorWAF', 'AnalisadorSSL']
+
+
+def __getattr__(nome):
+    if nome in _MODULOS:
+        return getattr(importlib.import_module(_MODULOS[nome], __name__), nome)
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
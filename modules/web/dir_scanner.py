@@ -1,7 +1,11 @@
 import requests
-from concurrent.futures import ThreadPoolExecutor
+from core.http import get_session
+from core.tracing import traced
+from core.runtime import get_runtime
+from core.timing import get_timing
+from core.deadline import expired
 from tqdm import tqdm
-from config.settings import USER_AGENT, WEB_TIMEOUT
+from config.settings import USER_AGENT
 import urllib3
 
 # Desativa avisos de SSL
@@ -9,6 +13,7 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 class EscaneadorDiretorios:
     def __init__(self):
+        self.timeout = get_timing().get('timeout', 'diretorios')
         self.diretorios_comuns = [
             "admin", "administrator", "backup", "bin", "config", "db", "debug",
             "dev", "docs", "download", "downloads", "files", "forum", "forums",
@@ -45,10 +50,10 @@ class EscaneadorDiretorios:
     def verificar_caminho(self, url_base, caminho):
         url = f"{url_base}/{caminho}"
         try:
-            resposta = requests.get(
+            resposta = get_session().get(
                 url,
                 headers={'User-Agent': USER_AGENT},
-                timeout=WEB_TIMEOUT,
+                timeout=self.timeout,
                 verify=False,
                 allow_redirects=False
             )
@@ -76,21 +81,33 @@ class EscaneadorDiretorios:
             pass
         return None
 
-    def escanear_diretorios(self, alvo, max_threads=10):
+    @traced()
+    def escanear_diretorios(self, alvo, max_threads=None):
         url_base = self.normalizar_url(alvo)
         caminhos_encontrados = []
         
         # Combina diretórios e arquivos para escanear
         caminhos_para_escanear = self.diretorios_comuns + self.arquivos_comuns
         
-        with ThreadPoolExecutor(max_workers=max_threads) as executor:
+        max_threads = max_threads or get_timing().get('threads', 'diretorios')
+        with get_runtime().group('diretorios', max_threads) as grupo:
             futures = []
             for caminho in caminhos_para_escanear:
-                futures.append(executor.submit(self.verificar_caminho, url_base, caminho))
+                futures.append(grupo.submit(self.verificar_caminho, url_base, caminho))
             
-            for future in tqdm(futures, total=len(caminhos_para_escanear), desc="Escaneando diretórios"):
-                resultado = future.result()
-                if resultado:
-                    caminhos_encontrados.append(resultado)
+            for future in tqdm(grupo.as_completed(futures), total=len(caminhos_para_escanear), desc="Escaneando diretórios"):
+                if expired():
+                    # Orçamento do alvo esgotado: os caminhos que ainda estão na fila nem saem
+                    grupo.cancel()
+                if not future.cancelled():
+                    future.result()
+        
+        # Na ordem das listas, não na de conclusão
+        for future in futures:
+            if future.cancelled():
+                continue
+            resultado = future.result()
+            if resultado:
+                caminhos_encontrados.append(resultado)
         
         return caminhos_encontrados 
\ No newline at end of file
@@ -1,17 +1,30 @@
+import contextlib
+import functools
 import ssl
 import socket
 import requests
+from core.http import get_session
+from core.ratelimit import get_rate_limiter
 from urllib.parse import urlparse
 import urllib3
 from typing import Dict, Optional
 import sys
-from config.settings import WEB_TIMEOUT
+from core.timing import get_timing
+from core.deadline import clamp
+from core.tracing import span, traced
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+
+@functools.lru_cache(maxsize=None)
+def _contexto(protocolo: Optional[int] = None) -> ssl.SSLContext:
+    """Contexto TLS reaproveitado entre análises (create_default_context carrega as CAs do sistema a cada chamada)"""
+    return ssl.create_default_context() if protocolo is None else ssl.SSLContext(protocolo)
+
+
 class AnalisadorSSL:
     def __init__(self):
-        self.timeout = WEB_TIMEOUT
+        self.timeout = get_timing().get('timeout', 'ssl')
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -37,19 +50,34 @@ class AnalisadorSSL:
             url = 'https://' + url
         return url.rstrip('/')
 
+    def _endereco(self, url: str):
+        """Extrai host e porta da URL (443 se a porta não for informada)"""
+        partes = urlparse(url)
+        return partes.hostname, partes.port or 443
+
+    @contextlib.contextmanager
+    def _conectar(self, context: ssl.SSLContext, dominio: str, porta: int, **atributos):
+        """Abre uma conexão TLS respeitando o limite de taxa; cada handshake vira um span"""
+        with span('tls', host=dominio, port=porta, **atributos) as atual:
+            get_rate_limiter().wait('request', dominio)
+            with socket.create_connection((dominio, porta), timeout=clamp(self.timeout)) as sock:
+                with context.wrap_socket(sock, server_hostname=dominio) as ssock:
+                    atual.set(protocol=ssock.version())
+                    yield ssock
+
+    @traced()
     def obter_info_certificado(self, url: str) -> Dict:
         """Obtém informações do certificado SSL/TLS"""
         try:
             url = self.normalizar_url(url)
-            dominio = urlparse(url).netloc
+            dominio, porta = self._endereco(url)
             
             # Usa o protocolo TLS mais moderno disponível
-            context = ssl.create_default_context()
+            context = _contexto()
             
-            with socket.create_connection((dominio, 443), timeout=self.timeout) as sock:
-                with context.wrap_socket(sock, server_hostname=dominio) as ssock:
-                    cert = ssock.getpeercert()
-                    return self._parse_certificado(cert, dominio)
+            with self._conectar(context, dominio, porta) as ssock:
+                cert = ssock.getpeercert()
+                return self._parse_certificado(cert, dominio)
                     
         except Exception as e:
             return {'erro': f'Falha ao obter certificado: {str(e)}'}
@@ -66,19 +94,19 @@ class AnalisadorSSL:
             'nomes_alternativos': cert.get('subjectAltName', [])
         }
 
+    @traced()
     def verificar_protocolos_ssl(self, url: str) -> Dict[str, bool]:
         """Verifica quais protocolos SSL/TLS são suportados pelo servidor"""
         resultados = {}
         try:
             url = self.normalizar_url(url)
-            dominio = urlparse(url).netloc
+            dominio, porta = self._endereco(url)
             
             for nome, protocolo in self.protocolos.items():
                 try:
-                    context = ssl.SSLContext(protocolo)
-                    with socket.create_connection((dominio, 443), timeout=self.timeout) as sock:
-                        with context.wrap_socket(sock, server_hostname=dominio) as ssock:
-                            resultados[nome] = True
+                    context = _contexto(protocolo)
+                    with self._conectar(context, dominio, porta, offered=nome):
+                        resultados[nome] = True
                 except Exception:
                     resultados[nome] = False
                     
@@ -87,11 +115,12 @@ class AnalisadorSSL:
             
         return resultados
 
+    @traced()
     def verificar_hsts(self, url: str) -> Dict:
         """Verifica se o servidor usa HTTP Strict Transport Security"""
         try:
             url = self.normalizar_url(url)
-            response = requests.get(
+            response = get_session().get(
                 url,
                 headers=self.headers,
                 verify=False,
@@ -116,20 +145,20 @@ class AnalisadorSSL:
         except (IndexError, ValueError):
             return None
 
+    @traced()
     def verificar_cifras(self, url: str) -> Dict:
         """Obtém informações sobre a cifra SSL em uso"""
         try:
             url = self.normalizar_url(url)
-            dominio = urlparse(url).netloc
+            dominio, porta = self._endereco(url)
             
-            context = ssl.create_default_context()
-            with socket.create_connection((dominio, 443), timeout=self.timeout) as sock:
-                with context.wrap_socket(sock, server_hostname=dominio) as ssock:
-                    cifra = ssock.cipher()
-                    return {
-                        'cifra': cifra[0],
-                        'protocolo': cifra[1],
-                        'bits': cifra[2]
-                    }
+            context = _contexto()
+            with self._conectar(context, dominio, porta) as ssock:
+                cifra = ssock.cipher()
+                return {
+                    'cifra': cifra[0],
+                    'protocolo': cifra[1],
+                    'bits': cifra[2]
+                }
         except Exception as e:
             return {'erro': str(e)}
\ No newline at end of file
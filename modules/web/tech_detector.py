@@ -1,11 +1,19 @@
 import requests
+from core.http import get_session
+from core.tracing import traced
+from core.timing import get_timing
 from bs4 import BeautifulSoup
 from typing import Dict, List
 import re
 from urllib.parse import urlparse
+import urllib3
+
+# Desativa avisos de SSL
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 class DetectorTecnologias:
     def __init__(self):
+        self.timeout = get_timing().get('timeout', 'web')
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -46,12 +54,13 @@ class DetectorTecnologias:
             url = 'https://' + url
         return url
 
+    @traced()
     def detectar_tecnologias(self, url):
         try:
             if not url.startswith(('http://', 'https://')):
                 url = 'http://' + url
             
-            resposta = requests.get(url, headers=self.headers, verify=False, timeout=10)
+            resposta = get_session().get(url, headers=self.headers, verify=False, timeout=self.timeout)
             conteudo = resposta.text
             soup = BeautifulSoup(conteudo, 'html.parser')
             
@@ -94,7 +103,7 @@ class DetectorTecnologias:
         """
         url = self.normalizar_url(url)
         try:
-            response = requests.head(url, headers=self.headers, timeout=10, verify=False)
+            response = get_session().head(url, headers=self.headers, timeout=self.timeout, verify=False)
             return dict(response.headers)
         except requests.exceptions.RequestException as e:
             return {'Erro': str(e)} 
\ No newline at end of file
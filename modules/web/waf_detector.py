@@ -1,15 +1,18 @@
 import requests
+from core.http import get_session
+from core.tracing import traced
 import re
 from typing import Dict, List, Optional
 import urllib3
-from config.settings import USER_AGENT, WEB_TIMEOUT
+from config.settings import USER_AGENT
+from core.timing import get_timing
 
 # Desativa avisos de SSL
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 class DetectorWAF:
     def __init__(self):
-        self.timeout = WEB_TIMEOUT
+        self.timeout = get_timing().get('timeout', 'waf')
         self.user_agent = USER_AGENT
         self.assinaturas_waf = self._carregar_assinaturas()
         self.payloads = self._carregar_payloads()
@@ -84,6 +87,7 @@ class DetectorWAF:
             url = 'http://' + url
         return url.rstrip('/')
 
+    @traced()
     def detectar_waf(self, alvo: str) -> Dict:
         """Detecta WAFs usando assinaturas e payloads"""
         url = self.normalizar_url(alvo)
@@ -110,7 +114,7 @@ class DetectorWAF:
     def _fazer_requisicao_segura(self, url: str) -> Optional[requests.Response]:
         """Faz requisição HTTP segura com tratamento de erros"""
         try:
-            return requests.get(
+            return get_session().get(
                 url,
                 headers={'User-Agent': self.user_agent},
                 timeout=self.timeout,
@@ -124,7 +128,7 @@ class DetectorWAF:
         bloqueios = []
         for payload in self.payloads:
             try:
-                resposta = requests.get(
+                resposta = get_session().get(
                     url,
                     params={'test': payload},
                     headers={'User-Agent': self.user_agent},
@@ -0,0 +1,12 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT_SCAN_DIR = os.path.join(ROOT, 'modules', 'port_scan')
+
+# Como no main.py: a raiz vem antes, e o pacote de script do scanner de portas no fim do
+# sys.path (o utils da raiz e o do scanner têm o mesmo get_service_name)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+if PORT_SCAN_DIR not in sys.path:
+    sys.path.append(PORT_SCAN_DIR)
@@ -0,0 +1,82 @@
+import time
+import pytest
+from core import batch
+from core.batch import BatchRunner
+from core.deadline import clamp
+from core.port_state import PortStateMap, CLOSED
+
+TARGETS = [f'10.0.0.{n}' for n in range(1, 9)]
+MODULE_TIME = 0.1
+PORT_SCAN_TIME = 0.5
+BUDGET = 0.3
+
+
+def _module(target):
+    # Como os módulos de verdade: o timeout da operação é encurtado para caber no prazo
+    time.sleep(clamp(MODULE_TIME))
+    return {'alvo': target}
+
+
+def _multi_tcp_scan(hosts, ports):
+    time.sleep(PORT_SCAN_TIME)
+    scans = {}
+    for host in hosts:
+        scans[host] = PortStateMap(host)
+        for port in ports:
+            scans[host].set(port, CLOSED)
+    return scans
+
+
+@pytest.fixture
+def stub_modules(monkeypatch):
+    monkeypatch.setitem(batch.TARGET_MODULES, 'web', _module)
+    monkeypatch.setitem(batch.TARGET_MODULES, 'dns', _module)
+    monkeypatch.setattr(batch, '_import_multi_tcp_scan', lambda: _multi_tcp_scan)
+
+
+def _incomplete(summary):
+    return [(target, module) for target, modules in summary['alvos'].items()
+            for module, entry in modules.items() if entry.get('incompleto')]
+
+
+def test_scan_de_portas_nao_consome_o_prazo_dos_alvos(stub_modules):
+    # O scan de portas ocupa uma vaga por mais tempo que o orçamento; os alvos que esperam
+    # na fila enquanto isso não podem chegar com o prazo vencido
+    runner = BatchRunner(['portas', 'web'], concurrency=2, ports=[80], target_budget=BUDGET, module_budget=None)
+    summary = runner.run(TARGETS)
+    assert summary['resumo']['erros'] == 0
+    assert _incomplete(summary) == []
+
+
+def test_espera_na_fila_nao_conta_no_prazo_do_alvo(stub_modules):
+    # Em largura, o dns de cada alvo só sai depois do web de todos: a espera passa do
+    # orçamento, mas o tempo rodando (2 x MODULE_TIME) cabe nele
+    runner = BatchRunner(['web', 'dns'], concurrency=2, target_budget=BUDGET, module_budget=None)
+    summary = runner.run(TARGETS)
+    assert summary['resumo']['erros'] == 0
+    assert _incomplete(summary) == []
+
+
+def test_alvo_sem_tempo_sai_incompleto(monkeypatch):
+    def slow(target):
+        time.sleep(clamp(1.0))
+        return {'alvo': target}
+
+    monkeypatch.setitem(batch.TARGET_MODULES, 'web', slow)
+    monkeypatch.setitem(batch.TARGET_MODULES, 'dns', slow)
+    runner = BatchRunner(['web', 'dns'], concurrency=2, target_budget=0.1, module_budget=None)
+    summary = runner.run(TARGETS[:1])
+    entries = summary['alvos'][TARGETS[0]]
+    assert entries['web']['incompleto'] and entries['dns']['incompleto']
+
+
+def test_modulo_que_terminou_depois_do_prazo_nao_sai_incompleto(monkeypatch):
+    # Nada foi cortado pelo prazo: o resultado está completo mesmo chegando depois dele
+    def uncut(target):
+        time.sleep(0.2)
+        return {'alvo': target}
+
+    monkeypatch.setitem(batch.TARGET_MODULES, 'web', uncut)
+    runner = BatchRunner(['web'], concurrency=1, target_budget=0.1, module_budget=None)
+    summary = runner.run(TARGETS[:1])
+    assert _incomplete(summary) == []
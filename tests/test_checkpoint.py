@@ -0,0 +1,57 @@
+import os
+from core.checkpoint import ScanJournal
+from core.port_state import PortStateMap, SPARSE_LIMIT, OPEN, CLOSED, FILTERED
+
+META = {'alvos': ['10.0.0.0/30'], 'portas': [1, 65535]}
+
+
+def _maps():
+    sparse = PortStateMap('10.0.0.1')
+    sparse.set(22, OPEN)
+    sparse.set(65535, FILTERED)
+    dense = PortStateMap('10.0.0.2')
+    for port in range(1, SPARSE_LIMIT * 2):
+        dense.set(port, CLOSED)
+    packed = PortStateMap('10.0.0.3', 'udp')
+    for port in range(1, SPARSE_LIMIT * 2):
+        packed.set(port, FILTERED)
+    packed.compact()
+    return [sparse, dense, packed, PortStateMap('10.0.0.4')]
+
+
+def test_snapshot_final_restaura_os_mapas(tmp_path):
+    path = str(tmp_path / 'scan.journal')
+    journal = ScanJournal(META, path, interval=60)
+    maps = _maps()
+    for state_map in maps:
+        journal.track(state_map)
+    journal.start()
+    maps[0].set(80, CLOSED)
+    journal.checkpoint()
+    journal.finish(complete=False)
+
+    loaded = ScanJournal(META, path).load()
+    # O host sem nenhuma porta escaneada não entra no diário
+    assert set(loaded) == {(m.host, m.protocol) for m in maps[:3]}
+    for state_map in maps[:3]:
+        assert loaded[(state_map.host, state_map.protocol)].to_dict() == state_map.to_dict()
+    assert len(loaded[('10.0.0.3', 'udp')]) == SPARSE_LIMIT * 2 - 1
+
+
+def test_checkpoint_so_grava_o_que_mudou(tmp_path):
+    path = str(tmp_path / 'scan.journal')
+    journal = ScanJournal(META, path, interval=60)
+    maps = _maps()
+    for state_map in maps:
+        journal.track(state_map)
+    journal.start()
+    size = os.path.getsize(path)
+    journal.checkpoint()
+    assert os.path.getsize(path) == size
+    maps[3].set(443, OPEN)
+    journal.checkpoint()
+    # Um registro em pares: cabeçalho, host e 3 bytes
+    assert os.path.getsize(path) - size == 7 + len('10.0.0.4') + 3
+    assert ScanJournal(META, path).load()[('10.0.0.4', 'tcp')].to_dict() == {443: 'Open'}
+    journal.finish(complete=True)
+    assert not os.path.exists(path)
@@ -0,0 +1,70 @@
+import asyncio
+import time
+import pytest
+from core.deadline import DeadlineExceeded, budget, bounded, check, clamp, expired, remaining
+
+
+def test_sem_limite_nao_muda_nada():
+    with budget() as limit:
+        assert limit is None
+        assert remaining() is None
+        assert clamp(5) == 5
+        check()
+
+
+def test_bloco_de_dentro_nao_passa_do_de_fora():
+    with budget(0.5) as outer:
+        with budget(10) as inner:
+            assert inner.expires == outer.expires
+        with budget(0.1) as inner:
+            assert inner.expires < outer.expires
+    assert remaining() is None
+
+
+def test_clamp_encurta_o_timeout():
+    with budget(0.5) as limit:
+        assert clamp(0.1) == 0.1
+        assert not limit.clamped
+        assert clamp(10) <= 0.5
+        assert limit.clamped and not limit.cut()
+
+
+def test_clamp_depois_do_prazo_esgota_e_propaga():
+    with budget(1) as outer:
+        with budget(0.01) as inner:
+            time.sleep(0.02)
+            with pytest.raises(DeadlineExceeded):
+                clamp(1)
+            assert inner.exhausted and inner.cut()
+        # O de dentro venceu antes: o corte não é do prazo de fora
+        assert not outer.exhausted
+    with budget(0.01) as outer:
+        with budget(1) as inner:
+            time.sleep(0.02)
+            with pytest.raises(DeadlineExceeded):
+                check()
+        assert inner.exhausted and outer.exhausted
+
+
+def test_timeout_encurtado_que_venceu_conta_como_corte():
+    with budget(0.01) as limit:
+        time.sleep(clamp(1))
+        assert limit.cut() and not limit.exhausted
+
+
+def test_expired_marca_o_prazo():
+    with budget(0.01) as limit:
+        assert not expired()
+        time.sleep(0.02)
+        assert expired() and limit.exhausted
+
+
+def test_bounded_cancela_no_prazo():
+    async def slow():
+        await asyncio.sleep(1)
+        return 'pronto'
+
+    with budget(0.05) as limit:
+        assert asyncio.run(bounded(slow())) is None
+        assert limit.exhausted
+    assert asyncio.run(bounded(asyncio.sleep(0, 'pronto'))) == 'pronto'
@@ -0,0 +1,99 @@
+import json
+import multiprocessing
+import socket
+import threading
+import time
+import zlib
+import pytest
+from scanner.distributed import (HELLO, LEASE, REJECT, ScanCoordinator, recv_frame, run_worker, send_frame)
+from scanner.tcp_scan import tcp_scan
+from core.port_state import FILTERED
+
+TOKEN = 'segredo'
+# Mais que um lote por worker (os lotes têm no mínimo 256 portas)
+PORTS = list(range(20000, 21000))
+
+
+@pytest.fixture
+def listeners():
+    # Algumas portas abertas no loopback, no meio do intervalo escaneado
+    sockets = []
+    for port in (PORTS[10], PORTS[300], PORTS[700]):
+        server = socket.socket()
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            server.bind(('127.0.0.1', port))
+        except OSError:
+            server.close()
+            continue
+        server.listen()
+        sockets.append(server)
+    if not sockets:
+        pytest.skip("nenhuma porta livre no loopback para o teste")
+    yield [server.getsockname()[1] for server in sockets]
+    for server in sockets:
+        server.close()
+
+
+def _serve(coordinator):
+    thread = threading.Thread(target=coordinator.serve, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while coordinator.server is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return thread, ('127.0.0.1', coordinator.server.getsockname()[1])
+
+
+def _hello(address, token):
+    conn = socket.create_connection(address)
+    send_frame(conn, HELLO, json.dumps({'name': 'teste', 'token': token}).encode())
+    return conn
+
+
+def _hold_lease(address, leased):
+    # Worker que pega um lote e trava no meio dele, até ser morto
+    conn = _hello(address, TOKEN)
+    kind, _ = recv_frame(conn)
+    assert kind == LEASE
+    leased.set()
+    time.sleep(60)
+
+
+def test_workers_locais_dao_o_mesmo_resultado_que_o_scan_direto(listeners):
+    coordinator = ScanCoordinator(['127.0.0.1'], PORTS, address=('127.0.0.1', 0), token=TOKEN)
+    assert len(coordinator.units) > 2
+    thread, address = _serve(coordinator)
+
+    with _hello(address, 'errado') as conn:
+        kind, _ = recv_frame(conn)
+    assert kind == REJECT
+
+    context = multiprocessing.get_context('fork')
+    leased = context.Event()
+    stalled = context.Process(target=_hold_lease, args=(address, leased), daemon=True)
+    stalled.start()
+    assert leased.wait(10)
+    stalled.kill()
+    stalled.join()
+
+    workers = [context.Process(target=run_worker, args=(address, TOKEN, f'worker{index}'), daemon=True)
+               for index in range(2)]
+    for worker in workers:
+        worker.start()
+    thread.join(60)
+    for worker in workers:
+        worker.join(10)
+    assert not thread.is_alive()
+    assert len(coordinator.completed) == len(coordinator.units)
+
+    expected = tcp_scan('127.0.0.1', PORTS)
+    results = coordinator.results['127.0.0.1']
+    assert results.to_dict() == expected.to_dict()
+    assert sorted(results.open_ports()) == sorted(listeners)
+
+    # Resultado atrasado do lote que o worker morto tinha (o primeiro da fila): já concluído
+    # por outro worker, é ignorado
+    host, ports = coordinator.units[0]
+    coordinator._complete(0, zlib.compress(bytes([FILTERED]) * len(ports)))
+    assert results.to_dict() == expected.to_dict()
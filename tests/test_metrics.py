@@ -0,0 +1,37 @@
+import threading
+from core.metrics import MetricsRegistry
+
+INCREMENTS = 20000
+
+
+def test_drain_concorrente_nao_perde_nem_duplica():
+    registry = MetricsRegistry()
+    counter = registry.counter('teste_total', 'teste')
+    histogram = registry.histogram('teste_seconds', 'teste')
+
+    def work():
+        for _ in range(INCREMENTS):
+            counter.inc()
+            histogram.observe(0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    total = 0
+    while any(thread.is_alive() for thread in threads):
+        total += registry.drain().get(('teste_total', ()), 0)
+    for thread in threads:
+        thread.join()
+    total += registry.drain().get(('teste_total', ()), 0)
+    assert total == 4 * INCREMENTS
+
+
+def test_reset_zera_todos_os_shards():
+    registry = MetricsRegistry()
+    counter = registry.counter('teste_total', 'teste', ['tipo'])
+    thread = threading.Thread(target=counter.inc, args=('outra',))
+    thread.start()
+    thread.join()
+    counter.inc('esta')
+    registry.reset()
+    assert registry.raw() == {}
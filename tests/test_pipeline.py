@@ -0,0 +1,82 @@
+import threading
+import pytest
+from core.pipeline import Pipeline, Stage
+
+
+def _pipeline(stages, inputs=('alvo',)):
+    return Pipeline('teste', stages, inputs=inputs)
+
+
+@pytest.mark.parametrize('stages, message', [
+    ([Stage('a', str, ['alvo']), Stage('a', str, ['alvo'])], 'nomes de etapas repetidos'),
+    ([Stage('alvo', str, ['alvo'])], 'nomes de etapas repetidos'),
+    ([Stage('a', str, ['alvo', 'porta'])], 'entradas desconhecidas: porta'),
+    ([Stage('a', str, ['b']), Stage('b', str, ['a'])], 'dependências circulares'),
+    ([Stage('a', str, ['alvo']), Stage('b', str, ['b'])], 'dependências circulares'),
+])
+def test_grafo_invalido_falha_na_montagem(stages, message):
+    with pytest.raises(ValueError, match=message):
+        _pipeline(stages)
+
+
+def test_etapas_recebem_as_dependencias_e_resultado_sai_na_ordem_declarada():
+    seen = []
+    pipeline = _pipeline([
+        Stage('soma', lambda a, b: a + b, ['dobro', 'triplo']),
+        Stage('dobro', lambda alvo: alvo * 2, ['alvo']),
+        Stage('triplo', lambda alvo: alvo * 3, ['alvo']),
+    ])
+    result = pipeline.run(on_result=lambda name, value: seen.append(name), alvo=2)
+    assert list(result) == ['soma', 'dobro', 'triplo']
+    assert result == {'soma': 10, 'dobro': 4, 'triplo': 6}
+    assert seen[-1] == 'soma' and sorted(seen[:2]) == ['dobro', 'triplo']
+
+
+def test_etapas_independentes_rodam_juntas():
+    # As duas só terminam se estiverem rodando ao mesmo tempo
+    barrier = threading.Barrier(2, timeout=5)
+    pipeline = _pipeline([
+        Stage('a', lambda alvo: barrier.wait() >= 0, ['alvo']),
+        Stage('b', lambda alvo: barrier.wait() >= 0, ['alvo']),
+    ])
+    assert pipeline.run(alvo='x') == {'a': True, 'b': True}
+
+
+def test_falta_de_entrada_e_falha_de_etapa():
+    def fail(alvo):
+        raise RuntimeError('falhou')
+
+    pipeline = _pipeline([Stage('a', fail, ['alvo']), Stage('b', str, ['a'])])
+    with pytest.raises(ValueError, match='faltam as entradas alvo'):
+        pipeline.run()
+    with pytest.raises(RuntimeError, match='falhou'):
+        pipeline.run(alvo='x')
+
+
+def test_etapa_demorada_nao_acumula_callbacks(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from core.runtime import TaskGroup
+    futures = {}
+    submit = TaskGroup.submit
+    # A etapa lenta roda fora do grupo, para a thread de run() nunca pegar ela e ficar presa
+    outside = ThreadPoolExecutor(1)
+
+    def tracked(group, fn, stage, args):
+        if stage.name == 'lenta':
+            futures[stage.name] = outside.submit(fn, stage, args)
+        else:
+            futures[stage.name] = submit(group, fn, stage, args)
+        return futures[stage.name]
+
+    monkeypatch.setattr(TaskGroup, 'submit', tracked)
+    done = threading.Event()
+    stages = [Stage('lenta', lambda alvo: done.wait(5), ['alvo'])]
+    # Cadeia de etapas rápidas: cada uma que termina é uma volta do laço de run()
+    previous = 'alvo'
+    for index in range(20):
+        stages.append(Stage(f'r{index}', lambda value: value, [previous]))
+        previous = f'r{index}'
+    stages.append(Stage('fim', lambda value: done.set(), [previous]))
+    with outside:
+        assert _pipeline(stages).run(alvo='x')['lenta'] is True
+    assert len(futures['lenta']._done_callbacks) == 1
@@ -0,0 +1,62 @@
+import threading
+import pytest
+from core.port_state import PortStateMap, SPARSE_LIMIT, OPEN, CLOSED, FILTERED
+
+
+def test_poucas_portas_ficam_no_dicionario():
+    state_map = PortStateMap('10.0.0.1')
+    state_map[80] = 'Open'
+    state_map.set(22, CLOSED)
+    assert state_map._states is None
+    assert state_map.to_dict() == {22: 'Closed', 80: 'Open'}
+    assert state_map.pending([22, 80, 443]) == [443]
+    assert state_map.counts()['Open'] == 1 and len(state_map) == 2
+
+
+def test_passa_para_bytearray_e_compacta():
+    state_map = PortStateMap('10.0.0.1')
+    for port in range(SPARSE_LIMIT + 10):
+        state_map.set(port, OPEN if port % 2 else CLOSED)
+    assert state_map._states is not None
+    before = state_map.to_dict()
+    state_map.compact()
+    assert state_map._states is None
+    assert state_map.to_dict() == before and state_map.state(1) == OPEN and 5000 not in state_map
+    # Escrever depois de compactar volta para o bytearray sem perder nada
+    state_map.set(5000, FILTERED)
+    assert len(state_map) == len(before) + 1
+
+
+def test_snapshot_preserva_os_estados():
+    state_map = PortStateMap('10.0.0.1')
+    state_map.set(443, OPEN)
+    loaded = PortStateMap.from_bytes(state_map.to_bytes(), '10.0.0.1')
+    assert loaded.to_dict() == {443: 'Open'}
+
+
+def test_troca_de_representacao_nao_perde_escritas():
+    state_map = PortStateMap('10.0.0.1')
+
+    def write(offset):
+        for port in range(offset, 4000, 4):
+            state_map.set(port, OPEN)
+
+    threads = [threading.Thread(target=write, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(state_map) == 4000
+
+
+def test_porta_fora_do_intervalo():
+    state_map = PortStateMap('10.0.0.1')
+    for port in range(SPARSE_LIMIT + 1):
+        state_map.set(port, CLOSED)
+    assert state_map._states is not None
+    for port in (-1, 65536):
+        with pytest.raises(ValueError):
+            state_map.set(port, OPEN)
+        with pytest.raises(ValueError):
+            PortStateMap('10.0.0.2').set(port, OPEN)
+    assert state_map.count(OPEN) == 0 and 65535 not in state_map
@@ -0,0 +1,112 @@
+import collections
+import threading
+import time
+from core.scheduler import URGENT, Scheduler
+
+
+class _Recorder:
+    """Registra a ordem de execução e o pico de execuções simultâneas por alvo e por módulo"""
+
+    def __init__(self):
+        self.order = []
+        self.running = collections.Counter()
+        self.peak = collections.Counter()
+        self.lock = threading.Lock()
+
+    def job(self, name, keys=(), pause=0.0):
+        with self.lock:
+            self.order.append(name)
+            for key in keys:
+                self.running[key] += 1
+                self.peak[key] = max(self.peak[key], self.running[key])
+        time.sleep(pause)
+        with self.lock:
+            for key in keys:
+                self.running[key] -= 1
+
+
+def _blocked(scheduler):
+    # Ocupa uma vaga enquanto a fila é montada
+    gate = threading.Event()
+    scheduler.submit(None, 'bloqueio', gate.wait, 5)
+    return gate
+
+
+def test_alvos_andam_juntos_e_urgente_passa_na_frente():
+    recorder = _Recorder()
+    with Scheduler('teste', concurrency=1) as scheduler:
+        gate = _blocked(scheduler)
+        for target, count in (('a', 3), ('b', 2)):
+            for index in range(count):
+                scheduler.submit(target, f'm{index}', recorder.job, f'{target}{index}')
+        scheduler.submit('c', 'm0', recorder.job, 'c0', priority=URGENT)
+        gate.set()
+    assert recorder.order == ['c0', 'a0', 'b0', 'a1', 'b1', 'a2']
+
+
+def test_promote_adianta_os_trabalhos_na_fila():
+    recorder = _Recorder()
+    with Scheduler('teste', concurrency=1) as scheduler:
+        gate = _blocked(scheduler)
+        for target in ('a', 'b'):
+            for index in range(2):
+                scheduler.submit(target, f'm{index}', recorder.job, f'{target}{index}')
+        assert scheduler.promote('b') == 2
+        gate.set()
+    assert recorder.order == ['b0', 'b1', 'a0', 'a1']
+
+
+def test_limite_por_modulo_e_rigido():
+    recorder = _Recorder()
+    with Scheduler('teste', concurrency=4, module_limits={'dns': 1}) as scheduler:
+        for index in range(4):
+            scheduler.submit(f'alvo{index}', 'dns', recorder.job, index, ['dns'], 0.05)
+            scheduler.submit(f'alvo{index}', 'web', recorder.job, index, ['web'], 0.05)
+    assert recorder.peak['dns'] == 1
+    assert recorder.peak['web'] > 1
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_limite_por_alvo_so_segura_quando_ha_outro_trabalho():
+    recorder = _Recorder()
+    hold = threading.Event()
+    with Scheduler('teste', concurrency=2, per_target=1, module_limits={}) as scheduler:
+        gates = [_blocked(scheduler) for _ in range(2)]
+        for name in ('a0', 'a1', 'b0'):
+            scheduler.submit(name[0], f'm{name[1]}', lambda name=name: (recorder.job(name), hold.wait(5)))
+        gates[0].set()
+        _wait_for(lambda: len(recorder.order) == 1)
+        # a já tem um em andamento: a vaga vai para b, mesmo a1 estando na frente
+        gates[1].set()
+        _wait_for(lambda: len(recorder.order) == 2)
+        assert recorder.order == ['a0', 'b0']
+        hold.set()
+    assert recorder.order == ['a0', 'b0', 'a1']
+
+    recorder = _Recorder()
+    hold = threading.Event()
+    with Scheduler('teste', concurrency=2, per_target=1, module_limits={}) as scheduler:
+        for name in ('a0', 'a1'):
+            scheduler.submit('a', f'm{name[1]}', lambda name=name: (recorder.job(name), hold.wait(5)))
+        # Sozinho na fila, o alvo usa as duas vagas
+        _wait_for(lambda: len(recorder.order) == 2)
+        hold.set()
+
+
+def test_cancel_descarta_a_fila():
+    recorder = _Recorder()
+    scheduler = Scheduler('teste', concurrency=1)
+    gate = _blocked(scheduler)
+    futures = [scheduler.submit('a', f'm{index}', recorder.job, index) for index in range(3)]
+    assert scheduler.stats()['na_fila'] == 3
+    scheduler.cancel()
+    gate.set()
+    scheduler.wait()
+    assert all(future.cancelled() for future in futures)
+    assert recorder.order == [] and scheduler.stats()['na_fila'] == 0
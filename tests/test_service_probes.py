@@ -0,0 +1,36 @@
+import os
+import pickle
+import pytest
+from core.service_probes import CACHE_VERSION, ServiceDatabase
+
+PROBES = """Probe TCP NULL q||
+match ssh m|^SSH-([\\d.]+)-OpenSSH_([\\w._-]+)| p/OpenSSH/ v/$2/
+"""
+
+
+@pytest.fixture
+def probes_file(tmp_path):
+    path = tmp_path / 'probes'
+    path.write_text(PROBES, encoding='latin-1')
+    return str(path)
+
+
+def _cache_key(path):
+    stat = os.stat(path)
+    return (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+
+
+@pytest.mark.parametrize('content', [
+    b'\x80\x05\x95',  # truncado
+    b'nao e pickle',
+    None,  # chave certa, conteúdo de outro formato
+])
+def test_cache_ruim_volta_para_a_base(tmp_path, probes_file, content):
+    cache = tmp_path / 'cache.pickle'
+    if content is None:
+        content = pickle.dumps({'key': _cache_key(probes_file), 'probes': 5})
+    cache.write_bytes(content)
+    database = ServiceDatabase.load(probes_file, str(cache))
+    assert database.identify(22, b'SSH-2.0-OpenSSH_9.6\r\n')['version'] == '9.6'
+    # O cache é regravado com a base lida do arquivo
+    assert pickle.loads(cache.read_bytes())['key'] == _cache_key(probes_file)
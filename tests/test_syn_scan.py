@@ -0,0 +1,40 @@
+import socket
+import pytest
+from scanner.syn_scan import SynCookie, build_syn, parse_reply, syn_scan, syn_supported
+from core.port_state import OPEN, CLOSED
+
+needs_raw = pytest.mark.skipif(not syn_supported(), reason="SYN scan requer Linux e CAP_NET_RAW")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_cookie_depende_do_alvo():
+    cookie = SynCookie(b'0' * 16)
+    assert cookie('127.0.0.1', 80, 40000) == cookie('127.0.0.1', 80, 40000)
+    assert cookie('127.0.0.1', 80, 40000) != cookie('127.0.0.1', 81, 40000)
+    assert cookie('127.0.0.1', 80, 40000) != SynCookie(b'1' * 16)('127.0.0.1', 80, 40000)
+
+
+def test_parse_reply_le_o_syn_montado():
+    segment = build_syn('127.0.0.1', '127.0.0.1', 40000, 80, 1234)
+    # Cabeçalho IPv4 mínimo (20 bytes) com só os endereços preenchidos
+    ip_header = bytes([0x45]) + bytes(11) + socket.inet_aton('127.0.0.1') + socket.inet_aton('127.0.0.1')
+    assert parse_reply(ip_header + segment) == ('127.0.0.1', 40000, 80, 0, 0x02)
+    assert parse_reply(ip_header + segment[:10]) is None
+
+
+@needs_raw
+def test_syn_scan_loopback():
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+        open_port = listener.getsockname()[1]
+        closed_port = _free_port()
+        results = syn_scan('127.0.0.1', [open_port, closed_port], timeout=0.5, retries=1)
+    assert results.state(open_port) == OPEN
+    assert results.state(closed_port) == CLOSED
+    assert list(results.open_ports()) == [open_port]
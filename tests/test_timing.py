@@ -0,0 +1,52 @@
+import pytest
+from core.timing import TimingProfile
+
+
+def test_alias_numerico_e_valores_do_perfil():
+    profile = TimingProfile('2')
+    assert profile.name == 'polite'
+    assert profile.get('retries') == 2
+    # Valor do perfil para o módulo antes do valor geral
+    assert profile.get('timeout', 'descoberta') == 1
+    assert profile.get('timeout', 'web') == 15
+
+
+def test_ajuste_do_modulo_vence_o_geral():
+    profile = TimingProfile('normal', ['timeout=7', 'dns.timeout=1.5', 'retries=0'])
+    assert profile.get('timeout', 'web') == 7
+    assert profile.get('timeout', 'dns') == 1.5
+    assert profile.get('retries') == 0
+
+
+def test_rtt_concurrency_e_rate():
+    profile = TimingProfile('normal', ['portas.rtt=0.5,0.1,2', 'concurrency=0', 'rate.probe=300/20', 'rate.query=40'])
+    assert profile.get('rtt', 'portas') == (0.5, 0.1, 2.0)
+    # 0 volta ao padrão calculado pelo módulo
+    assert profile.get('concurrency') is None
+    assert profile.rates['probe'] == (300.0, 20.0)
+    assert profile.rates['query'] == (40.0, 0.0)
+
+
+@pytest.mark.parametrize('override, message', [
+    ('timeout', "sem '='"),
+    ('ftp.timeout=1', 'módulo desconhecido'),
+    ('velocidade=1', 'chave desconhecida'),
+    ('timeout=0', 'valor inválido'),
+    ('timeout=rápido', 'valor inválido'),
+    ('rtt=1,2,3', 'valor inválido'),
+    ('threads=0', 'valor inválido'),
+    ('retries=-1', 'valor inválido'),
+    ('rate.probe=muito', 'valor inválido'),
+    ('rate.probe=-5', 'valor inválido'),
+    ('rate.request=10/-1', 'valor inválido'),
+    ('rate.query=inf', 'valor inválido'),
+    ('rate.bogus=10', 'tipo de taxa desconhecido'),
+])
+def test_ajustes_invalidos(override, message):
+    with pytest.raises(ValueError, match=message):
+        TimingProfile('normal', [override])
+
+
+def test_perfil_desconhecido():
+    with pytest.raises(ValueError, match='perfil de temporização desconhecido'):
+        TimingProfile('turbo')
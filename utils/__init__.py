@@ -1,13 +1,21 @@
-from .cli import (
-    display_banner, display_main_menu, display_web_menu,
-    get_target, display_results, display_error, display_success,
-    display_progress, display_hosts
-)
-from .logger import Logger
-from .output import OutputManager
+import importlib
+
+# Submódulos carregados no primeiro acesso: `from utils.cli import ...` não carrega
+# logging nem o gerenciador de saída
+_EXPORTS = {
+    'display_banner': 'cli', 'display_main_menu': 'cli', 'display_web_menu': 'cli',
+    'get_target': 'cli', 'display_results': 'cli', 'display_error': 'cli', 'display_success': 'cli',
+    'display_progress': 'cli', 'display_hosts': 'cli', 'Logger': 'logger', 'OutputManager': 'output',
+}
 
 __all__ = [
     'display_banner', 'display_main_menu', 'display_web_menu',
     'get_target', 'display_results', 'display_error', 'display_success',
     'display_progress', 'display_hosts', 'Logger', 'OutputManager'
-] 
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
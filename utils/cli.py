@@ -1,24 +1,17 @@
 import argparse
 from ipaddress import ip_address
-from modules.web.tech_detector import DetectorTecnologias
-from modules.dns.enumerator import EnumeradorDNS
-from modules.network.network_scanner import ScannerRede
-import ipaddress
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich.prompt import Prompt, Confirm
-from rich import print as rprint
-import socket
-from typing import List, Optional, Dict, Any
-from colorama import Fore, Style, init
-from tqdm import tqdm
-import sys
+from typing import List, Optional
 import os
-import time
-from utils.port_services import obter_nome_servico
 
-console = Console()
+_console = None
+
+def _get_console():
+    """Console do rich, carregado só quando um menu display_* é usado"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Scanner de Portas')
@@ -125,14 +118,17 @@ def aguardar_tecla():
     input("\nPressione Enter para continuar...")
 
 def display_banner():
+    from rich.panel import Panel
     banner = """
     [bold red]RECONBOMB[/bold red] - Ferramenta de Reconhecimento de Segurança
     [italic]Desenvolvido para testes de penetração[/italic]
     """
-    console.print(Panel(banner, style="bold blue"))
+    _get_console().print(Panel(banner, style="bold blue"))
 
 def display_main_menu() -> int:
-    console.print("\n[bold cyan]Menu Principal[/bold cyan]")
+    from rich.prompt import Prompt
+    from rich.table import Table
+    _get_console().print("\n[bold cyan]Menu Principal[/bold cyan]")
     menu = Table(show_header=False, box=None)
     menu.add_row("1", "Escanear rede local")
     menu.add_row("2", "Escanear um host específico")
@@ -141,38 +137,42 @@ def display_main_menu() -> int:
     menu.add_row("5", "Análise SSL/TLS")
     menu.add_row("6", "Sair")
     
-    console.print(menu)
+    _get_console().print(menu)
     
     while True:
         try:
             choice = int(Prompt.ask("\nSelecione uma opção", choices=["1", "2", "3", "4", "5", "6"]))
             return choice
         except ValueError:
-            console.print("[red]Opção inválida. Tente novamente.[/red]")
+            _get_console().print("[red]Opção inválida. Tente novamente.[/red]")
 
 def display_web_menu() -> int:
-    console.print("\n[bold cyan]Menu de Reconhecimento Web[/bold cyan]")
+    from rich.prompt import Prompt
+    from rich.table import Table
+    _get_console().print("\n[bold cyan]Menu de Reconhecimento Web[/bold cyan]")
     menu = Table(show_header=False, box=None)
     menu.add_row("1", "Detectar Tecnologias Web")
     menu.add_row("2", "Enumerar Diretórios")
     menu.add_row("3", "Detectar WAF")
     menu.add_row("4", "Voltar ao Menu Principal")
     
-    console.print(menu)
+    _get_console().print(menu)
     
     while True:
         try:
             choice = int(Prompt.ask("\nSelecione uma opção", choices=["1", "2", "3", "4"]))
             return choice
         except ValueError:
-            console.print("[red]Opção inválida. Tente novamente.[/red]")
+            _get_console().print("[red]Opção inválida. Tente novamente.[/red]")
 
 def get_target() -> str:
+    from rich.prompt import Prompt
     target = Prompt.ask("\nDigite o alvo (IP, URL ou domínio)")
     return target.strip()
 
 def display_results(title: str, results: dict):
-    console.print(f"\n[bold green]{title}[/bold green]")
+    from rich.table import Table
+    _get_console().print(f"\n[bold green]{title}[/bold green]")
     
     table = Table(show_header=True, header_style="bold magenta")
     table.add_column("Item")
@@ -181,22 +181,25 @@ def display_results(title: str, results: dict):
     for key, value in results.items():
         table.add_row(str(key), str(value))
     
-    console.print(table)
+    _get_console().print(table)
 
 def display_error(message: str):
-    console.print(f"[bold red]Erro:[/bold red] {message}")
+    _get_console().print(f"[bold red]Erro:[/bold red] {message}")
 
 def display_success(message: str):
-    console.print(f"[bold green]Sucesso:[/bold green] {message}")
+    _get_console().print(f"[bold green]Sucesso:[/bold green] {message}")
 
 def display_progress(message: str):
-    console.print(f"[yellow]{message}[/yellow]")
+    _get_console().print(f"[yellow]{message}[/yellow]")
 
 def confirm_action(message: str) -> bool:
+    from rich.prompt import Confirm
     return Confirm.ask(message)
 
 def display_hosts(hosts: List[str]) -> Optional[str]:
-    console.print("\n[bold cyan]Hosts Encontrados:[/bold cyan]")
+    from rich.prompt import Prompt
+    from rich.table import Table
+    _get_console().print("\n[bold cyan]Hosts Encontrados:[/bold cyan]")
     
     table = Table(show_header=True, header_style="bold magenta")
     table.add_column("Número")
@@ -205,7 +208,7 @@ def display_hosts(hosts: List[str]) -> Optional[str]:
     for i, host in enumerate(hosts, 1):
         table.add_row(str(i), host)
     
-    console.print(table)
+    _get_console().print(table)
     
     while True:
         try:
@@ -214,4 +217,4 @@ def display_hosts(hosts: List[str]) -> Optional[str]:
                 return None
             return hosts[choice - 1]
         except (ValueError, IndexError):
-            console.print("[red]Opção inválida. Tente novamente.[/red]")
+            _get_console().print("[red]Opção inválida. Tente novamente.[/red]")